@@ -5,6 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 from database import Base
+from database.types import IdType
 import models
 import os
 from dotenv import load_dotenv
@@ -32,6 +33,17 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+# id columns are rendered as IdType with the storage they were declared with
+def render_item(type_, obj, autogen_context):
+    if type_ == "type" and isinstance(obj, IdType):
+        autogen_context.imports.add("from database.types import IdType")
+        if obj.storage == "string":
+            return "IdType()"
+        return f"IdType(storage={obj.storage!r})"
+    return False
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -56,6 +68,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        render_item=render_item,
     )
 
     with context.begin_transaction():
@@ -76,7 +89,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_item=render_item,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
@@ -5,3 +5,5 @@ from apis.cloud_nary import cloudinary_router
 from apis.admins import admin_router
 from apis.settings import settings_router
 from apis.organization import org_router
+from apis.internal import internal_router
+from apis.metrics import metrics_router
@@ -16,7 +16,6 @@ from cruds import (
     save_default_roles,
     get_steps,
     get_user_via_salt,
-    create_remain,
 )
 from helpers import (
     validate_password,
@@ -50,7 +49,6 @@ async def login(
         password = login_data.password
 
         logger.info(f"{email}: email")
-        logger.info(f"{password}: password")
         # background_tasks.add_task(save_default_side_menus, db)
         # save_default_side_menus(db)
         # await save_default_roles(db)
@@ -160,7 +158,6 @@ async def get_token(
 @auth_router.post("/register", status_code=status.HTTP_200_OK)
 async def register(
     register_data: RegisterSchema,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     try:
@@ -207,8 +204,6 @@ async def register(
 
         access_token = create_access_token(data={"sub": user.id})
 
-        background_tasks.add_task(create_remain, user.id)
-
         return {
             "detail": "User registered successfully",
             "access_token": access_token,
@@ -8,6 +8,7 @@ import cloudinary_config
 from sqlalchemy.orm import Session
 from cloudinary_config import cloudinary
 import time
+from monitoring.tracing import span
 from constants import CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET
 
 cloudinary_router = APIRouter(prefix="/cloudinary", tags=["Cloudinary"])
@@ -55,7 +56,8 @@ async def upload_file(request: Request, db: Session = Depends(get_db)):
         params_to_sign["folder"] = folder if folder else None
 
         if action == "upload":
-            result = cloudinary.uploader.upload(file, **params_to_sign)
+            with span("cloudinary upload", "client"):
+                result = cloudinary.uploader.upload(file, **params_to_sign)
             logger.info(f"result: {result}")
             file_url = result["secure_url"]
 
@@ -70,7 +72,8 @@ async def upload_file(request: Request, db: Session = Depends(get_db)):
             params_to_sign["public_id"] = (
                 f"{folder}/{public_id}" if folder else public_id
             )
-            result = cloudinary.uploader.destroy(**params_to_sign)
+            with span("cloudinary destroy", "client"):
+                result = cloudinary.uploader.destroy(**params_to_sign)
             logger.info(f"result: {result}")
 
             if result["result"] == "ok":
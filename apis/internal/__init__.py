@@ -0,0 +1,209 @@
+from fastapi import APIRouter, status, Depends, HTTPException, Query
+from security import get_superadmin
+from models import Users
+from logger import logger
+from database import engine, replica_engines
+from database.pool import pool_state
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+from constants import MEMORY_TRACEMALLOC_FRAMES
+from monitoring import (
+    top_slow_queries,
+    list_profiles,
+    profile_path,
+    recent_traces,
+    get_trace,
+    memory_summary,
+    start_tracemalloc,
+    stop_tracemalloc,
+    take_snapshot,
+    compare_snapshots,
+)
+from constants import EXCEPTION_MESSAGE
+
+
+internal_router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+# connection pool state of the worker serving the request
+@internal_router.get("/pool", status_code=status.HTTP_200_OK)
+async def get_pool_state(current_user: Users = Depends(get_superadmin)):
+    try:
+        return {
+            "detail": "Data fetched successfully",
+            "data": {
+                "primary": pool_state(engine),
+                "replicas": [pool_state(replica) for replica in replica_engines],
+            },
+        }
+    except Exception as e:
+        logger.exception("traceback from pool state")
+        logger.error(f"{e} : error from pool state")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=EXCEPTION_MESSAGE
+        )
+
+
+# slowest statement shapes of all workers, with their plans when captured
+@internal_router.get("/slow_queries", status_code=status.HTTP_200_OK)
+async def get_slow_queries(
+    current_user: Users = Depends(get_superadmin),
+    limit: int = Query(20, gt=0, le=200),
+    order: str = Query("total", pattern="^(total|max)$"),
+):
+    try:
+        return {
+            "detail": "Data fetched successfully",
+            "data": top_slow_queries(limit, order),
+        }
+    except Exception as e:
+        logger.exception("traceback from slow queries")
+        logger.error(f"{e} : error from slow queries")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=EXCEPTION_MESSAGE
+        )
+
+
+# profiles taken by the profiling middleware, newest first
+@internal_router.get("/profiles", status_code=status.HTTP_200_OK)
+async def get_profiles(
+    current_user: Users = Depends(get_superadmin),
+    route: str = None,
+    limit: int = Query(50, gt=0, le=500),
+):
+    try:
+        return {
+            "detail": "Data fetched successfully",
+            "data": list_profiles(route)[:limit],
+        }
+    except Exception as e:
+        logger.exception("traceback from profiles")
+        logger.error(f"{e} : error from profiles")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=EXCEPTION_MESSAGE
+        )
+
+
+# the profile of one request as an html call tree
+@internal_router.get("/profiles/{profile_id}", status_code=status.HTTP_200_OK)
+async def get_profile(
+    profile_id: str,
+    current_user: Users = Depends(get_superadmin),
+):
+    path = profile_path(profile_id)
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    return FileResponse(path, media_type="text/html")
+
+
+# recently finished traces of all workers, slowest first
+@internal_router.get("/traces", status_code=status.HTTP_200_OK)
+async def get_traces(
+    current_user: Users = Depends(get_superadmin),
+    route: str = None,
+    min_ms: float = Query(0, ge=0),
+    limit: int = Query(50, gt=0, le=500),
+):
+    try:
+        return {
+            "detail": "Data fetched successfully",
+            "data": recent_traces(route, min_ms, limit),
+        }
+    except Exception as e:
+        logger.exception("traceback from traces")
+        logger.error(f"{e} : error from traces")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=EXCEPTION_MESSAGE
+        )
+
+
+# every span of one trace, in start order
+@internal_router.get("/traces/{trace_id}", status_code=status.HTTP_200_OK)
+async def get_one_trace(
+    trace_id: str,
+    current_user: Users = Depends(get_superadmin),
+):
+    trace = get_trace(trace_id)
+    if not trace:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found"
+        )
+    return {"detail": "Data fetched successfully", "data": trace}
+
+
+# memory of the worker serving the request
+@internal_router.get("/memory", status_code=status.HTTP_200_OK)
+async def get_memory(current_user: Users = Depends(get_superadmin)):
+    try:
+        summary = await run_in_threadpool(memory_summary)
+        return {"detail": "Data fetched successfully", "data": summary}
+    except Exception as e:
+        logger.exception("traceback from memory")
+        logger.error(f"{e} : error from memory")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=EXCEPTION_MESSAGE
+        )
+
+
+# start or stop tracing allocations in the worker serving the request
+@internal_router.post("/memory/tracemalloc", status_code=status.HTTP_200_OK)
+async def toggle_tracemalloc(
+    current_user: Users = Depends(get_superadmin),
+    action: str = Query(..., pattern="^(start|stop)$"),
+    frames: int = Query(MEMORY_TRACEMALLOC_FRAMES, gt=0, le=100),
+):
+    if action == "start":
+        start_tracemalloc(frames)
+        detail = "tracemalloc started"
+    else:
+        # stopping frees every trace, which takes a while on a large heap
+        await run_in_threadpool(stop_tracemalloc)
+        detail = "tracemalloc stopped"
+    return {"detail": detail, "data": await run_in_threadpool(memory_summary)}
+
+
+# snapshot the allocations of the worker serving the request
+@internal_router.post("/memory/snapshots", status_code=status.HTTP_201_CREATED)
+async def create_memory_snapshot(
+    current_user: Users = Depends(get_superadmin),
+    limit: int = Query(25, gt=0, le=200),
+):
+    try:
+        snapshot = await run_in_threadpool(take_snapshot, limit)
+        if not snapshot:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="tracemalloc is not running in this worker",
+            )
+        return {"detail": "Snapshot taken", "data": snapshot}
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback from memory snapshot")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback from memory snapshot")
+        logger.error(f"{e} : error from memory snapshot")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=EXCEPTION_MESSAGE
+        )
+
+
+# growth since an earlier snapshot of the same worker
+@internal_router.get(
+    "/memory/snapshots/{snapshot_id}/diff", status_code=status.HTTP_200_OK
+)
+async def diff_memory_snapshots(
+    snapshot_id: int,
+    current_user: Users = Depends(get_superadmin),
+    against: int = None,
+    limit: int = Query(25, gt=0, le=200),
+):
+    diff = await run_in_threadpool(compare_snapshots, snapshot_id, against, limit)
+    if not diff:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshots not found in this worker",
+        )
+    return {"detail": "Data fetched successfully", "data": diff}
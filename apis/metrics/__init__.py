@@ -0,0 +1,22 @@
+import secrets
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from prometheus_client import CONTENT_TYPE_LATEST
+from constants import METRICS_TOKEN
+from monitoring import render_metrics
+
+
+metrics_router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+# prometheus text format, scraped by the autoscaler. Set METRICS_TOKEN, or keep
+# the path off the public port at the proxy or firewall: the samples name every
+# route and code site of the app
+@metrics_router.get("", include_in_schema=False)
+def get_metrics(request: Request):
+    if METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
+        )
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
@@ -7,7 +7,8 @@ from fastapi import (
     Query,
     BackgroundTasks,
 )
-from security import get_current_user
+from fastapi.responses import StreamingResponse
+from security import get_current_user, get_hr_admin, is_hr_admin
 from sqlalchemy.orm import Session
 from models import Users, FileType
 from cruds import (
@@ -16,7 +17,6 @@ from cruds import (
     email_exists_in_org,
     get_one_employee,
     construct_employee_details,
-    create_remain,
     edit_employee_details,
     create_compensation,
     create_edit_uploaded_files,
@@ -32,6 +32,7 @@ from cruds import (
     holiday_exists,
     get_one_holiday,
     get_holidays,
+    invalidate_holiday_calendar,
     get_work_hours,
     set_work_hours,
     get_current_clock_in,
@@ -39,6 +40,21 @@ from cruds import (
     create_attendance,
     get_my_attendance,
     get_compensation_paginated,
+    get_timesheet_report,
+    get_presence,
+    ingest_attendance,
+    run_employee_import,
+    count_working_days,
+    get_leave_balance,
+    get_overlapping_leave,
+    get_leave_calendar,
+    decide_leave_requests,
+    stream_attendance_report,
+    create_payroll_run,
+    get_payroll_run,
+    get_payroll_runs,
+    get_payroll_run_items,
+    run_payroll,
 )
 from helpers import (
     validate_phone_number,
@@ -48,17 +64,40 @@ from helpers import (
     validate_correct_email,
     get_ip_address,
     get_country_by_ip_address,
+    stream_records,
+    read_records,
+)
+from schemas import (
+    CreateEmployeeSchema,
+    LeaveRequestSchema,
+    LeaveDecisionSchema,
+    PayrollRunSchema,
 )
-from schemas import CreateEmployeeSchema, LeaveRequestSchema
 from typing import List
-from database import get_db
+from database import get_db, get_read_db
 from utils import limiter
 from logger import logger
 from connections import redis_conn
 import json
 from apis.users import user_router
-from datetime import datetime
+from datetime import datetime, timedelta
 from decorators import cache_it
+from workers.jobs.payroll_jobs import process_payroll_run
+from services.employee_import import (
+    XLSX_CONTENT_TYPE,
+    new_progress,
+    get_progress,
+    save_progress,
+)
+from helpers import generate_uuid
+import tempfile
+from services.email import send_bulk_email
+from constants import (
+    ATTENDANCE_BULK_MAX_BYTES,
+    EMPLOYEE_IMPORT_MAX_BYTES,
+    LEAVE_CALENDAR_MAX_DAYS,
+)
+import os
 
 
 emp_tag = "Employees"
@@ -73,7 +112,7 @@ emp_tag = "Employees"
 @cache_it("employees", org=True)
 async def get_all_employees(
     current_user: Users = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, gt=0),
     per_page: int = Query(10, gt=0),
 ):
@@ -135,7 +174,6 @@ async def get_employee(
 )
 async def create_employee(
     request_data: CreateEmployeeSchema,
-    background_tasks: BackgroundTasks,
     current_user: Users = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -170,7 +208,6 @@ async def create_employee(
         user = await create_one_employee(
             db, last_name, first_name, res[1], date_joined, current_user.organization_id
         )
-        background_tasks.add_task(create_remain, user.id)
         return {"detail": "Successful", "user_id": user.id}
     except HTTPException as http_exc:
         # Log the HTTPException if needed
@@ -184,6 +221,103 @@ async def create_employee(
         )
 
 
+# bulk import employees, the request body is a csv or xlsx file
+@user_router.post(
+    "/import_employees",
+    status_code=status.HTTP_202_ACCEPTED,
+    tags=[emp_tag],
+)
+async def import_employees(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: Users = Depends(get_current_user),
+    file_name: str = None,
+):
+    try:
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith(XLSX_CONTENT_TYPE):
+            suffix = ".xlsx"
+        elif "csv" in content_type:
+            suffix = ".csv"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload a csv or xlsx file",
+            )
+
+        too_large = HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File too large",
+        )
+        if int(request.headers.get("content-length") or 0) > EMPLOYEE_IMPORT_MAX_BYTES:
+            raise too_large
+
+        # spool the upload to disk so the import can outlive the request
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spool:
+            size = 0
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > EMPLOYEE_IMPORT_MAX_BYTES:
+                    break
+                spool.write(chunk)
+        if size > EMPLOYEE_IMPORT_MAX_BYTES:
+            os.remove(spool.name)
+            raise too_large
+
+        import_id = generate_uuid()
+        progress = new_progress(current_user.organization_id, file_name)
+        save_progress(import_id, progress)
+        background_tasks.add_task(
+            run_employee_import, import_id, spool.name, current_user.organization_id
+        )
+        return {
+            "detail": "Import started",
+            "data": {"import_id": import_id, **progress},
+        }
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from import employees")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from import employees")
+        logger.error(f"{e} : error from import employees")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
+@user_router.get(
+    "/import_employees/{import_id}",
+    status_code=status.HTTP_200_OK,
+    tags=[emp_tag],
+)
+async def import_employees_progress(
+    import_id: str,
+    current_user: Users = Depends(get_current_user),
+):
+    try:
+        progress = get_progress(import_id)
+        if not progress or progress["organization_id"] != current_user.organization_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Import not found",
+            )
+        return {
+            "detail": "Data fetched successfully",
+            "data": {"import_id": import_id, **progress},
+        }
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from import employees progress")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from import employees progress")
+        logger.error(f"{e} : error from import employees progress")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
 # edit employee
 @user_router.put(
     "/edit_employee/{employee_id}",
@@ -269,6 +403,7 @@ async def compensation(
                 employee.id,
                 compensation_type=comp.get("compensation_type"),
                 amount=comp.get("amount"),
+                organization_id=current_user.organization_id,
             )
         # if not compensation_:
         #     raise HTTPException(
@@ -360,7 +495,7 @@ async def documents_upload(
 )
 async def leave_requests(
     current_user: Users = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_date=Query(None),
     end_date=Query(None),
     leave_status=Query(None),
@@ -449,13 +584,21 @@ async def request_for_leave(
                 detail="Leave Type not found",
             )
 
-        # Calculate duration
-        diff = (end_date - start_date).days + 1
+        # Calculate duration in working days
+        diff = await count_working_days(
+            db, current_user.organization_id, start_date, end_date
+        )
 
         logger.info(
-            f"The diff between end date: {end_date} and start date: {start_date} is: {diff}"
+            f"The working days between end date: {end_date} and start date: {start_date} is: {diff}"
         )
 
+        if not diff:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Leave period has no working days",
+            )
+
         # Validate duration
         if diff > leave_type.duration:
             raise HTTPException(
@@ -463,6 +606,26 @@ async def request_for_leave(
                 detail=f"Leave duration ({diff} days) exceeds maximum ({leave_type.duration} days)",
             )
 
+        if await get_overlapping_leave(db, current_user.id, start_date, end_date):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="You already have approved leave within this period",
+            )
+
+        balance = next(
+            (
+                balance
+                for balance in await get_leave_balance(db, current_user)
+                if balance["leave_type_id"] == leave_type_id
+            ),
+            None,
+        )
+        if balance and diff > balance["available"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Leave duration ({diff} days) exceeds your balance ({balance['available']} days)",
+            )
+
         # Save leave request
         await save_leave_request(
             db,
@@ -473,6 +636,8 @@ async def request_for_leave(
             request_data.note,
             request_data.document_url,
             request_data.document_name,
+            diff,
+            current_user.organization_id,
         )
 
         # Return appropriate message
@@ -494,6 +659,38 @@ async def request_for_leave(
         )
 
 
+# leave balance per leave type, for the current user or one of the org's employees
+@user_router.get("/leave_balance", status_code=status.HTTP_200_OK, tags=[emp_tag])
+async def leave_balance(
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    user_id: str = None,
+):
+    try:
+        user = current_user
+        if user_id and user_id != current_user.id:
+            user = await get_one_employee(db, user_id, current_user.organization_id)
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Employee not found",
+                )
+        return {
+            "detail": "Data fetched successfully",
+            "data": await get_leave_balance(db, user),
+        }
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from leave balance")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from leave balance")
+        logger.error(f"{e} : error from leave balance")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
 # get leave types
 @user_router.get(
     "/leave_types",
@@ -531,7 +728,7 @@ async def get_leave_types(
 )
 async def employees_timeoff(
     current_user: Users = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_date=Query(None),
     end_date=Query(None),
     leave_status=Query(None),
@@ -588,6 +785,123 @@ async def employees_timeoff(
         )
 
 
+# who is off on each day of a window, approved leave by default
+@user_router.get("/leave_calendar", status_code=status.HTTP_200_OK, tags=[emp_tag])
+async def leave_calendar(
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    start_date: str = None,
+    end_date: str = None,
+    department_id: str = None,
+    leave_status: str = Query("approved", pattern="^(pending|approved|rejected)$"),
+):
+    try:
+        try:
+            today = datetime.now()
+            start_date = (
+                datetime.strptime(start_date, "%Y-%m-%d")
+                if start_date
+                else datetime(today.year, today.month, today.day)
+            )
+            end_date = (
+                datetime.strptime(end_date, "%Y-%m-%d")
+                if end_date
+                else start_date + timedelta(days=30)
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_date and end_date must be in this format YYYY-MM-DD",
+            )
+        if end_date < start_date:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end_date cannot be before start_date",
+            )
+        if (end_date - start_date).days + 1 > LEAVE_CALENDAR_MAX_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"The calendar covers at most {LEAVE_CALENDAR_MAX_DAYS} days",
+            )
+        days = await get_leave_calendar(
+            db,
+            current_user.organization_id,
+            start_date,
+            end_date,
+            leave_status,
+            department_id,
+        )
+        return {"detail": "Data fetched successfully", "data": days}
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from leave calendar")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from leave calendar")
+        logger.error(f"{e} : error from leave calendar")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
+# approve or reject many leave requests at once
+@user_router.post(
+    "/leave_requests/decision", status_code=status.HTTP_200_OK, tags=[emp_tag]
+)
+async def decide_leave(
+    request_data: LeaveDecisionSchema,
+    background_tasks: BackgroundTasks,
+    current_user: Users = Depends(get_hr_admin),
+    db: Session = Depends(get_db),
+):
+    try:
+        result = await decide_leave_requests(
+            db,
+            current_user.organization_id,
+            request_data.leave_request_ids,
+            request_data.status,
+            current_user.id,
+        )
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Could not update leave requests",
+            )
+
+        leave_requests = [leave.to_dict() for leave in result["updated"]]
+        contexts = [
+            {
+                "email": leave["user"]["email"],
+                "subject": f"Leave request {request_data.status}",
+                "template_name": "leave_decision.html",
+                "first_name": leave["user"]["first_name"],
+                "leave_type": leave["leave_type"],
+                "start_date": leave["start_date"].strftime("%Y-%m-%d"),
+                "end_date": leave["end_date"].strftime("%Y-%m-%d"),
+                "status": request_data.status,
+            }
+            for leave in leave_requests
+        ]
+        if contexts:
+            background_tasks.add_task(send_bulk_email, contexts)
+
+        return {
+            "detail": f"{len(leave_requests)} leave request(s) {request_data.status}",
+            "data": leave_requests,
+            "skipped": result["skipped"],
+        }
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from decide leave")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from decide leave")
+        logger.error(f"{e} : error from decide leave")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
 # create holiday
 @user_router.post(
     "/create_holiday",
@@ -702,6 +1016,7 @@ async def edit_holiday(
 
         db.commit()
         db.refresh(holiday)
+        invalidate_holiday_calendar(current_user.organization_id)
 
         return {
             "detail": "Holiday updated successfully",
@@ -739,6 +1054,7 @@ async def delete_holiday(
             )
         db.delete(holiday)
         db.commit()
+        invalidate_holiday_calendar(current_user.organization_id)
         return {"detail": "Holiday deleted successfully"}
     except HTTPException as http_exc:
         # Log the HTTPException if needed
@@ -926,6 +1242,57 @@ async def set_attendance(
         )
 
 
+# bulk punches from biometric and badge devices, ndjson or csv of
+# employee_id, timestamp, direction (in/out) and device
+@user_router.post("/attendance_bulk", status_code=status.HTTP_200_OK, tags=[emp_tag])
+async def attendance_bulk(
+    request: Request,
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    try:
+        too_large = HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Request body too large",
+        )
+        if int(request.headers.get("content-length") or 0) > ATTENDANCE_BULK_MAX_BYTES:
+            raise too_large
+        body = bytearray()
+        async for chunk in request.stream():
+            body.extend(chunk)
+            if len(body) > ATTENDANCE_BULK_MAX_BYTES:
+                raise too_large
+        body = body.decode("utf-8-sig")
+        input_format = (
+            "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+        )
+        records = read_records(body, input_format)
+        if not records:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No attendance records found",
+            )
+        # devices post for everyone through an HR account, employees only for
+        # themselves
+        res = await ingest_attendance(
+            db,
+            current_user.organization_id,
+            records,
+            None if is_hr_admin(current_user) else current_user.id,
+        )
+        return {"detail": "Attendance processed", **res}
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from attendance bulk")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from attendance bulk")
+        logger.error(f"{e} : error from attendance bulk")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
 # get mt attandances
 @user_router.get("/attendances", status_code=status.HTTP_200_OK, tags=[emp_tag])
 async def get_attendances(
@@ -981,11 +1348,155 @@ async def employee_attendances(
         )
 
 
+# org wide timesheet, work schedule, logged time, overtime and deficit per employee
+@user_router.get("/timesheet_report", status_code=status.HTTP_200_OK, tags=[emp_tag])
+async def timesheet_report(
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    page: int = Query(1, gt=0),
+    per_page: int = Query(50, gt=0),
+    start_date: str = None,
+    end_date: str = None,
+    department_id: str = None,
+):
+    try:
+        try:
+            today = datetime.now()
+            start_date = (
+                datetime.strptime(start_date, "%Y-%m-%d")
+                if start_date
+                else datetime(today.year, today.month, 1)
+            )
+            end_date = (
+                datetime.strptime(end_date, "%Y-%m-%d")
+                if end_date
+                else datetime(today.year, today.month, today.day)
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_date and end_date must be in this format YYYY-MM-DD",
+            )
+        res = await get_timesheet_report(
+            db,
+            current_user.organization_id,
+            start_date,
+            end_date,
+            department_id,
+            page,
+            per_page,
+        )
+        return {"detail": "Data fetched successfully", **res}
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from timesheet report")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from timesheet report")
+        logger.error(f"{e} : error from timesheet report")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
+# who is in today, present, absent and still in counts with the employees of one state
+@user_router.get("/presence", status_code=status.HTTP_200_OK, tags=[emp_tag])
+async def presence(
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    page: int = Query(1, gt=0),
+    per_page: int = Query(50, gt=0),
+    day: str = None,
+    state: str = Query("present", pattern="^(present|absent|still_in|clocked_out)$"),
+):
+    try:
+        try:
+            day = (
+                datetime.strptime(day, "%Y-%m-%d").date()
+                if day
+                else datetime.now().date()
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="day must be in this format YYYY-MM-DD",
+            )
+        res = await get_presence(
+            db, current_user.organization_id, day, state, page, per_page
+        )
+        return {"detail": "Data fetched successfully", **res}
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from presence")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from presence")
+        logger.error(f"{e} : error from presence")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
+# org wide attendance aggregated in the database, per employee or per day, streamed
+@user_router.get("/attendance_report", status_code=status.HTTP_200_OK, tags=[emp_tag])
+async def attendance_report(
+    current_user: Users = Depends(get_current_user),
+    start_date: str = None,
+    end_date: str = None,
+    department_id: str = None,
+    group_by: str = Query("employee", pattern="^(employee|day)$"),
+    output_format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+):
+    try:
+        try:
+            today = datetime.now()
+            start_date = (
+                datetime.strptime(start_date, "%Y-%m-%d")
+                if start_date
+                else datetime(today.year, today.month, 1)
+            )
+            end_date = (
+                datetime.strptime(end_date, "%Y-%m-%d")
+                if end_date
+                else datetime(today.year, today.month, today.day)
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="start_date and end_date must be in this format YYYY-MM-DD",
+            )
+        records = stream_attendance_report(
+            current_user.organization_id,
+            start_date,
+            end_date,
+            department_id,
+            group_by,
+        )
+        media_type = "text/csv" if output_format == "csv" else "application/x-ndjson"
+        return StreamingResponse(
+            stream_records(records, output_format),
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f"attachment; filename=attendance_report.{output_format}"
+            },
+        )
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from attendance report")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from attendance report")
+        logger.error(f"{e} : error from attendance report")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
 # get payroll (employee name, employee id, Total comp, Salary, Actual, Recurring, One-off)
 @user_router.get("/employee_payroll", status_code=status.HTTP_200_OK, tags=[emp_tag])
 async def employee_payroll(
     current_user: Users = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     page: int = Query(1, gt=0),
     per_page: int = Query(10, gt=0),
     start_date: str = None,
@@ -1018,13 +1529,13 @@ async def payroll_detail(
     current_user: Users = Depends(get_current_user),
 ):
     try:
-        user = await get_user_by_id(db, user_id)
+        user = await get_one_employee(db, user_id, current_user.organization_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found",
             )
-        pay_detail = await get_user_pay_roll(db, user_id)
+        pay_detail = await get_user_pay_roll(db, user_id, current_user.organization_id)
         attend = await get_attendance_date_range(db, user_id)
         user_info = {
             "name": f"{user.last_name} {user.first_name}",
@@ -1062,6 +1573,100 @@ async def payroll_detail(
         )
 
 
+# start a payroll run for the whole organization
+@user_router.post("/payroll_runs", status_code=status.HTTP_202_ACCEPTED, tags=[emp_tag])
+async def start_payroll_run(
+    request_data: PayrollRunSchema,
+    background_tasks: BackgroundTasks,
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    try:
+        payroll_run = await create_payroll_run(
+            db,
+            current_user.organization_id,
+            datetime.strptime(request_data.period_start, "%Y-%m-%d"),
+            datetime.strptime(request_data.period_end, "%Y-%m-%d"),
+            current_user.id,
+        )
+        try:
+            process_payroll_run.delay(payroll_run.id)
+        except Exception as e:
+            # no broker available, compute in this worker instead
+            logger.error(f"{e} : could not queue payroll run, running in background")
+            background_tasks.add_task(run_payroll, payroll_run.id)
+        return {"detail": "Payroll run started", "data": payroll_run.to_dict()}
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from start payroll run")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from start payroll run")
+        logger.error(f"{e} : error from start payroll run")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
+# get payroll runs
+@user_router.get("/payroll_runs", status_code=status.HTTP_200_OK, tags=[emp_tag])
+async def payroll_runs(
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    page: int = Query(1, gt=0),
+    per_page: int = Query(10, gt=0),
+):
+    try:
+        res = await get_payroll_runs(db, current_user.organization_id, page, per_page)
+        return {"detail": "Data fetched successfully", **res}
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from payroll runs")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from payroll runs")
+        logger.error(f"{e} : error from payroll runs")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
+# get one payroll run with its results
+@user_router.get(
+    "/payroll_runs/{run_id}", status_code=status.HTTP_200_OK, tags=[emp_tag]
+)
+async def payroll_run_detail(
+    run_id: str,
+    current_user: Users = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    page: int = Query(1, gt=0),
+    per_page: int = Query(50, gt=0),
+):
+    try:
+        payroll_run = await get_payroll_run(db, run_id, current_user.organization_id)
+        if not payroll_run:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Payroll run not found",
+            )
+        items = await get_payroll_run_items(db, run_id, page, per_page)
+        return {
+            "detail": "Data fetched successfully",
+            "run": payroll_run.to_dict(),
+            **items,
+        }
+    except HTTPException as http_exc:
+        # Log the HTTPException if needed
+        logger.exception("traceback error from payroll run detail")
+        raise http_exc
+    except Exception as e:
+        logger.exception("traceback error from payroll run detail")
+        logger.error(f"{e} : error from payroll run detail")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Network Error"
+        )
+
+
 # get department
 @user_router.get("/get_departments", status_code=status.HTTP_200_OK, tags=[emp_tag])
 async def fetch_departments(
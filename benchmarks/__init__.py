@@ -0,0 +1,8 @@
+"""
+Load tests and benchmarks, run against the database and Redis configured in
+the environment (local Postgres or SQLite and a local Redis).
+
+    python -m benchmarks.seed --orgs 2 --employees 200
+    python -m benchmarks.load --manifest bench_manifest.json
+    python -m benchmarks.regression --save
+"""
@@ -0,0 +1,254 @@
+"""
+Scripted load scenario against create_app() in-process, or a running server.
+
+    python -m benchmarks.seed --orgs 2 --employees 200
+    python -m benchmarks.load --manifest bench_manifest.json --concurrency 50
+    python -m benchmarks.load --base-url http://localhost:8000 --report run.json
+
+Phases: employee logins, a clock-in rush of every logged in employee, then
+rounds of the admin employee list, employee details, payroll and timesheet
+report, the job board (admin and public) and job applications. Employees
+clock in once a day, run the rush against freshly seeded organizations.
+
+In-process runs raise the rate limit (every request comes from one client),
+turn on the query count headers and skip the email deliverability and
+ip-api lookups unless --external is given. A remote server needs
+QUERY_STATS_HEADERS=1 for query counts and a rate limit that fits the run.
+
+The endpoints use the database synchronously on the event loop, a
+concurrency above DB_POOL_SIZE + DB_MAX_OVERFLOW of one worker blocks
+the loop on pool checkout until DB_POOL_TIMEOUT.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from benchmarks.report import Sample, summarize, format_report, write_report
+
+
+class LoadRun:
+    def __init__(self, client, prefix, concurrency):
+        self.client = client
+        self.prefix = prefix
+        self.samples = []
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def request(self, endpoint, method, path, token=None, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(
+                    method, f"{self.prefix}{path}", headers=headers, **kwargs
+                )
+            except Exception as e:
+                self.samples.append(
+                    Sample(endpoint, None, time.perf_counter() - started)
+                )
+                print(f"{endpoint}: {e}", file=sys.stderr)
+                return None
+            seconds = time.perf_counter() - started
+
+        queries = response.headers.get("X-Query-Count")
+        self.samples.append(
+            Sample(
+                endpoint,
+                response.status_code,
+                seconds,
+                int(queries) if queries is not None else None,
+            )
+        )
+        return response
+
+    async def login(self, email, password):
+        response = await self.request(
+            "POST /auth/login",
+            "POST",
+            "/auth/login",
+            json={"email": email, "password": password},
+        )
+        if response is None or response.status_code != 200:
+            return None
+        return response.json().get("access_token")
+
+
+async def run_organization(run, organization, password, args, rng):
+    admin_token = await run.login(organization["admin_email"], password)
+    if not admin_token:
+        print(f"admin login failed for {organization['admin_email']}", file=sys.stderr)
+        return
+
+    emails = organization["employee_emails"][: args.employees]
+    tokens = await asyncio.gather(*(run.login(email, password) for email in emails))
+    tokens = [token for token in tokens if token]
+
+    # everybody arrives at nine
+    await asyncio.gather(
+        *(
+            run.request(
+                "POST /attendance/clock_in",
+                "POST",
+                "/users/attendance/clock_in",
+                token,
+                json={"note": "load test"},
+            )
+            for token in tokens
+        )
+    )
+
+    employee_ids = organization["employee_ids"]
+    posting_ids = organization["job_posting_ids"]
+
+    async def round_(number):
+        calls = [
+            run.request(
+                "GET /employees",
+                "GET",
+                "/users/employees",
+                admin_token,
+                params={"page": rng.randint(1, 3), "per_page": 20},
+            ),
+            run.request(
+                "GET /employee/{id}",
+                "GET",
+                f"/users/employee/{rng.choice(employee_ids)}",
+                admin_token,
+            ),
+            run.request(
+                "GET /employee_payroll",
+                "GET",
+                "/users/employee_payroll",
+                admin_token,
+                params={"per_page": 20},
+            ),
+            run.request(
+                "GET /timesheet_report",
+                "GET",
+                "/users/timesheet_report",
+                admin_token,
+            ),
+            run.request(
+                "GET /job_postings",
+                "GET",
+                "/users/job_postings",
+                admin_token,
+            ),
+            run.request(
+                "GET /job_postings_apply/{browser_id}",
+                "GET",
+                f"/users/job_postings_apply/{uuid.uuid4().hex}",
+                params={"organization_id": organization["organization_id"]},
+            ),
+        ]
+        if posting_ids:
+            applicant = uuid.uuid4().hex
+            calls.append(
+                run.request(
+                    "POST /apply_job/{id}",
+                    "POST",
+                    f"/users/apply_job/{rng.choice(posting_ids)}",
+                    json={
+                        "full_name": "Load Applicant",
+                        "email": f"{applicant}@applicants.example.com",
+                        "phone_number": f"0{rng.randrange(10**9, 10**10)}",
+                        "resume": "https://example.com/resume.pdf",
+                        "cover_letter": "Load test application",
+                        "browser_id": applicant,
+                    },
+                    headers={"User-Agent": f"benchmarks/{number}"},
+                )
+            )
+        await asyncio.gather(*calls)
+
+    await asyncio.gather(*(round_(number) for number in range(args.rounds)))
+
+
+def _in_process_client():
+    # before constants is first imported
+    os.environ["RATE_LIMIT"] = str(10**9)
+    os.environ["QUERY_STATS_HEADERS"] = "1"
+    import httpx
+    from settings import create_app
+
+    app = create_app()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60
+    )
+    return app, client
+
+
+def _skip_external_calls():
+    import email_validator
+    from apis.users import employees
+
+    email_validator.CHECK_DELIVERABILITY = False
+    employees.get_country_by_ip_address = lambda ip_address: "Lagos, Nigeria"
+
+
+async def main_async(args):
+    with open(args.manifest) as file:
+        manifest = json.load(file)
+
+    app = None
+    if args.base_url:
+        import httpx
+
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        prefix = f"/{args.api_version}"
+    else:
+        app, client = _in_process_client()
+        from constants import API_VERSION
+
+        prefix = f"/{API_VERSION}"
+        if not args.external:
+            _skip_external_calls()
+
+    rng = random.Random(args.seed)
+    # ASGITransport does not send lifespan events, start the monitors here
+    if app is not None:
+        await app.router.startup()
+    try:
+        async with client:
+            run = LoadRun(client, prefix, args.concurrency)
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    run_organization(run, organization, manifest["password"], args, rng)
+                    for organization in manifest["organizations"]
+                )
+            )
+            elapsed = time.perf_counter() - started
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+
+    report = summarize(run.samples, elapsed)
+    print(format_report(report))
+    if args.report:
+        write_report(report, args.report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--manifest", default="bench_manifest.json")
+    parser.add_argument("--base-url", help="run against a server instead")
+    parser.add_argument("--api-version", default=os.environ.get("API_VERSION", "v1"))
+    parser.add_argument("--employees", type=int, default=50, help="logins per org")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--external", action="store_true")
+    parser.add_argument("--report", help="write the JSON report here")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Performance baselines of cruds functions and key endpoints.
+
+    python -m benchmarks.regression --save
+    python -m benchmarks.regression --diff regression.json
+
+Two tenants are seeded per run, every case is warmed up on the first one and
+measured on the second, so Redis caches keyed by organization start cold:
+
+    queries          statements of the first (cold) call
+    allocated_bytes  tracemalloc peak of the first call
+    latency_ms       median of --repeat further calls
+
+Comparing fails (exit status 1) when a metric grows past its tolerance, e.g.
+a lazy relationship added to Users.to_dict_2 shows up as extra queries of
+cruds.get_employees and GET /employees. Latency and allocations depend on the
+machine and the database, keep one baseline per environment and run on a
+fresh database.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+METRICS = ("latency_ms", "queries", "allocated_bytes")
+
+CASES = {}
+
+
+def case(name):
+    def register(function):
+        CASES[name] = function
+        return function
+
+    return register
+
+
+class Tenant:
+    def __init__(self, organization, token, client):
+        self.organization_id = organization["organization_id"]
+        self.employee_id = organization["employee_ids"][0]
+        self.token = token
+        self.client = client
+        today = datetime.now()
+        self.start_date = today - timedelta(days=30)
+        self.end_date = today
+
+    def session(self):
+        from database import Db_Session
+
+        return Db_Session()
+
+    async def get(self, path, **params):
+        from constants import API_VERSION
+
+        response = await self.client.get(
+            f"/{API_VERSION}{path}",
+            params=params,
+            headers={"Authorization": f"Bearer {self.token}"},
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {path}: {response.status_code} {response.text}")
+        return int(response.headers["X-Query-Count"])
+
+
+async def _with_session(tenant, function):
+    db = tenant.session()
+    try:
+        await function(db)
+    finally:
+        db.close()
+
+
+@case("cruds.get_employees")
+async def _get_employees(tenant):
+    from cruds import get_employees
+
+    await _with_session(
+        tenant, lambda db: get_employees(db, 1, 20, tenant.organization_id)
+    )
+
+
+@case("cruds.construct_employee_details")
+async def _construct_employee_details(tenant):
+    from cruds import get_one_employee, construct_employee_details
+
+    async def run(db):
+        user = await get_one_employee(db, tenant.employee_id, tenant.organization_id)
+        await construct_employee_details(user)
+
+    await _with_session(tenant, run)
+
+
+@case("cruds.get_leave_requests")
+async def _get_leave_requests(tenant):
+    from cruds import get_leave_requests
+
+    await _with_session(
+        tenant,
+        lambda db: get_leave_requests(
+            db, tenant.organization_id, None, None, None, None, 1, 20
+        ),
+    )
+
+
+@case("cruds.get_leave_calendar")
+async def _get_leave_calendar(tenant):
+    from cruds import get_leave_calendar
+
+    await _with_session(
+        tenant,
+        lambda db: get_leave_calendar(
+            db, tenant.organization_id, tenant.start_date, tenant.end_date, "approved"
+        ),
+    )
+
+
+@case("cruds.get_timesheet_report")
+async def _get_timesheet_report(tenant):
+    from cruds import get_timesheet_report
+
+    await _with_session(
+        tenant,
+        lambda db: get_timesheet_report(
+            db,
+            tenant.organization_id,
+            tenant.start_date,
+            tenant.end_date,
+            None,
+            1,
+            20,
+        ),
+    )
+
+
+@case("cruds.get_compensation_paginated")
+async def _get_compensation_paginated(tenant):
+    from cruds import get_compensation_paginated
+
+    await _with_session(
+        tenant,
+        lambda db: get_compensation_paginated(db, 1, 20, tenant.organization_id),
+    )
+
+
+@case("cruds.get_job_postings")
+async def _get_job_postings(tenant):
+    from cruds import get_job_postings
+
+    await _with_session(
+        tenant,
+        lambda db: get_job_postings(
+            db, None, None, None, tenant.organization_id, 1, 10, None, None
+        ),
+    )
+
+
+@case("cruds.get_applicants_hist")
+async def _get_applicants_hist(tenant):
+    from cruds import get_applicants_hist
+
+    await _with_session(
+        tenant,
+        lambda db: get_applicants_hist(db, 1, 20, None, None, tenant.organization_id),
+    )
+
+
+@case("GET /employees")
+async def _employees(tenant):
+    return await tenant.get("/users/employees", page=1, per_page=20)
+
+
+@case("GET /employee/{id}")
+async def _employee(tenant):
+    return await tenant.get(f"/users/employee/{tenant.employee_id}")
+
+
+@case("GET /leave_requests")
+async def _leave_requests(tenant):
+    return await tenant.get("/users/leave_requests", page=1, per_page=20)
+
+
+@case("GET /employee_payroll")
+async def _employee_payroll(tenant):
+    return await tenant.get("/users/employee_payroll", per_page=20)
+
+
+@case("GET /timesheet_report")
+async def _timesheet_report(tenant):
+    return await tenant.get("/users/timesheet_report", per_page=20)
+
+
+@case("GET /job_postings")
+async def _job_postings(tenant):
+    return await tenant.get("/users/job_postings")
+
+
+async def measure(function, warmup, tenant, repeat):
+    from monitoring import track_queries
+
+    await function(warmup)
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    try:
+        with track_queries() as stats:
+            # endpoints count their own queries, the header is returned
+            queries = await function(tenant)
+        allocated = tracemalloc.get_traced_memory()[1] - traced_before
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await function(tenant)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "latency_ms": round(statistics.median(latencies), 3),
+        "queries": stats.count if queries is None else queries,
+        "allocated_bytes": allocated,
+    }
+
+
+async def run_cases(names, params):
+    # before constants is first imported
+    os.environ["RATE_LIMIT"] = str(10**9)
+    os.environ["QUERY_STATS_HEADERS"] = "1"
+    import httpx
+    from settings import create_app
+    from security import create_access_token
+    from database import Db_Session
+    from models import Users
+    from benchmarks.seed import seed
+
+    app = create_app()
+    manifest = seed(
+        2,
+        params["employees"],
+        params["days"],
+        params["job_postings"],
+        params["applicants"],
+        params["seed"],
+    )
+
+    db = Db_Session()
+    try:
+        tokens = [
+            create_access_token(
+                data={
+                    "sub": db.query(Users.id)
+                    .filter_by(email=organization["admin_email"])
+                    .scalar()
+                }
+            )
+            for organization in manifest["organizations"]
+        ]
+    finally:
+        db.close()
+
+    results = {}
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60
+    ) as client:
+        warmup, tenant = (
+            Tenant(organization, token, client)
+            for organization, token in zip(manifest["organizations"], tokens)
+        )
+        for name in names:
+            results[name] = await measure(CASES[name], warmup, tenant, params["repeat"])
+            print(
+                f"{name:<40}"
+                + "".join(f"{results[name][metric]:>18}" for metric in METRICS),
+                file=sys.stderr,
+            )
+    return results
+
+
+def compare(baseline, current, tolerance, min_latency_ms):
+    """Per case and metric change against the baseline, and the regressions."""
+    cases = {}
+    regressions = []
+    for name, metrics in current.items():
+        if name not in baseline:
+            continue
+        cases[name] = {}
+        for metric in METRICS:
+            before, after = baseline[name][metric], metrics[metric]
+            change = (after - before) / before if before else None
+            regressed = after > before * (1 + tolerance[metric]) + (
+                min_latency_ms if metric == "latency_ms" else 0
+            )
+            cases[name][metric] = {
+                "baseline": before,
+                "current": after,
+                "change": round(change, 4) if change is not None else None,
+                "regressed": regressed,
+            }
+            if regressed:
+                regressions.append(
+                    {"case": name, "metric": metric, **cases[name][metric]}
+                )
+
+    return {
+        "tolerance": tolerance,
+        "regressions": regressions,
+        "new": sorted(set(current) - set(baseline)),
+        "missing": sorted(set(baseline) - set(current)),
+        "cases": cases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="write a new baseline")
+    parser.add_argument("--diff", help="write the comparison as JSON here")
+    parser.add_argument("--cases", default="*", help="fnmatch pattern of cases")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--employees", type=int, default=50)
+    parser.add_argument("--latency-tolerance", type=float, default=0.25)
+    parser.add_argument("--query-tolerance", type=float, default=0.0)
+    parser.add_argument("--allocation-tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--min-latency-ms",
+        type=float,
+        default=1.0,
+        help="latency growth below this is noise",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if not args.save:
+        if not os.path.exists(args.baseline):
+            parser.error(f"no baseline at {args.baseline}, run with --save first")
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    # compare like with like, the baseline's data set wins
+    params = (baseline or {}).get("params") or {
+        "employees": args.employees,
+        "days": 20,
+        "job_postings": 10,
+        "applicants": 100,
+        "seed": 0,
+        "repeat": args.repeat,
+    }
+    names = [name for name in CASES if fnmatch.fnmatch(name, args.cases)]
+    current = asyncio.run(run_cases(names, params))
+
+    if args.save:
+        with open(args.baseline, "w") as file:
+            json.dump(
+                {
+                    "created_at": datetime.now().isoformat(),
+                    "params": params,
+                    "cases": current,
+                },
+                file,
+                indent=2,
+            )
+        print(f"baseline of {len(current)} cases written to {args.baseline}")
+        return
+
+    diff = compare(
+        baseline["cases"],
+        current,
+        {
+            "latency_ms": args.latency_tolerance,
+            "queries": args.query_tolerance,
+            "allocated_bytes": args.allocation_tolerance,
+        },
+        args.min_latency_ms,
+    )
+    if args.diff:
+        with open(args.diff, "w") as file:
+            json.dump(diff, file, indent=2)
+    else:
+        print(json.dumps(diff, indent=2))
+
+    for regression in diff["regressions"]:
+        print(
+            f"REGRESSION {regression['case']} {regression['metric']}: "
+            f"{regression['baseline']} -> {regression['current']}",
+            file=sys.stderr,
+        )
+    sys.exit(1 if diff["regressions"] else 0)
+
+
+if __name__ == "__main__":
+    main()
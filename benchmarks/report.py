@@ -0,0 +1,91 @@
+"""Per-endpoint latency percentiles and query counts of a load run."""
+
+import json
+from collections import Counter, defaultdict
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+class Sample:
+    __slots__ = ("endpoint", "status", "seconds", "queries")
+
+    def __init__(self, endpoint, status, seconds, queries=None):
+        self.endpoint = endpoint
+        self.status = status
+        self.seconds = seconds
+        self.queries = queries
+
+
+def summarize(samples, elapsed=None):
+    by_endpoint = defaultdict(list)
+    for sample in samples:
+        by_endpoint[sample.endpoint].append(sample)
+
+    endpoints = {}
+    for endpoint, group in by_endpoint.items():
+        latencies = np.array([sample.seconds for sample in group]) * 1000
+        p50, p95, p99 = np.percentile(latencies, PERCENTILES)
+        queries = np.array(
+            [sample.queries for sample in group if sample.queries is not None]
+        )
+        endpoints[endpoint] = {
+            "requests": len(group),
+            "errors": sum(
+                sample.status is None or sample.status >= 400 for sample in group
+            ),
+            "statuses": {
+                str(status): count
+                for status, count in sorted(
+                    Counter(sample.status for sample in group).items(),
+                    key=lambda item: str(item[0]),
+                )
+            },
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(latencies.max()), 2),
+            "queries_mean": round(float(queries.mean()), 2) if len(queries) else None,
+            "queries_max": int(queries.max()) if len(queries) else None,
+        }
+
+    report = {"requests": len(samples), "endpoints": endpoints}
+    if elapsed:
+        report["elapsed_seconds"] = round(elapsed, 2)
+        report["requests_per_second"] = round(len(samples) / elapsed, 2)
+    return report
+
+
+def _cell(value):
+    return "-" if value is None else str(value)
+
+
+def format_report(report):
+    columns = (
+        "requests",
+        "errors",
+        "p50_ms",
+        "p95_ms",
+        "p99_ms",
+        "max_ms",
+        "queries_mean",
+        "queries_max",
+    )
+    width = max([len("endpoint")] + [len(name) for name in report["endpoints"]])
+    lines = ["endpoint".ljust(width) + "".join(f"{column:>14}" for column in columns)]
+    for endpoint, row in report["endpoints"].items():
+        lines.append(
+            endpoint.ljust(width)
+            + "".join(f"{_cell(row[column]):>14}" for column in columns)
+        )
+    if "elapsed_seconds" in report:
+        lines.append(
+            f"\n{report['requests']} requests in {report['elapsed_seconds']}s, "
+            f"{report['requests_per_second']} req/s"
+        )
+    return "\n".join(lines)
+
+
+def write_report(report, path):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
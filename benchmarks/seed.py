@@ -0,0 +1,315 @@
+"""
+Synthetic tenants for load tests.
+
+    python -m benchmarks.seed --orgs 2 --employees 200 --days 30
+
+Every organization gets departments, work hours, leave types, a superadmin,
+employees with compensation, weekday attendance for the past days, leave
+requests, job stages, job postings and applicants. The logins and ids the
+load scenario needs are written to a manifest.
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, time, timedelta
+from sqlalchemy import insert
+from database import Db_Session, Base, engine
+from helpers import generate_uuid, hash_password
+from models import (
+    Organization,
+    Department,
+    WorkHours,
+    LeaveType,
+    LeaveRequest,
+    LeaveStatus,
+    Users,
+    Compensation,
+    Attendance,
+    JobStages,
+    JobPosting,
+    AppliedCandidates,
+)
+
+BENCH_PASSWORD = "Bench-Passw0rd"
+DEPARTMENTS = ("Engineering", "Finance", "People", "Operations", "Sales")
+FIRST_NAMES = ("Ada", "Bola", "Chidi", "Dayo", "Emeka", "Funke", "Gbenga", "Halima")
+LAST_NAMES = ("Okafor", "Adeyemi", "Bello", "Eze", "Ibrahim", "Nwosu", "Balogun")
+JOB_TITLES = ("Backend Engineer", "Accountant", "HR Partner", "Analyst", "Sales Lead")
+
+
+def _weekdays(days, today):
+    for offset in range(days, 0, -1):
+        day = today - timedelta(days=offset)
+        if day.weekday() < 5:
+            yield day
+
+
+def _clock(rng, hour, spread_minutes):
+    minutes = hour * 60 + rng.randint(-spread_minutes, spread_minutes)
+    return time(minutes // 60, minutes % 60, rng.randint(0, 59))
+
+
+def seed_organization(
+    db, rng, index, employees, days, job_postings, applicants, password_hash
+):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    domain = f"bench{index}.example.com"
+    organization_id = generate_uuid()
+    db.execute(
+        insert(Organization),
+        [{"id": organization_id, "name": f"Bench {index}", "domain": domain}],
+    )
+    db.execute(
+        insert(WorkHours),
+        [
+            {
+                "organization_id": organization_id,
+                "start_time": time(9),
+                "end_time": time(17),
+            }
+        ],
+    )
+
+    # department names are unique across organizations
+    department_ids = [generate_uuid() for _ in DEPARTMENTS]
+    db.execute(
+        insert(Department),
+        [
+            {"id": id_, "name": f"{name} {index}", "organization_id": organization_id}
+            for id_, name in zip(department_ids, DEPARTMENTS)
+        ],
+    )
+
+    leave_type_ids = [generate_uuid(), generate_uuid()]
+    db.execute(
+        insert(LeaveType),
+        [
+            {
+                "id": leave_type_ids[0],
+                "name": "Annual",
+                "duration": 20,
+                "organization_id": organization_id,
+            },
+            {
+                "id": leave_type_ids[1],
+                "name": "Sick",
+                "duration": 10,
+                "organization_id": organization_id,
+            },
+        ],
+    )
+
+    admin_id = generate_uuid()
+    users = [
+        {
+            "id": admin_id,
+            "first_name": "Bench",
+            "last_name": "Admin",
+            "email": f"admin@{domain}",
+            "password": password_hash,
+            "is_superadmin": True,
+            "organization_id": organization_id,
+            "date_joined": today - timedelta(days=3 * 365),
+        }
+    ]
+    for number in range(employees):
+        users.append(
+            {
+                "id": generate_uuid(),
+                "first_name": rng.choice(FIRST_NAMES),
+                "last_name": rng.choice(LAST_NAMES),
+                "email": f"employee{number}@{domain}",
+                "phone_number": f"0{index}{number:06d}",
+                "password": password_hash,
+                "organization_id": organization_id,
+                "department_id": rng.choice(department_ids),
+                "date_joined": today - timedelta(days=rng.randint(30, 2000)),
+            }
+        )
+    db.execute(insert(Users), users)
+    employee_ids = [user["id"] for user in users[1:]]
+
+    compensation = []
+    for user_id in employee_ids:
+        compensation.append(
+            {
+                "user_id": user_id,
+                "compensation_type": "salary",
+                "amount": float(rng.randrange(150_000, 1_500_000, 5_000)),
+            }
+        )
+        if rng.random() < 0.3:
+            compensation.append(
+                {
+                    "user_id": user_id,
+                    "compensation_type": "bonus",
+                    "amount": float(rng.randrange(10_000, 200_000, 5_000)),
+                }
+            )
+    db.execute(insert(Compensation), compensation)
+
+    attendance = []
+    for day in _weekdays(days, today):
+        for user_id in employee_ids:
+            if rng.random() < 0.08:
+                continue
+            check_in = _clock(rng, 9, 40)
+            attendance.append(
+                {
+                    "user_id": user_id,
+                    "check_in": check_in,
+                    "check_out": _clock(rng, 17, 60),
+                    "start_time": time(9),
+                    "end_time": time(17),
+                    "clock_in_location": "Lagos, Nigeria",
+                    "clock_out_location": "Lagos, Nigeria",
+                    "created_at": datetime.combine(day.date(), check_in),
+                }
+            )
+    for start in range(0, len(attendance), 5000):
+        db.execute(insert(Attendance), attendance[start : start + 5000])
+
+    leave_requests = []
+    for user_id in rng.sample(employee_ids, k=max(1, employees // 5)):
+        start_date = today + timedelta(days=rng.randint(-60, 60))
+        end_date = start_date + timedelta(days=rng.randint(0, 6))
+        leave_requests.append(
+            {
+                "user_id": user_id,
+                "leave_type_id": rng.choice(leave_type_ids),
+                "start_date": start_date,
+                "end_date": end_date,
+                "working_days": sum(
+                    (start_date + timedelta(days=n)).weekday() < 5
+                    for n in range((end_date - start_date).days + 1)
+                ),
+                "status": rng.choice(list(LeaveStatus)),
+                "note": "benchmark leave",
+            }
+        )
+    db.execute(insert(LeaveRequest), leave_requests)
+
+    stage_ids = [generate_uuid() for _ in range(3)]
+    db.execute(
+        insert(JobStages),
+        [
+            {
+                "id": id_,
+                "name": name,
+                "priority": priority,
+                "organization_id": organization_id,
+            }
+            for priority, (id_, name) in enumerate(
+                zip(stage_ids, ("Applied", "Interview", "Offer")), start=1
+            )
+        ],
+    )
+
+    posting_ids = [generate_uuid() for _ in range(job_postings)]
+    db.execute(
+        insert(JobPosting),
+        [
+            {
+                "id": id_,
+                "title": rng.choice(JOB_TITLES),
+                "description": "Benchmark job posting " * 20,
+                "location": "Lagos",
+                "job_type": rng.choice(("full_time", "contract")),
+                "quantity": rng.randint(1, 5),
+                "min_salary": 200_000.0,
+                "max_salary": 900_000.0,
+                "department_id": rng.choice(department_ids),
+                "organization_id": organization_id,
+                "closing_date": today + timedelta(days=30),
+            }
+            for id_ in posting_ids
+        ],
+    )
+
+    if posting_ids and applicants:
+        db.execute(
+            insert(AppliedCandidates),
+            [
+                {
+                    "job_posting_id": rng.choice(posting_ids),
+                    "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                    "email": f"applicant{number}@mail.{domain}",
+                    "phone_number": f"08{index}{number:06d}",
+                    "resume": "https://example.com/resume.pdf",
+                    "cover_letter": "Benchmark cover letter",
+                    "job_stage_id": rng.choice(stage_ids),
+                    "user_agent": "benchmarks",
+                    "ip_address": "127.0.0.1",
+                    "browser_id": generate_uuid(),
+                }
+                for number in range(applicants)
+            ],
+        )
+    db.commit()
+
+    return {
+        "organization_id": organization_id,
+        "admin_email": f"admin@{domain}",
+        "employee_emails": [user["email"] for user in users[1:]],
+        "employee_ids": employee_ids,
+        "job_posting_ids": posting_ids,
+    }
+
+
+def seed(orgs, employees, days, job_postings, applicants, seed_value=0):
+    rng = random.Random(seed_value)
+    Base.metadata.create_all(engine)
+    # one salted hash shared by every seeded user, hashing each would dominate
+    password_hash = hash_password(BENCH_PASSWORD)
+    stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    db = Db_Session()
+    try:
+        organizations = [
+            seed_organization(
+                db,
+                rng,
+                f"{stamp}{index}",
+                employees,
+                days,
+                job_postings,
+                applicants,
+                password_hash,
+            )
+            for index in range(orgs)
+        ]
+    finally:
+        db.close()
+    return {"password": BENCH_PASSWORD, "organizations": organizations}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orgs", type=int, default=2)
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--job-postings", type=int, default=10)
+    parser.add_argument("--applicants", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--manifest", default="bench_manifest.json")
+    args = parser.parse_args()
+
+    started = datetime.now()
+    manifest = seed(
+        args.orgs,
+        args.employees,
+        args.days,
+        args.job_postings,
+        args.applicants,
+        args.seed,
+    )
+    with open(args.manifest, "w") as file:
+        json.dump(manifest, file, indent=2)
+    print(
+        f"seeded {args.orgs} organizations of {args.employees} employees "
+        f"in {(datetime.now() - started).total_seconds():.1f}s, see {args.manifest}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import threading
+from connections import redis_conn
+from logger import logger
+
+
+class VersionedCache:
+    """
+    Per-worker in-process cache stamped with a shared Redis version counter.
+    A read costs one Redis GET; the value is only reloaded after a writer
+    bumps the version for that key. Without Redis every read loads afresh.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def version_key(self, key):
+        return f"{self.namespace}_version:{key}"
+
+    def current_version(self, key):
+        return redis_conn.get(self.version_key(key)) or "0"
+
+    def get(self, key, loader):
+        # read the version before loading so a concurrent bump forces a reload
+        try:
+            version = self.current_version(key)
+        except Exception as e:
+            logger.exception(f"Read {self.namespace} cache version failed")
+            return loader()
+        entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            return entry[1]
+        value = loader()
+        with self._lock:
+            self._entries[key] = (version, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        redis_conn.incr(self.version_key(key))
@@ -7,6 +7,8 @@ class RedisConnection:
     def __init__(self, url=REDIS_URL):
         try:
             self.connection = redis.Redis.from_url(url, decode_responses=True)
+            # bitmaps are read back as raw bytes
+            self.raw_connection = redis.Redis.from_url(url)
         except Exception as e:
             logger.exception(e)
 
@@ -25,6 +27,57 @@ class RedisConnection:
     def delete(self, key):
         return self.connection.delete(key)
 
+    def exists(self, key):
+        return self.connection.exists(key)
+
+    def incr(self, key, amount=1):
+        return self.connection.incr(key, amount)
+
+    def sadd(self, key, *values):
+        return self.connection.sadd(key, *values)
+
+    def smembers(self, key):
+        return self.connection.smembers(key)
+
+    def srem(self, key, *values):
+        return self.connection.srem(key, *values)
+
+    def expire(self, key, seconds):
+        return self.connection.expire(key, seconds)
+
+    def hget(self, key, field):
+        return self.connection.hget(key, field)
+
+    def hmget(self, key, fields):
+        return self.connection.hmget(key, fields)
+
+    def hset(self, key, field, value):
+        return self.connection.hset(key, field, value)
+
+    def hsetnx(self, key, field, value):
+        return self.connection.hsetnx(key, field, value)
+
+    def hgetall(self, key):
+        return self.connection.hgetall(key)
+
+    def zrevrange(self, key, start, end, withscores=False):
+        return self.connection.zrevrange(key, start, end, withscores=withscores)
+
+    def zrem(self, key, *members):
+        return self.connection.zrem(key, *members)
+
+    def zscore(self, key, member):
+        return self.connection.zscore(key, member)
+
+    def setbit(self, key, offset, value):
+        return self.connection.setbit(key, offset, value)
+
+    def bitcount(self, key):
+        return self.connection.bitcount(key)
+
+    def get_bytes(self, key):
+        return self.raw_connection.get(key)
+
     def pipeline(self):
         return self.connection.pipeline()
 
@@ -1,6 +1,7 @@
 from fastapi import WebSocket
 from typing import Dict, List
 from logger import logger
+from monitoring.metrics import WEBSOCKET_CONNECTIONS, WEBSOCKET_ROOMS
 
 
 class WebSocketConnectionManager:
@@ -11,13 +12,17 @@ class WebSocketConnectionManager:
         # await websocket.accept()
         if room not in self.rooms:
             self.rooms[room] = []
+            WEBSOCKET_ROOMS.inc()
         self.rooms[room].append(websocket)
+        WEBSOCKET_CONNECTIONS.inc()
 
     def disconnect(self, websocket: WebSocket, room: str):
         if room in self.rooms:
             self.rooms[room].remove(websocket)
+            WEBSOCKET_CONNECTIONS.dec()
             if not self.rooms[room]:
                 del self.rooms[room]
+                WEBSOCKET_ROOMS.dec()
 
     async def send_message(self, room: str, message: dict):
         if room in self.rooms:
@@ -4,6 +4,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URI = os.environ.get("SQLALCHEMY_DATABASE_URI")
+# comma separated read replicas of the database, empty to read from the primary
+SQLALCHEMY_REPLICA_URIS = [
+    uri.strip()
+    for uri in os.environ.get("SQLALCHEMY_REPLICA_URIS", "").split(",")
+    if uri.strip()
+]
 SECRET_KEY = os.environ.get("SECRET_KEY")
 ALGORITHM = os.environ.get("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 1))
@@ -14,9 +20,9 @@ EXCEPTION_MESSAGE = os.environ.get("EXCEPTION_MESSAGE", "Network Error")
 REDIS_URL = os.environ.get("REDIS_URL")
 EMAIL_USER = os.environ.get("EMAIL_USER")
 EMAIL_PASSWORD = os.environ.get("EMAIL_PASSWORD")
-SMTP_HOST = os.environ.get("SMTP_HOST")
-SMTP_PORT = os.environ.get("SMTP_PORT")
-FROM_EMAIL = os.environ.get("FROM_EMAIL")
+SMTP_HOST = os.environ.get("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
+FROM_EMAIL = os.environ.get("FROM_EMAIL", "support@teamflow.com")
 ALLOWED_ORIGINS = os.environ.get("ALLOWED_ORIGINS")
 ALLOWED_METHODS = os.environ.get("ALLOWED_METHODS")
 ALLOWED_HEADERS = os.environ.get("ALLOWED_HEADERS")
@@ -28,7 +34,89 @@ MAINTENANCE_MODE = bool(int(os.environ.get("MAINTENANCE_MODE")))
 FILE_NAME = os.environ.get("FILE_NAME")
 API_VERSION = os.environ.get("API_VERSION")
 DEFAULT_PASSWORD = os.environ.get("DEFAULT_PASSWORD")
+# role names allowed to act on other employees' records, lower case
+HR_ROLES = {
+    role.strip().lower()
+    for role in os.environ.get(
+        "HR_ROLES", "super admin,admin,hr,human resources"
+    ).split(",")
+    if role.strip()
+}
 CLOUDINARY_CLOUD_NAME = os.environ.get("CLOUDINARY_CLOUD_NAME")
 CLOUDINARY_API_KEY = os.environ.get("CLOUDINARY_API_KEY")
 CLOUDINARY_API_SECRET = os.environ.get("CLOUDINARY_API_SECRET")
 API_VERSION_ADMIN = os.environ.get("API_VERSION_ADMIN")
+PAYROLL_CHUNK_SIZE = int(os.environ.get("PAYROLL_CHUNK_SIZE", 500))
+PAYROLL_OVERTIME_RATE = float(os.environ.get("PAYROLL_OVERTIME_RATE", 1.5))
+PRESENCE_RETENTION_DAYS = int(os.environ.get("PRESENCE_RETENTION_DAYS", 35))
+ATTENDANCE_CHUNK_SIZE = int(os.environ.get("ATTENDANCE_CHUNK_SIZE", 1000))
+# longest shift a device clock out is paired with, and the bulk upload cap
+ATTENDANCE_MAX_SHIFT_HOURS = float(os.environ.get("ATTENDANCE_MAX_SHIFT_HOURS", 16))
+ATTENDANCE_BULK_MAX_BYTES = int(
+    os.environ.get("ATTENDANCE_BULK_MAX_BYTES", 10 * 1024 * 1024)
+)
+EMPLOYEE_IMPORT_CHUNK_SIZE = int(os.environ.get("EMPLOYEE_IMPORT_CHUNK_SIZE", 500))
+EMPLOYEE_IMPORT_HASH_WORKERS = int(
+    os.environ.get("EMPLOYEE_IMPORT_HASH_WORKERS", os.cpu_count() or 1)
+)
+EMPLOYEE_IMPORT_MAX_BYTES = int(
+    os.environ.get("EMPLOYEE_IMPORT_MAX_BYTES", 20 * 1024 * 1024)
+)
+WORK_WEEKMASK = os.environ.get("WORK_WEEKMASK", "1111100")
+LEAVE_BALANCE_EXPIRES = int(os.environ.get("LEAVE_BALANCE_EXPIRES", 86400))
+# widest window the leave calendar returns, in days
+LEAVE_CALENDAR_MAX_DAYS = int(os.environ.get("LEAVE_CALENDAR_MAX_DAYS", 92))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+# send query counts as response headers, for development
+QUERY_STATS_HEADERS = bool(int(os.environ.get("QUERY_STATS_HEADERS", 0)))
+QUERY_COUNT_THRESHOLD = int(os.environ.get("QUERY_COUNT_THRESHOLD", 30))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", 5))
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_SECONDS", 0.2))
+SLOW_QUERY_EXPLAIN_SECONDS = float(os.environ.get("SLOW_QUERY_EXPLAIN_SECONDS", 1))
+SLOW_QUERY_RETENTION_DAYS = int(os.environ.get("SLOW_QUERY_RETENTION_DAYS", 7))
+SLOW_QUERY_MAX_SHAPES = int(os.environ.get("SLOW_QUERY_MAX_SHAPES", 1000))
+# directory shared by the uvicorn workers for their metrics, empty it on every start
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+# bearer token the scraper sends to /metrics, unset leaves it open
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+LOOP_LAG_MONITOR = bool(int(os.environ.get("LOOP_LAG_MONITOR", 1)))
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", 0.1))
+LOOP_STALL_SECONDS = float(os.environ.get("LOOP_STALL_SECONDS", 0.25))
+# fraction of requests to profile, superadmins can also ask with the X-Profile header
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", 50))
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", 0.001))
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+# records below WARNING allowed per logging call site and second, 0 for no limit
+LOG_RATE_LIMIT = int(os.environ.get("LOG_RATE_LIMIT", 0))
+# share of records below WARNING kept per logger, e.g. "logger.app_logger=0.5"
+LOG_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, rate in (
+        pair.split("=", 1)
+        for pair in os.environ.get("LOG_SAMPLE_RATES", "").split(",")
+        if "=" in pair
+    )
+}
+# fraction of requests to trace, superadmins can also ask with the X-Trace header
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 0))
+# finished traces kept in Redis, and for how long
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", 500))
+TRACE_RETENTION_SECONDS = int(os.environ.get("TRACE_RETENTION_SECONDS", 3600))
+TRACE_MAX_SPANS = int(os.environ.get("TRACE_MAX_SPANS", 1000))
+# json lines file finished traces are also appended to
+TRACE_FILE = os.environ.get("TRACE_FILE")
+# start tracemalloc with the worker, otherwise it is started from the internal api
+MEMORY_TRACEMALLOC = bool(int(os.environ.get("MEMORY_TRACEMALLOC", 0)))
+MEMORY_TRACEMALLOC_FRAMES = int(os.environ.get("MEMORY_TRACEMALLOC_FRAMES", 10))
+MEMORY_SNAPSHOTS = int(os.environ.get("MEMORY_SNAPSHOTS", 5))
+MEMORY_SAMPLE_INTERVAL = float(os.environ.get("MEMORY_SAMPLE_INTERVAL", 15))
+# primary keys, "uuid7" and "uuid4" are 32 hex digits, "ulid" 26 base32 characters,
+# or the dotted path of a generator function. Tables with uuid or binary id storage
+# need ids that parse as a UUID
+ID_STRATEGY = os.environ.get("ID_STRATEGY", "uuid7")
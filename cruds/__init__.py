@@ -1,4 +1,5 @@
 import json
+import os
 
 from models import (
     Users,
@@ -33,18 +34,63 @@ from models import (
     AppliedCandidates,
     JobStages,
     Department,
+    PayrollRun,
+    PayrollRunItem,
+    PayrollRunStatus,
+)
+from helpers import hash_password, get_service_year, format_duration, generate_uuid
+from constants import (
+    SESSION_EXPIRES,
+    DEFAULT_PASSWORD,
+    PAYROLL_CHUNK_SIZE,
+    ATTENDANCE_CHUNK_SIZE,
+    ATTENDANCE_MAX_SHIFT_HOURS,
+    EMPLOYEE_IMPORT_CHUNK_SIZE,
+    LEAVE_BALANCE_EXPIRES,
 )
-from helpers import hash_password, get_service_year
-from constants import SESSION_EXPIRES, DEFAULT_PASSWORD
 from datetime import datetime, timedelta, date
 
 # from celery_config.utils.cel_workers import send_mail
 from fastapi import Request, HTTPException
 from logger import logger
-from sqlalchemy import func, desc, asc, case, or_
-from sqlalchemy.orm import selectinload
+from email_validator import validate_email, EmailNotValidError
+from sqlalchemy import func, desc, asc, case, or_, and_, insert, update, select, event
+from sqlalchemy.orm import selectinload, joinedload
+from database import Db_Session
 from helpers import validate_phone_number, validate_correct_email
 from connections import redis_conn
+from caches import VersionedCache
+from database.functions import time_seconds
+from services.payroll import compute_payroll
+from services.leave import leave_balances
+from services.calendar import HolidayCalendar
+from services.employee_import import (
+    iter_employee_rows,
+    parse_date_joined,
+    hash_default_passwords,
+    new_progress as new_import_progress,
+    get_progress as get_import_progress,
+    save_progress as save_import_progress,
+    add_error as add_import_error,
+)
+from services.presence import (
+    mark_clock_in,
+    mark_clock_out,
+    presence_counts,
+    presence_members,
+    rebuild_presence,
+    register_employee,
+)
+from services.attendance import (
+    attendance_metrics,
+    records_metrics,
+    times_to_seconds,
+    SECONDS_IN_DAY,
+)
+import numpy as np
+
+compensation_types_cache = VersionedCache("compensation_types")
+holiday_calendars = VersionedCache("holiday_calendar")
 
 
 # if email exists (fastapi)
@@ -190,6 +236,10 @@ async def create_one_employee(
     db.add(user)
     db.commit()
     db.refresh(user)
+    try:
+        register_employee(organization_id, user.id)
+    except Exception as e:
+        logger.exception("Register employee presence failed")
     return user
 
 
@@ -451,72 +501,45 @@ async def get_steps(db, current_user):
 
 
 async def construct_employee_details(user):
+    profile = user.satellite("user_profile")
+    insurance = user.satellite("health_insurance")
+    contact = user.satellite("emergency_contact")
+    employment = user.satellite("employment_details")
+
     general = {
         "fullname": f"{user.first_name} {user.last_name}",
-        "gender": user.user_profile.gender if user.user_profile else "",
+        "gender": profile.gender,
         "email": user.email,
-        "nationality": user.user_profile.country if user.user_profile else "",
+        "nationality": profile.country,
         "phone_number": user.phone_number,
-        "health_care": (
-            user.health_insurance.health_insurance if user.health_insurance else ""
-        ),
-        "address": user.user_profile.address if user.user_profile else "",
-        "postal_code": user.user_profile.postal_code if user.user_profile else "",
-        "state": user.user_profile.state if user.user_profile else "",
-        "city": user.user_profile.city if user.user_profile else "",
-        "country": user.user_profile.country if user.user_profile else "",
-        "marital_status": user.user_profile.marital_status if user.user_profile else "",
-        "personal_tax_id": user.user_profile.tax_id if user.user_profile else "",
-        "date_of_birth": user.user_profile.date_of_birth if user.user_profile else "",
-        "social_insurance": (
-            user.health_insurance.health_insurance_number
-            if user.health_insurance
-            else ""
-        ),
-        "emergency_contact_last_name": (
-            user.emergency_contact.last_name if user.emergency_contact else ""
-        ),
-        "emergency_contact_first_name": (
-            user.emergency_contact.first_name if user.emergency_contact else ""
-        ),
-        "emergency_contact_relationship": (
-            user.emergency_contact.relationship if user.emergency_contact else ""
-        ),
-        "emergency_contact_phone_number": (
-            user.emergency_contact.phone_number if user.emergency_contact else ""
-        ),
-        "emergency_contact_email": (
-            user.emergency_contact.email if user.emergency_contact else ""
-        ),
+        "health_care": insurance.health_insurance,
+        "address": profile.address,
+        "postal_code": profile.postal_code,
+        "state": profile.state,
+        "city": profile.city,
+        "country": profile.country,
+        "marital_status": profile.marital_status,
+        "personal_tax_id": profile.tax_id,
+        "date_of_birth": profile.date_of_birth,
+        "social_insurance": insurance.health_insurance_number,
+        "emergency_contact_last_name": contact.last_name,
+        "emergency_contact_first_name": contact.first_name,
+        "emergency_contact_relationship": contact.relationship,
+        "emergency_contact_phone_number": contact.phone_number,
+        "emergency_contact_email": contact.email,
     }
 
     job = {
-        "employee_id": (
-            user.employment_details.employment_id if user.employment_details else ""
-        ),
-        "service_year": get_service_year(user.employment_details.join_date),
-        "join_date": (
-            user.employment_details.join_date if user.employment_details else ""
-        ),
+        "employee_id": employment.employment_id,
+        "service_year": get_service_year(employment.join_date),
+        "join_date": employment.join_date,
     }
 
     payroll = {
-        "employment_status": (
-            user.employment_details.employment_status.value
-            if user.employment_details
-            else ""
-        ),
-        "job_title": (
-            user.employment_details.job_title if user.employment_details else ""
-        ),
-        "employment_type": (
-            user.employment_details.employment_type.value
-            if user.employment_details
-            else ""
-        ),
-        "work_mode": (
-            user.employment_details.work_mode.value if user.employment_details else ""
-        ),
+        "employment_status": employment.employment_status.value,
+        "job_title": employment.job_title,
+        "employment_type": employment.employment_type.value,
+        "work_mode": employment.work_mode.value,
         "compensation": (
             [comp.to_dict() for comp in user.compensation] if user.compensation else []
         ),
@@ -550,6 +573,9 @@ async def edit_employee_details(user, edit_type, data, db):
     try:
         logger.info(f"Edit Type in function: {edit_type}")
         if edit_type == "general":
+            profile = _satellite_for_write(user, "user_profile")
+            insurance = _satellite_for_write(user, "health_insurance")
+            contact = _satellite_for_write(user, "emergency_contact")
             full_name = data.get("fullname")
             if full_name:
                 user.first_name = full_name.split(" ")[0]
@@ -575,94 +601,78 @@ async def edit_employee_details(user, edit_type, data, db):
                     return "Phone number already exist"
                 user.phone_number = phone_number
             if data.get("gender"):
-                user.user_profile.gender = Gender(data.get("gender").lower())
-            user.user_profile.country = data.get(
-                "nationality", user.user_profile.country
-            )
+                profile.gender = Gender(data.get("gender").lower())
+            profile.country = data.get("nationality", profile.country)
             if data.get("marital_status"):
-                user.user_profile.marital_status = MaritalStatus(
+                profile.marital_status = MaritalStatus(
                     data.get("marital_status").lower()
                 )
-            user.user_profile.tax_id = data.get(
-                "personal_tax_id", user.user_profile.tax_id
-            )
-            user.user_profile.date_of_birth = data.get(
-                "date_of_birth", user.user_profile.date_of_birth
-            )
-            user.user_profile.postal_code = data.get(
-                "postal_code", user.user_profile.postal_code
+            profile.tax_id = data.get("personal_tax_id", profile.tax_id)
+            profile.date_of_birth = data.get("date_of_birth", profile.date_of_birth)
+            profile.postal_code = data.get("postal_code", profile.postal_code)
+            profile.state = data.get("state", profile.state)
+            profile.city = data.get("city", profile.city)
+            profile.country = data.get("country", profile.country)
+            insurance.health_insurance = data.get(
+                "health_care", insurance.health_insurance
             )
-            user.user_profile.state = data.get("state", user.user_profile.state)
-            user.user_profile.city = data.get("city", user.user_profile.city)
-            user.user_profile.country = data.get("country", user.user_profile.country)
-            user.health_insurance.health_insurance = data.get(
-                "health_care", user.health_insurance.health_insurance
+            insurance.health_insurance_number = data.get(
+                "social_insurance", insurance.health_insurance_number
             )
-            user.health_insurance.health_insurance_number = data.get(
-                "social_insurance", user.health_insurance.health_insurance_number
+            profile.address = data.get("address", profile.address)
+            contact.first_name = data.get(
+                "emergency_contact_first_name", contact.first_name
             )
-            user.user_profile.address = data.get("address", user.user_profile.address)
-            user.emergency_contact.first_name = data.get(
-                "emergency_contact_first_name", user.emergency_contact.first_name
-            )
-            user.emergency_contact.last_name = data.get(
-                "emergency_contact_last_name", user.emergency_contact.last_name
+            contact.last_name = data.get(
+                "emergency_contact_last_name", contact.last_name
             )
             emergency_contact_phone_number = data.get("emergency_contact_phone_number")
             if emergency_contact_phone_number:
                 if validate_phone_number(emergency_contact_phone_number):
                     return "Invalid phone number"
-                user.emergency_contact.phone_number = emergency_contact_phone_number
+                contact.phone_number = emergency_contact_phone_number
             emergency_contact_email = data.get("emergency_contact_email")
             if emergency_contact_email:
                 res, _ = await validate_correct_email(emergency_contact_email)
                 if not res:
                     return "Invalid email"
-                user.emergency_contact.email = emergency_contact_email
+                contact.email = emergency_contact_email
             emergency_contact_relationship = data.get("emergency_contact_relationship")
             if emergency_contact_relationship:
-                user.emergency_contact.relationship = Relationship(
+                contact.relationship = Relationship(
                     emergency_contact_relationship.lower()
                 )
 
             db.commit()
         elif edit_type == "job":
-            user.employment_details.job_title = data.get(
-                "job_title", user.employment_details.job_title
-            )
-            user.employment_details.employment_type = data.get(
-                "employment_type", user.employment_details.employment_type
-            )
-            user.employment_details.work_mode = data.get(
-                "work_mode", user.employment_details.work_mode
-            )
-            user.employment_details.join_date = data.get(
-                "join_date", user.employment_details.join_date
+            employment = _satellite_for_write(user, "employment_details")
+            employment.job_title = data.get("job_title", employment.job_title)
+            employment.employment_type = data.get(
+                "employment_type", employment.employment_type
             )
+            employment.work_mode = data.get("work_mode", employment.work_mode)
+            employment.join_date = data.get("join_date", employment.join_date)
             # emplyee id
-            user.employment_details.employment_id = data.get(
-                "employment_id", user.employment_details.employment_id
+            employment.employment_id = data.get(
+                "employment_id", employment.employment_id
             )
             db.commit()
         elif edit_type == "payroll":
+            employment = _satellite_for_write(user, "employment_details")
             employment_details_employment_status = data.get("employment_status")
             if employment_details_employment_status:
-                user.employment_details.employment_status = EmploymentStatus(
+                employment.employment_status = EmploymentStatus(
                     employment_details_employment_status.lower()
                 )
-            user.employment_details.job_title = data.get(
-                "job_title", user.employment_details.job_title
-            )
+            employment.job_title = data.get("job_title", employment.job_title)
             employment_details_employment_type = data.get("employment_type")
             if employment_details_employment_type:
-                user.employment_details.employment_type = EmploymentType(
+                employment.employment_type = EmploymentType(
                     employment_details_employment_type.lower()
                 )
             employment_details_work_mode = data.get("work_mode")
             if employment_details_work_mode:
-                user.employment_details.work_mode = WorkMode(
-                    employment_details_work_mode.lower()
-                )
+                employment.work_mode = WorkMode(employment_details_work_mode.lower())
             db.commit()
         else:
             return "Invalid Type"
@@ -673,39 +683,134 @@ async def edit_employee_details(user, edit_type, data, db):
         return "Error editing emaployee"
 
 
-def create_remain(user_id: str):
-    from database import get_db
+# create a user's satellite row on its first write
+def _satellite_for_write(user, relation):
+    record = getattr(user, relation)
+    if record is None:
+        record = user.satellite(relation)
+        setattr(user, relation, record)
+    return record
 
-    # Get an actual session from the generator
-    db_gen = get_db()  # This returns a generator
-    db = next(db_gen)  # Get the session object from generator
 
-    try:
-        logger.info("Remain created start, user_id: %s", user_id)
+# import employees from an uploaded csv/xlsx file, progress is kept in redis
+def run_employee_import(import_id: str, path: str, organization_id: str):
+    from database import get_db
 
-        em = EmploymentDetails(user_id=user_id)
-        emg = EmergencyContact(user_id=user_id)
-        hih = HealthInsurance(user_id=user_id)
-        bd = BankDetails(user_id=user_id)
-        up = UserProfile(user_id=user_id)
+    db_gen = get_db()
+    db = next(db_gen)
 
-        db.add_all([em, emg, hih, bd, up])
-        db.commit()
+    progress = get_import_progress(import_id) or new_import_progress(
+        organization_id, None
+    )
+    progress.update(status="running", started_at=str(datetime.now()))
+    save_import_progress(import_id, progress)
 
-        logger.info("Remain created successfully for user %s", user_id)
+    try:
+        seen = set()
+        chunk = []
+        for row_number, row in enumerate(iter_employee_rows(path), start=2):
+            progress["processed"] += 1
+            employee, error = _parse_import_row(row)
+            if not error and employee["email"] in seen:
+                error = "Duplicate email in file"
+            if error:
+                add_import_error(progress, row_number, error)
+                continue
+            seen.add(employee["email"])
+            chunk.append((row_number, employee))
+
+            if len(chunk) >= EMPLOYEE_IMPORT_CHUNK_SIZE:
+                _import_employee_chunk(db, organization_id, chunk, progress)
+                save_import_progress(import_id, progress)
+                chunk = []
+
+        if chunk:
+            _import_employee_chunk(db, organization_id, chunk, progress)
+        progress["status"] = "completed"
     except Exception as e:
         db.rollback()
-        logger.error("Background task failed")
+        logger.exception("Employee import %s failed", import_id)
+        progress["status"] = "failed"
     finally:
+        progress["finished_at"] = str(datetime.now())
+        save_import_progress(import_id, progress)
+        os.remove(path)
         try:
-            next(
-                db_gen
-            )  # Closes the generator (executes the finally block in get_db())
+            next(db_gen)
         except StopIteration:
-            pass  # Generator is already exhausted
+            pass
 
 
-async def create_compensation(db, user_id, compensation_type, amount):
+def _parse_import_row(row):
+    first_name = str(row.get("first_name") or "").strip()
+    last_name = str(row.get("last_name") or "").strip()
+    if not first_name or not last_name:
+        return None, "first_name and last_name are required"
+    try:
+        email = validate_email(
+            str(row.get("email") or "").strip(), check_deliverability=False
+        ).normalized
+    except EmailNotValidError as e:
+        return None, str(e)
+    try:
+        date_joined = parse_date_joined(row.get("date_joined"))
+    except (TypeError, ValueError):
+        return None, "date joined must be in this format YYYY-MM-DD"
+    return {
+        "first_name": first_name[:50],
+        "last_name": last_name[:50],
+        "email": email,
+        "date_joined": date_joined,
+    }, None
+
+
+# one transaction per chunk, satellite rows are created on first write
+def _import_employee_chunk(db, organization_id, chunk, progress):
+    existing = {
+        email
+        for (email,) in db.query(Users.email).filter(
+            Users.email.in_([employee["email"] for _, employee in chunk])
+        )
+    }
+    rows = []
+    for row_number, employee in chunk:
+        if employee["email"] in existing:
+            add_import_error(progress, row_number, "Email already exists")
+        else:
+            rows.append(employee)
+    if not rows:
+        return
+
+    passwords = hash_default_passwords(len(rows))
+    users = [
+        {**employee, "id": generate_uuid(), "organization_id": organization_id}
+        for employee in rows
+    ]
+    for user, password in zip(users, passwords):
+        user["password"] = password
+
+    try:
+        db.execute(insert(Users), users)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.exception("Employee import chunk failed")
+        for row_number, employee in chunk:
+            if employee["email"] not in existing:
+                add_import_error(progress, row_number, "Could not be saved")
+        return
+
+    progress["created"] += len(users)
+    for user in users:
+        try:
+            register_employee(organization_id, user["id"])
+        except Exception as e:
+            logger.exception("Register employee presence failed")
+
+
+async def create_compensation(
+    db, user_id, compensation_type, amount, organization_id=None
+):
     try:
         logger.info(
             f"UserID: {user_id}, CompType: {compensation_type}, Amount: {amount}"
@@ -730,13 +835,146 @@ async def create_compensation(db, user_id, compensation_type, amount):
         )
         db.add(compensation)
         db.commit()
-        logger.info(f"Done saving {compensation_type}")
-        return compensation
     except Exception as e:
         db.rollback()
         logger.exception("Background task failed")
         return None
 
+    # the row is saved, a redis failure only leaves the registry to be rewarmed
+    if organization_id:
+        try:
+            register_compensation_type(db, organization_id, compensation_type)
+        except Exception as e:
+            logger.exception("Register compensation type failed")
+    logger.info(f"Done saving {compensation_type}")
+    return compensation
+
+
+def _compensation_types_key(organization_id):
+    return f"compensation_types:{organization_id}"
+
+
+def _stored_compensation_types(db, organization_id):
+    return [
+        row[0]
+        for row in db.query(Compensation.compensation_type)
+        .join(Users, Users.id == Compensation.user_id)
+        .filter(
+            Compensation.compensation_type.isnot(None),
+            Users.organization_id == organization_id,
+        )
+        .distinct()
+        .all()
+    ]
+
+
+# rebuild the org's compensation type set in redis from the compensation table
+def _warm_compensation_types(db, organization_id):
+    types = _stored_compensation_types(db, organization_id)
+    if types:
+        redis_conn.sadd(_compensation_types_key(organization_id), *types)
+    return types
+
+
+# add a type to the org registry, called after the compensation row is committed
+def register_compensation_type(db, organization_id, compensation_type):
+    key = _compensation_types_key(organization_id)
+    if redis_conn.exists(key):
+        added = redis_conn.sadd(key, compensation_type)
+    else:
+        added = bool(_warm_compensation_types(db, organization_id))
+    if added:
+        compensation_types_cache.invalidate(organization_id)
+
+
+# types whose last compensation row of the org was deleted in this flush
+@event.listens_for(Db_Session, "after_flush")
+def _collect_dropped_compensation_types(session, flush_context):
+    for compensation in session.deleted:
+        if not isinstance(compensation, Compensation):
+            continue
+        if not compensation.compensation_type:
+            continue
+        connection = session.connection()
+        organization_id = connection.execute(
+            select(Users.organization_id).where(Users.id == compensation.user_id)
+        ).scalar()
+        remaining = connection.execute(
+            select(func.count(Compensation.id))
+            .join(Users, Users.id == Compensation.user_id)
+            .where(
+                Users.organization_id == organization_id,
+                Compensation.compensation_type == compensation.compensation_type,
+            )
+        ).scalar()
+        if organization_id and not remaining:
+            session.info.setdefault("dropped_compensation_types", set()).add(
+                (organization_id, compensation.compensation_type)
+            )
+
+
+# orgs touched by a bulk update or delete of compensations, their registry is
+# rebuilt after the commit
+@event.listens_for(Db_Session, "do_orm_execute")
+def _collect_bulk_compensation_changes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not Compensation:
+        return
+    query = (
+        select(Users.organization_id)
+        .join(Compensation, Compensation.user_id == Users.id)
+        .distinct()
+    )
+    if orm_execute_state.statement.whereclause is not None:
+        query = query.where(orm_execute_state.statement.whereclause)
+    session = orm_execute_state.session
+    session.info.setdefault("stale_compensation_types", set()).update(
+        organization_id
+        for organization_id in session.execute(query).scalars()
+        if organization_id
+    )
+
+
+@event.listens_for(Db_Session, "after_commit")
+def _unregister_compensation_types(session):
+    for organization_id, compensation_type in session.info.pop(
+        "dropped_compensation_types", ()
+    ):
+        try:
+            redis_conn.srem(_compensation_types_key(organization_id), compensation_type)
+            compensation_types_cache.invalidate(organization_id)
+        except Exception as e:
+            logger.exception("Unregister compensation type failed")
+    for organization_id in session.info.pop("stale_compensation_types", ()):
+        try:
+            redis_conn.delete(_compensation_types_key(organization_id))
+            compensation_types_cache.invalidate(organization_id)
+        except Exception as e:
+            logger.exception("Reset compensation types failed")
+
+
+@event.listens_for(Db_Session, "after_rollback")
+def _forget_dropped_compensation_types(session):
+    session.info.pop("dropped_compensation_types", None)
+    session.info.pop("stale_compensation_types", None)
+
+
+# get the sorted compensation types of an organization
+async def get_compensation_types(db, organization_id):
+    def load():
+        try:
+            types = redis_conn.smembers(_compensation_types_key(organization_id))
+            if not types:
+                types = _warm_compensation_types(db, organization_id)
+        except Exception as e:
+            logger.exception("Read compensation types failed")
+            types = _stored_compensation_types(db, organization_id)
+        return sorted(types)
+
+    return compensation_types_cache.get(organization_id, load)
+
 
 # create/edit uploaded files
 # the id will be optional, if its available, check if thr filr exists and update it
@@ -792,10 +1030,11 @@ async def get_leave_requests(
         # Filters
         if user:
             base_query = base_query.filter(LeaveRequest.user_id == user.id)
+        # leaves overlapping the window, not only the ones inside it
         if start_date:
-            base_query = base_query.filter(LeaveRequest.start_date >= start_date)
+            base_query = base_query.filter(LeaveRequest.end_date >= start_date)
         if end_date:
-            base_query = base_query.filter(LeaveRequest.end_date <= end_date)
+            base_query = base_query.filter(LeaveRequest.start_date <= end_date)
         if leave_status:
             base_query = base_query.filter(
                 LeaveRequest.status == LeaveStatus(leave_status)
@@ -826,13 +1065,242 @@ async def get_leave_requests(
         return None
 
 
+# approved leave of a user overlapping a period
+async def get_overlapping_leave(db, user_id, start_date, end_date):
+    return (
+        db.query(LeaveRequest)
+        .filter(
+            LeaveRequest.user_id == user_id,
+            LeaveRequest.status == LeaveStatus.APPROVED,
+            LeaveRequest.start_date <= end_date,
+            LeaveRequest.end_date >= start_date,
+        )
+        .first()
+    )
+
+
+# working days of a leave within a year, a leave spanning new year is split
+def _leave_days_in_year(calendar, start_date, end_date, days, year):
+    year_start = datetime(year, 1, 1)
+    year_end = datetime(year + 1, 1, 1)
+    if start_date >= year_end or end_date < year_start:
+        return 0
+    if start_date >= year_start and end_date < year_end:
+        return int(days or 0)
+    return calendar.working_days_between(
+        max(start_date, year_start), min(end_date, year_end - timedelta(days=1))
+    )
+
+
+# pending requests that can be approved, in start order: no overlap with the
+# user's approved leave (or an earlier one of the batch) and within the yearly
+# entitlement of the leave type. The approved leave of all candidates is
+# loaded in one query and checked in memory
+async def _approvable_leave_requests(
+    db, organization_id, organization_users, leave_request_ids
+):
+    candidates = (
+        db.query(LeaveRequest)
+        .options(joinedload(LeaveRequest.leave_type))
+        .filter(
+            LeaveRequest.id.in_(leave_request_ids),
+            LeaveRequest.status == LeaveStatus.PENDING,
+            LeaveRequest.user_id.in_(organization_users),
+        )
+        .order_by(LeaveRequest.start_date)
+        .all()
+    )
+    if not candidates:
+        return []
+
+    # the years the candidates touch cover every overlap they can have
+    window_start = datetime(min(leave.start_date for leave in candidates).year, 1, 1)
+    window_end = datetime(max(leave.end_date for leave in candidates).year + 1, 1, 1)
+    approved = {}
+    for user_id, leave_type_id, start_date, end_date, days in db.query(
+        LeaveRequest.user_id,
+        LeaveRequest.leave_type_id,
+        LeaveRequest.start_date,
+        LeaveRequest.end_date,
+        LeaveRequest.working_days,
+    ).filter(
+        LeaveRequest.user_id.in_({leave.user_id for leave in candidates}),
+        LeaveRequest.status == LeaveStatus.APPROVED,
+        LeaveRequest.start_date < window_end,
+        LeaveRequest.end_date >= window_start,
+    ):
+        approved.setdefault(user_id, []).append(
+            (leave_type_id, start_date, end_date, days)
+        )
+
+    calendar = _holiday_calendar(db, organization_id)
+    used = {}
+    for user_id, leaves in approved.items():
+        for leave_type_id, start_date, end_date, days in leaves:
+            for year in range(start_date.year, end_date.year + 1):
+                key = (user_id, leave_type_id, year)
+                used[key] = used.get(key, 0) + _leave_days_in_year(
+                    calendar, start_date, end_date, days, year
+                )
+
+    approvable = []
+    for leave in candidates:
+        if any(
+            start_date <= leave.end_date and end_date >= leave.start_date
+            for _, start_date, end_date, _ in approved.get(leave.user_id, [])
+        ):
+            continue
+
+        charges = {
+            year: _leave_days_in_year(
+                calendar,
+                leave.start_date,
+                leave.end_date,
+                leave.working_days,
+                year,
+            )
+            for year in range(leave.start_date.year, leave.end_date.year + 1)
+        }
+        if leave.leave_type and any(
+            used.get((leave.user_id, leave.leave_type_id, year), 0) + days
+            > (leave.leave_type.duration or 0)
+            for year, days in charges.items()
+        ):
+            continue
+
+        # later candidates see this one as approved
+        approved.setdefault(leave.user_id, []).append(
+            (leave.leave_type_id, leave.start_date, leave.end_date, leave.working_days)
+        )
+        for year, days in charges.items():
+            key = (leave.user_id, leave.leave_type_id, year)
+            used[key] = used.get(key, 0) + days
+        approvable.append(leave)
+    return [leave.id for leave in approvable]
+
+
+# approve or reject many pending leave requests of an organization at once,
+# never the ones of decided_by
+async def decide_leave_requests(
+    db, organization_id, leave_request_ids, leave_status, decided_by=None
+):
+    requested_ids = leave_request_ids
+    try:
+        organization_users = select(Users.id).where(
+            Users.organization_id == organization_id
+        )
+        if decided_by:
+            organization_users = organization_users.where(Users.id != decided_by)
+        if LeaveStatus(leave_status) == LeaveStatus.APPROVED:
+            leave_request_ids = await _approvable_leave_requests(
+                db, organization_id, organization_users, leave_request_ids
+            )
+        updated_ids = (
+            db.execute(
+                update(LeaveRequest)
+                .where(
+                    LeaveRequest.id.in_(leave_request_ids),
+                    LeaveRequest.status == LeaveStatus.PENDING,
+                    LeaveRequest.user_id.in_(organization_users),
+                )
+                .values(status=LeaveStatus(leave_status))
+                .returning(LeaveRequest.id)
+                .execution_options(synchronize_session=False)
+            )
+            .scalars()
+            .all()
+        )
+        db.commit()
+
+        leave_requests = []
+        if updated_ids:
+            leave_requests = (
+                db.query(LeaveRequest)
+                .options(
+                    joinedload(LeaveRequest.user), joinedload(LeaveRequest.leave_type)
+                )
+                .filter(LeaveRequest.id.in_(updated_ids))
+                .all()
+            )
+        for user_id in {leave_request.user_id for leave_request in leave_requests}:
+            invalidate_leave_balance(organization_id, user_id)
+
+        updated = set(updated_ids)
+        return {
+            "updated": leave_requests,
+            "skipped": [id_ for id_ in requested_ids if id_ not in updated],
+        }
+    except Exception as e:
+        db.rollback()
+        logger.exception("Decide leave requests failed")
+        return None
+
+
+# who is off on each day of a window
+async def get_leave_calendar(
+    db, organization_id, start_date, end_date, leave_status, department_id=None
+):
+    try:
+        query = (
+            db.query(
+                LeaveRequest.id,
+                LeaveRequest.user_id,
+                LeaveRequest.start_date,
+                LeaveRequest.end_date,
+                LeaveRequest.status,
+                LeaveType.name.label("leave_type"),
+                Users.first_name,
+                Users.last_name,
+            )
+            .join(Users, LeaveRequest.user_id == Users.id)
+            .outerjoin(LeaveType, LeaveRequest.leave_type_id == LeaveType.id)
+            .filter(
+                Users.organization_id == organization_id,
+                LeaveRequest.status == LeaveStatus(leave_status),
+                LeaveRequest.start_date <= end_date,
+                LeaveRequest.end_date >= start_date,
+            )
+        )
+        if department_id:
+            query = query.filter(Users.department_id == department_id)
+
+        days = {}
+        for leave in query.order_by(LeaveRequest.start_date):
+            entry = {
+                "leave_request_id": leave.id,
+                "user_id": leave.user_id,
+                "full_name": f"{leave.first_name} {leave.last_name}",
+                "leave_type": leave.leave_type,
+                "status": leave.status.value,
+            }
+            day = max(leave.start_date, start_date)
+            while day <= min(leave.end_date, end_date):
+                days.setdefault(day.strftime("%Y-%m-%d"), []).append(entry)
+                day += timedelta(days=1)
+
+        return [{"date": day, "off": days[day]} for day in sorted(days)]
+    except Exception as e:
+        db.rollback()
+        logger.exception("Get leave calendar failed")
+        return None
+
+
 async def get_one_leave_type(db, leave_type_id):
     return db.query(LeaveType).filter_by(id=leave_type_id).first()
 
 
 # save leave request
 async def save_leave_request(
-    db, user_id, leave_type_id, start_date, end_date, note, document_url, document_name
+    db,
+    user_id,
+    leave_type_id,
+    start_date,
+    end_date,
+    note,
+    document_url,
+    document_name,
+    working_days=None,
+    organization_id=None,
 ):
     try:
         leave_request = LeaveRequest(
@@ -843,9 +1311,11 @@ async def save_leave_request(
             note=note,
             document_url=document_url,
             document_name=document_name,
+            working_days=working_days,
         )
         db.add(leave_request)
         db.commit()
+        invalidate_leave_balance(organization_id, user_id)
         return leave_request
     except Exception as e:
         db.rollback()
@@ -853,6 +1323,69 @@ async def save_leave_request(
         return None
 
 
+# working days of a leave period, skipping weekends and the org's holidays
+async def count_working_days(db, organization_id, start_date, end_date):
+    calendar = await get_holiday_calendar(db, organization_id)
+    return calendar.working_days_between(start_date, end_date)
+
+
+def _leave_balance_key(organization_id, user_id=""):
+    return f"leave_balance:{organization_id}:{user_id}"
+
+
+# drop the cached balance of a user, or of the whole organization
+def invalidate_leave_balance(organization_id, user_id=None):
+    try:
+        if user_id:
+            redis_conn.delete(_leave_balance_key(organization_id, user_id))
+        else:
+            redis_conn.partial_delete(_leave_balance_key(organization_id))
+    except Exception as e:
+        logger.exception("Invalidate leave balance failed")
+
+
+# working days of a user's leave in a year per (leave_type_id, status)
+async def _used_leave_days(db, organization_id, user_id, year, statuses):
+    calendar = _holiday_calendar(db, organization_id)
+    used = {}
+    for leave_type_id, leave_status, start_date, end_date, days in db.query(
+        LeaveRequest.leave_type_id,
+        LeaveRequest.status,
+        LeaveRequest.start_date,
+        LeaveRequest.end_date,
+        LeaveRequest.working_days,
+    ).filter(
+        LeaveRequest.user_id == user_id,
+        LeaveRequest.status.in_(statuses),
+        LeaveRequest.start_date < datetime(year + 1, 1, 1),
+        LeaveRequest.end_date >= datetime(year, 1, 1),
+    ):
+        key = (leave_type_id, leave_status.value)
+        used[key] = used.get(key, 0) + _leave_days_in_year(
+            calendar, start_date, end_date, days, year
+        )
+    return used
+
+
+# entitlement, used, pending and available working days per leave type this year
+async def get_leave_balance(db, user):
+    key = _leave_balance_key(user.organization_id, user.id)
+    cached = redis_conn.get(key)
+    if cached:
+        return json.loads(cached)
+
+    used = await _used_leave_days(
+        db,
+        user.organization_id,
+        user.id,
+        datetime.now().year,
+        [LeaveStatus.APPROVED, LeaveStatus.PENDING],
+    )
+    balances = leave_balances(await get_all_leave_types(db, user.organization_id), used)
+    redis_conn.set(key, json.dumps(balances), LEAVE_BALANCE_EXPIRES)
+    return balances
+
+
 async def get_all_leave_types(db, organization_id):
     try:
         leave_types = (
@@ -887,6 +1420,7 @@ async def create_leave_type(db, organization_id, leave_type_name, leave_type_dur
         )
         db.add(leave_type)
         db.commit()
+        invalidate_leave_balance(organization_id)
         return leave_type
     except Exception as e:
         db.rollback()
@@ -905,6 +1439,7 @@ async def create_holiday(db, organization_id, name, from_date, to_date):
         )
         db.add(holiday)
         db.commit()
+        invalidate_holiday_calendar(organization_id)
         return holiday
     except Exception as e:
         db.rollback()
@@ -912,17 +1447,41 @@ async def create_holiday(db, organization_id, name, from_date, to_date):
         return None
 
 
+# compiled holiday calendar of an organization, rebuilt after a holiday changes
+async def get_holiday_calendar(db, organization_id):
+    return _holiday_calendar(db, organization_id)
+
+
+def _holiday_calendar(db, organization_id):
+    def load():
+        # detached copies, the calendar is shared across requests
+        holidays = [
+            Holiday(
+                id=holiday.id,
+                name=holiday.name,
+                from_date=holiday.from_date,
+                to_date=holiday.to_date,
+                organization_id=holiday.organization_id,
+            )
+            for holiday in db.query(Holiday).filter_by(organization_id=organization_id)
+        ]
+        return HolidayCalendar(holidays)
+
+    return holiday_calendars.get(organization_id, load)
+
+
+def invalidate_holiday_calendar(organization_id):
+    try:
+        holiday_calendars.invalidate(organization_id)
+    except Exception as e:
+        logger.exception("Invalidate holiday calendar failed")
+
+
 # holiday already exist
 async def holiday_exists(db, organization_id, name):
     try:
-        holiday = (
-            db.query(Holiday)
-            .filter(
-                Holiday.organization_id == organization_id, Holiday.name.ilike(name)
-            )
-            .first()
-        )
-        return holiday
+        calendar = await get_holiday_calendar(db, organization_id)
+        return calendar.find(name)
     except Exception as e:
         db.rollback()
         logger.exception("Background task failed")
@@ -947,13 +1506,8 @@ async def get_one_holiday(db, holiday_id, organization_id):
 # get holidays, order by from_date desc
 async def get_holidays(db, organization_id):
     try:
-        holidays = (
-            db.query(Holiday)
-            .filter_by(organization_id=organization_id)
-            .order_by(desc(Holiday.from_date))
-            .all()
-        )
-        return holidays
+        calendar = await get_holiday_calendar(db, organization_id)
+        return calendar.holidays
     except Exception as e:
         db.rollback()
         logger.exception("Background task failed")
@@ -1026,6 +1580,12 @@ async def create_attendance(db, user_id, note, action, location, organization_id
                 attendance.check_out = datetime.now().time()
                 attendance.clock_out_location = location
             db.commit()
+            _mark_presence(
+                organization_id,
+                attendance.user_id,
+                attendance.created_at.date(),
+                action,
+            )
             return attendance
         wrk_hrs = await get_work_hours(db, organization_id)
         attendance = Attendance(
@@ -1040,6 +1600,9 @@ async def create_attendance(db, user_id, note, action, location, organization_id
         )
         db.add(attendance)
         db.commit()
+        _mark_presence(
+            organization_id, attendance.user_id, attendance.created_at.date(), action
+        )
         return attendance
     except Exception as e:
         db.rollback()
@@ -1047,6 +1610,356 @@ async def create_attendance(db, user_id, note, action, location, organization_id
         return None
 
 
+# presence bitmaps are best effort, the nightly reconcile repairs any miss
+def _mark_presence(organization_id, user_id, day, action):
+    try:
+        mark = mark_clock_in if action == "clock_in" else mark_clock_out
+        mark(organization_id, user_id, day)
+    except Exception as e:
+        logger.exception("Mark presence failed")
+
+
+# counts of present, absent and still in employees of a day, with one state listed
+async def get_presence(db, organization_id, day, state, page, per_page):
+    try:
+        counts = presence_counts(organization_id, day)
+        user_ids = presence_members(organization_id, day, state)
+        total_items = len(user_ids)
+        # order every member by name before taking the page
+        employees = (
+            db.query(Users.id, Users.first_name, Users.last_name, Users.email)
+            .filter(Users.id.in_(user_ids), Users.organization_id == organization_id)
+            .order_by(Users.last_name.asc(), Users.first_name.asc(), Users.id.asc())
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+            .all()
+        )
+        return {
+            "counts": counts,
+            "data": [
+                {
+                    "user_id": employee.id,
+                    "full_name": f"{employee.first_name} {employee.last_name}",
+                    "email": employee.email,
+                }
+                for employee in employees
+            ],
+            "page": page,
+            "per_page": per_page,
+            "total_items": total_items,
+            "total_pages": (total_items + per_page - 1) // per_page,
+        }
+    except Exception as e:
+        db.rollback()
+        logger.exception("Get presence failed")
+        return None
+
+
+# rebuild every organization's presence bitmaps of a day from the attendance table
+def reconcile_presence(day: date):
+    from database import get_db
+
+    db_gen = get_db()
+    db = next(db_gen)
+
+    try:
+        employees = {}
+        for organization_id, user_id in db.query(
+            Users.organization_id, Users.id
+        ).filter(Users.organization_id.isnot(None), Users.deleted == False):
+            employees.setdefault(organization_id, []).append(user_id)
+
+        clocked_in = {}
+        clocked_out = {}
+        for organization_id, user_id, check_in, check_out in (
+            db.query(
+                Users.organization_id,
+                Attendance.user_id,
+                Attendance.check_in,
+                Attendance.check_out,
+            )
+            .join(Users, Users.id == Attendance.user_id)
+            .filter(
+                Attendance.created_at >= datetime.combine(day, datetime.min.time()),
+                Attendance.created_at
+                < datetime.combine(day + timedelta(days=1), datetime.min.time()),
+            )
+        ):
+            if check_in:
+                clocked_in.setdefault(organization_id, []).append(user_id)
+            if check_out:
+                clocked_out.setdefault(organization_id, []).append(user_id)
+
+        for organization_id in set(employees) | set(clocked_in) | set(clocked_out):
+            rebuild_presence(
+                organization_id,
+                day,
+                employees.get(organization_id, []),
+                clocked_in.get(organization_id, []),
+                clocked_out.get(organization_id, []),
+            )
+        logger.info(
+            "Presence reconciled for %s organizations on %s", len(employees), day
+        )
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.exception("Reconcile presence failed")
+        return False
+    finally:
+        try:
+            next(db_gen)
+        except StopIteration:
+            pass
+
+
+ATTENDANCE_MAX_SHIFT = timedelta(hours=ATTENDANCE_MAX_SHIFT_HOURS)
+ATTENDANCE_DIRECTIONS = {
+    "in": "clock_in",
+    "clock_in": "clock_in",
+    "out": "clock_out",
+    "clock_out": "clock_out",
+}
+
+
+# validate a device punch, returns (punch, error)
+def _parse_punch(record):
+    if not record:
+        return None, "Invalid record"
+    employee_id = str(record.get("employee_id") or "").strip()
+    if not employee_id:
+        return None, "employee_id is required"
+    direction = ATTENDANCE_DIRECTIONS.get(
+        str(record.get("direction") or "").strip().lower()
+    )
+    if not direction:
+        return None, "direction must be in or out"
+    try:
+        timestamp = datetime.fromisoformat(str(record.get("timestamp")).strip())
+    except ValueError:
+        return None, "timestamp must be an ISO 8601 datetime"
+    if timestamp.tzinfo:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    device = str(record.get("device") or "").strip()[:100] or None
+    return (employee_id, timestamp, direction, device), None
+
+
+# clock in and clock out datetimes of an attendance row, shifts past midnight
+# end on the next day
+def _shift_bounds(row):
+    day = row.created_at.date()
+    clock_in = datetime.combine(day, row.check_in) if row.check_in else None
+    clock_out = datetime.combine(day, row.check_out) if row.check_out else None
+    if clock_in and clock_out and clock_out < clock_in:
+        clock_out += timedelta(days=1)
+    return clock_in, clock_out
+
+
+def _existing_shifts(db, user_ids, first_punch, last_punch):
+    shifts = {}
+    user_ids = list(user_ids)
+    for offset in range(0, len(user_ids), ATTENDANCE_CHUNK_SIZE):
+        for row in (
+            db.query(
+                Attendance.id,
+                Attendance.user_id,
+                Attendance.check_in,
+                Attendance.check_out,
+                Attendance.created_at,
+            )
+            .filter(
+                Attendance.user_id.in_(
+                    user_ids[offset : offset + ATTENDANCE_CHUNK_SIZE]
+                ),
+                Attendance.check_in.isnot(None),
+                Attendance.created_at
+                >= datetime.combine(
+                    (first_punch - ATTENDANCE_MAX_SHIFT).date(), datetime.min.time()
+                ),
+                Attendance.created_at
+                < datetime.combine(
+                    last_punch.date() + timedelta(days=1), datetime.min.time()
+                ),
+            )
+            .order_by(Attendance.created_at)
+        ):
+            clock_in, clock_out = _shift_bounds(row)
+            shifts.setdefault(
+                (row.user_id, row.created_at.date()),
+                {
+                    "rows": [],
+                    "row_id": row.id,
+                    "first_punch": clock_in,
+                    "existing_in": clock_in,
+                    "existing_out": clock_out,
+                },
+            )
+    return shifts
+
+
+# merge device punches into attendance, one row per employee per shift. A
+# shift belongs to the day of its clock in, a clock out closes the employee's
+# latest shift started at most ATTENDANCE_MAX_SHIFT before it. With user_id
+# set only that employee's punches are accepted
+async def ingest_attendance(db, organization_id, records, user_id=None):
+    results = [{"row": index + 1} for index in range(len(records))]
+    punches = {}
+    for index, record in enumerate(records):
+        punch, error = _parse_punch(record)
+        if error:
+            results[index].update(status="error", detail=error)
+        else:
+            punches[index] = punch
+
+    identifiers = {punch[0] for punch in punches.values()}
+    employees = {}
+    for employee, email in db.query(Users.id, Users.email).filter(
+        Users.organization_id == organization_id,
+        Users.deleted == False,
+        or_(Users.id.in_(identifiers), Users.email.in_(identifiers)),
+    ):
+        employees[employee] = employee
+        employees[email] = employee
+
+    resolved = []
+    seen = set()
+    for index, (employee_id, timestamp, direction, device) in punches.items():
+        employee = employees.get(employee_id)
+        if not employee:
+            results[index].update(status="error", detail="Unknown employee")
+            continue
+        if user_id and employee != user_id:
+            results[index].update(
+                status="error", detail="Only your own attendance can be submitted"
+            )
+            continue
+        if (employee, timestamp, direction) in seen:
+            results[index].update(status="duplicate")
+            continue
+        seen.add((employee, timestamp, direction))
+        resolved.append((employee, timestamp, direction, device, index))
+
+    shifts = {}
+    if resolved:
+        shifts = _existing_shifts(
+            db,
+            {punch[0] for punch in resolved},
+            min(punch[1] for punch in resolved),
+            max(punch[1] for punch in resolved),
+        )
+
+    # in time order, clock ins open shifts before the clock outs closing them;
+    # the earliest clock in and the latest clock out of a shift win
+    resolved.sort(key=lambda punch: (punch[0], punch[1], punch[2] == "clock_out"))
+    for user_id, timestamp, direction, device, index in resolved:
+        if direction == "clock_in":
+            shift = shifts.setdefault(
+                (user_id, timestamp.date()),
+                {"rows": [], "row_id": None, "first_punch": timestamp},
+            )
+            shift["first_punch"] = min(shift["first_punch"], timestamp)
+        else:
+            candidates = [
+                (shift["first_punch"], key)
+                for key, shift in shifts.items()
+                if key[0] == user_id
+                and shift["first_punch"] <= timestamp
+                and timestamp - shift["first_punch"] <= ATTENDANCE_MAX_SHIFT
+            ]
+            if not candidates:
+                results[index].update(
+                    status="error", detail="No open shift for this clock out"
+                )
+                continue
+            shift = shifts[max(candidates)[1]]
+
+        shift["rows"].append(index)
+        current = shift.get(direction)
+        if (
+            not current
+            or (direction == "clock_in" and timestamp < current[0])
+            or (direction == "clock_out" and timestamp > current[0])
+        ):
+            shift[direction] = (timestamp, device)
+
+    shifts = {key: shift for key, shift in shifts.items() if shift["rows"]}
+    work_hours = await get_work_hours(db, organization_id)
+    keys = list(shifts)
+    for offset in range(0, len(keys), ATTENDANCE_CHUNK_SIZE):
+        chunk = keys[offset : offset + ATTENDANCE_CHUNK_SIZE]
+        try:
+            statuses = _ingest_attendance_chunk(
+                db, {key: shifts[key] for key in chunk}, work_hours
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception("Attendance ingestion chunk failed")
+            statuses = {key: ("error", "Could not be saved") for key in chunk}
+
+        for key in chunk:
+            status, detail = statuses[key]
+            for index in shifts[key]["rows"]:
+                results[index].update(status=status)
+                if detail:
+                    results[index]["detail"] = detail
+            if status != "error":
+                for direction in ("clock_in", "clock_out"):
+                    if direction in shifts[key]:
+                        _mark_presence(organization_id, key[0], key[1], direction)
+
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"summary": summary, "results": results}
+
+
+def _ingest_attendance_chunk(db, shifts, work_hours):
+    inserts = []
+    updates = []
+    statuses = {}
+    now = datetime.now()
+    for key, shift in shifts.items():
+        clock_in = shift.get("clock_in")
+        clock_out = shift.get("clock_out")
+        if not shift["row_id"]:
+            inserts.append(
+                {
+                    "user_id": key[0],
+                    "check_in": clock_in[0].time(),
+                    "check_out": clock_out[0].time() if clock_out else None,
+                    "clock_in_location": clock_in[1],
+                    "clock_out_location": clock_out[1] if clock_out else None,
+                    "start_time": work_hours.start_time if work_hours else None,
+                    "end_time": work_hours.end_time if work_hours else None,
+                    "created_at": clock_in[0],
+                }
+            )
+            statuses[key] = ("created", None)
+            continue
+
+        values = {}
+        if clock_in and clock_in[0] < shift["existing_in"]:
+            values.update(check_in=clock_in[0].time(), clock_in_location=clock_in[1])
+        if clock_out and (
+            not shift["existing_out"] or clock_out[0] > shift["existing_out"]
+        ):
+            values.update(
+                check_out=clock_out[0].time(), clock_out_location=clock_out[1]
+            )
+        if values:
+            updates.append({"id": shift["row_id"], "updated_at": now, **values})
+            statuses[key] = ("updated", None)
+        else:
+            statuses[key] = ("unchanged", None)
+
+    if inserts:
+        db.execute(insert(Attendance), inserts)
+    if updates:
+        db.execute(update(Attendance), updates)
+    return statuses
+
+
 # has clocked out today already
 async def has_clocked_out_today(db, user_id):
     try:
@@ -1100,6 +2013,9 @@ async def get_my_attendance(
         total_items = query.count()
         total_pages = (total_items + per_page - 1) // per_page
 
+        if hr:
+            query = query.options(selectinload(Attendance.user))
+
         attendance_records = (
             query.order_by(desc(Attendance.created_at))
             .offset((page - 1) * per_page)
@@ -1107,7 +2023,11 @@ async def get_my_attendance(
             .all()
         )
 
-        attendance_dicts = [record.employee_dict(hr) for record in attendance_records]
+        metrics = records_metrics(attendance_records)
+        attendance_dicts = [
+            record.employee_dict(hr, record_metrics)
+            for record, record_metrics in zip(attendance_records, metrics)
+        ]
 
         response = {
             "data": attendance_dicts,
@@ -1125,6 +2045,191 @@ async def get_my_attendance(
         return None
 
 
+# per employee timesheet totals of an organization over a date range
+async def get_timesheet_report(
+    db, organization_id, start_date, end_date, department_id, page, per_page
+):
+    try:
+        # same employees and semantics as stream_attendance_report, only
+        # closed shifts are logged and a day counts once per employee
+        query = db.query(Users).filter(
+            Users.organization_id == organization_id, Users.deleted == False
+        )
+        if department_id:
+            query = query.filter(Users.department_id == department_id)
+
+        total_items = query.count()
+        employees = (
+            query.order_by(Users.last_name.asc(), Users.first_name.asc())
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+            .all()
+        )
+        user_ids = [employee.id for employee in employees]
+
+        attendances = (
+            db.query(
+                Attendance.user_id,
+                Attendance.check_in,
+                Attendance.check_out,
+                Attendance.start_time,
+                Attendance.end_time,
+                Attendance.created_at,
+            )
+            .filter(
+                Attendance.user_id.in_(user_ids),
+                Attendance.created_at >= start_date,
+                Attendance.created_at < end_date + timedelta(days=1),
+            )
+            .all()
+        )
+
+        positions = {user_id: index for index, user_id in enumerate(user_ids)}
+        user_index, check_in, check_out, start_time, end_time, created_at = (
+            zip(*attendances) if attendances else ([], [], [], [], [], [])
+        )
+        user_index = np.array([positions[u] for u in user_index], dtype=np.intp)
+        metrics = attendance_metrics(
+            times_to_seconds(check_in),
+            times_to_seconds(check_out),
+            times_to_seconds(start_time),
+            times_to_seconds(end_time),
+            open_shifts=False,
+        )
+        totals = {
+            name: np.bincount(user_index, weights=values, minlength=len(user_ids))
+            for name, values in metrics.items()
+        }
+        present_days = {
+            (index, created.date())
+            for index, clocked_in, created in zip(user_index, check_in, created_at)
+            if clocked_in
+        }
+        days_present = np.bincount(
+            np.array([index for index, _ in present_days], dtype=np.intp),
+            minlength=len(user_ids),
+        )
+
+        return {
+            "data": [
+                {
+                    "user_id": employee.id,
+                    "full_name": f"{employee.first_name} {employee.last_name}",
+                    "email": employee.email,
+                    "days_present": int(days_present[index]),
+                    **{
+                        name: format_duration(values[index])
+                        for name, values in totals.items()
+                    },
+                }
+                for index, employee in enumerate(employees)
+            ],
+            "page": page,
+            "per_page": per_page,
+            "total_items": total_items,
+            "total_pages": (total_items + per_page - 1) // per_page,
+        }
+    except Exception as e:
+        db.rollback()
+        logger.exception("Get timesheet report failed")
+        return None
+
+
+# seconds expressions of an attendance row, shifts past midnight wrap to the next day
+def _attendance_report_columns():
+    check_in = time_seconds(Attendance.check_in)
+    check_out = time_seconds(Attendance.check_out)
+    start_time = time_seconds(Attendance.start_time)
+    end_time = time_seconds(Attendance.end_time)
+
+    out = case((check_out < check_in, check_out + SECONDS_IN_DAY), else_=check_out)
+    end = case((end_time < start_time, end_time + SECONDS_IN_DAY), else_=end_time)
+    closed = and_(
+        Attendance.check_in.isnot(None),
+        Attendance.check_out.isnot(None),
+        Attendance.start_time.isnot(None),
+        Attendance.end_time.isnot(None),
+    )
+
+    return {
+        "present": func.count(Attendance.check_in),
+        "late": func.sum(case((check_in > start_time, 1), else_=0)),
+        "logged_seconds": func.coalesce(func.sum(out - check_in), 0),
+        "overtime_seconds": func.sum(
+            case((and_(closed, out > end), out - end), else_=0)
+        ),
+    }
+
+
+def stream_attendance_report(
+    organization_id, start_date, end_date, department_id=None, group_by="employee"
+):
+    """
+    Yield the attendance report of an organization one aggregated row at a
+    time, per employee or per day. Logged time and overtime only count
+    closed shifts. Runs on its own session so it can outlive the request.
+    """
+    from database import get_db
+
+    db_gen = get_db()
+    db = next(db_gen)
+
+    try:
+        columns = _attendance_report_columns()
+        day = func.date(Attendance.created_at)
+
+        if group_by == "day":
+            keys = [day.label("date")]
+            order_by = keys
+            columns["employees"] = func.count(func.distinct(Attendance.user_id))
+        else:
+            keys = [
+                Users.id.label("user_id"),
+                Users.first_name,
+                Users.last_name,
+                Users.email,
+            ]
+            order_by = [Users.last_name, Users.first_name, Users.id]
+            columns["present"] = func.count(
+                func.distinct(case((Attendance.check_in.isnot(None), day)))
+            )
+
+        query = (
+            db.query(*keys, *[value.label(name) for name, value in columns.items()])
+            .join(Users, Users.id == Attendance.user_id)
+            .filter(
+                Users.organization_id == organization_id,
+                Users.deleted == False,
+                Attendance.created_at >= start_date,
+                Attendance.created_at < end_date + timedelta(days=1),
+            )
+        )
+        if department_id:
+            query = query.filter(Users.department_id == department_id)
+
+        query = query.group_by(*keys).order_by(*order_by)
+
+        for row in query.yield_per(PAYROLL_CHUNK_SIZE):
+            record = row._asdict()
+            for name in ("logged_seconds", "overtime_seconds"):
+                record[name] = round(record[name] or 0)
+            record["late"] = int(record["late"] or 0)
+            record["logged_time"] = format_duration(record["logged_seconds"])
+            record["overtime"] = format_duration(record["overtime_seconds"])
+            if "date" in record:
+                record["date"] = str(record["date"])
+            yield record
+    except Exception as e:
+        db.rollback()
+        logger.exception("Stream attendance report failed")
+        raise
+    finally:
+        try:
+            next(db_gen)
+        except StopIteration:
+            pass
+
+
 async def get_compensation_paginated(
     db, page: int, per_page: int, organization_id: str
 ):
@@ -1133,18 +2238,6 @@ async def get_compensation_paginated(
     Using LEFT JOIN for employment details
     """
 
-    # Step 1: Get all distinct compensation types for this organization
-    type_subquery = (
-        db.query(Compensation.compensation_type)
-        .join(Users, Users.id == Compensation.user_id)
-        .filter(
-            Compensation.compensation_type.isnot(None),
-            Users.organization_id == organization_id,
-        )
-        .distinct()
-        .subquery()
-    )
-
     # Step 2: Get users count for pagination
     users_count = (
         db.query(func.count(Users.id))
@@ -1169,9 +2262,8 @@ async def get_compensation_paginated(
             },
         }
 
-    # Step 3: Get compensation types
-    types_result = db.query(type_subquery.c.compensation_type).all()
-    compensation_types = [t[0] for t in types_result]
+    # Step 3: Get compensation types from the org registry
+    compensation_types = await get_compensation_types(db, organization_id)
 
     # Step 4: Build CASE statements for each compensation type
     case_statements = []
@@ -1251,7 +2343,6 @@ async def get_compensation_paginated(
 
     # Step 8: Calculate pagination info
     total_pages = (users_count + per_page - 1) // per_page if users_count > 0 else 0
-    redis_conn.set("compensation_types", json.dumps(compensation_types))
 
     return {
         "data": data,
@@ -1263,44 +2354,22 @@ async def get_compensation_paginated(
     }
 
 
-async def get_user_pay_roll(db, user_id):
+async def get_user_pay_roll(db, user_id, organization_id):
     try:
-        # 1. Get compensation types from Redis
-        comp_cached = redis_conn.get("compensation_types")
-        if comp_cached is None:
-            return []
-
-        compensations = json.loads(comp_cached)
+        # 1. Get compensation types from the org registry
+        compensations = await get_compensation_types(db, organization_id)
         if not compensations:
             return []
 
         # 2. Query user's compensations
-        users_comps = (
-            db.query(Compensation)
-            .filter_by(user_id=user_id)
-            .order_by(Compensation.compensation_type.asc())
-            .all()
-        )
+        users_comps = db.query(Compensation).filter_by(user_id=user_id).all()
 
-        if not users_comps:
-            # Return zero entries for all compensation types
-            return [{"compensation_type": comp, "amount": 0} for comp in compensations]
-
-        # 3. Convert to dict and build lookup set
-        comp_list = [comp.to_dict() for comp in users_comps]
-
-        existing_types = {comp.get("compensation_type") for comp in comp_list}
-        comp_list.extend(
-            [
-                {"compensation_type": comp, "amount": 0}
-                for comp in compensations
-                if comp not in existing_types
-            ]
-        )
-
-        comp_list.sort(key=lambda x: list(x.keys())[0])
-
-        return comp_list
+        # 3. Fill in zero entries for the org types the user does not have
+        amounts = {comp.compensation_type: comp.amount for comp in users_comps}
+        return [
+            {"compensation_type": comp, "amount": amounts.get(comp) or 0}
+            for comp in compensations
+        ]
 
     except Exception as e:
         logger.exception(f"Error in get_user_pay_roll for user {user_id}: {e}")
@@ -1339,6 +2408,250 @@ async def get_attendance_date_range(db, user_id):
     return {"duration": {first_date} - {last_date}, "total_duration": total_duration}
 
 
+# create a payroll run, the payroll worker fills in the results
+async def create_payroll_run(
+    db, organization_id, period_start, period_end, created_by=None
+):
+    payroll_run = PayrollRun(
+        organization_id=organization_id,
+        period_start=period_start,
+        period_end=period_end,
+        created_by=created_by,
+    )
+    db.add(payroll_run)
+    db.commit()
+    return payroll_run
+
+
+async def get_payroll_run(db, run_id, organization_id):
+    return (
+        db.query(PayrollRun)
+        .filter_by(id=run_id, organization_id=organization_id)
+        .first()
+    )
+
+
+async def get_payroll_runs(db, organization_id, page, per_page):
+    query = db.query(PayrollRun).filter_by(organization_id=organization_id)
+    total_items = query.count()
+    runs = (
+        query.order_by(desc(PayrollRun.created_at))
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    return {
+        "data": [run.to_dict() for run in runs],
+        "page": page,
+        "per_page": per_page,
+        "total_items": total_items,
+        "total_pages": (total_items + per_page - 1) // per_page,
+    }
+
+
+async def get_payroll_run_items(db, run_id, page, per_page):
+    query = db.query(PayrollRunItem).filter_by(payroll_run_id=run_id)
+    total_items = query.count()
+    rows = (
+        db.query(
+            PayrollRunItem,
+            Users.first_name,
+            Users.last_name,
+            Users.email,
+        )
+        .join(Users, Users.id == PayrollRunItem.user_id)
+        .filter(PayrollRunItem.payroll_run_id == run_id)
+        .order_by(Users.last_name.asc(), Users.first_name.asc())
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    return {
+        "data": [
+            {
+                "user_id": item.user_id,
+                "full_name": f"{first_name or ''} {last_name or ''}".strip(),
+                "email": email,
+                "gross": item.gross,
+                "days_worked": item.days_worked,
+                "overtime_seconds": item.overtime_seconds,
+                "deficit_seconds": item.deficit_seconds,
+                "overtime_pay": item.overtime_pay,
+                "deficit_deduction": item.deficit_deduction,
+                "net": item.net,
+            }
+            for item, first_name, last_name, email in rows
+        ],
+        "page": page,
+        "per_page": per_page,
+        "total_items": total_items,
+        "total_pages": (total_items + per_page - 1) // per_page,
+    }
+
+
+# compute the results of one chunk of employees of a payroll run
+def _payroll_chunk_items(db, payroll_run, user_ids, scheduled_seconds, proration):
+    period_end = payroll_run.period_end + timedelta(days=1)
+
+    gross_by_user = dict(
+        db.query(Compensation.user_id, func.sum(Compensation.amount))
+        .filter(Compensation.user_id.in_(user_ids))
+        .group_by(Compensation.user_id)
+        .all()
+    )
+    attendances = (
+        db.query(
+            Attendance.user_id,
+            Attendance.created_at,
+            Attendance.check_in,
+            Attendance.check_out,
+            Attendance.start_time,
+            Attendance.end_time,
+        )
+        .filter(
+            Attendance.user_id.in_(user_ids),
+            Attendance.created_at >= payroll_run.period_start,
+            Attendance.created_at < period_end,
+        )
+        .all()
+    )
+
+    positions = {user_id: index for index, user_id in enumerate(user_ids)}
+    user_index, created_at, check_in, check_out, start_time, end_time = (
+        zip(*attendances) if attendances else ([], [], [], [], [], [])
+    )
+    results = compute_payroll(
+        [(gross_by_user.get(user_id) or 0) * proration for user_id in user_ids],
+        [positions[user_id] for user_id in user_index],
+        [created.date() for created in created_at],
+        times_to_seconds(check_in),
+        times_to_seconds(check_out),
+        times_to_seconds(start_time),
+        times_to_seconds(end_time),
+        scheduled_seconds,
+    )
+
+    return [
+        {
+            "payroll_run_id": payroll_run.id,
+            "user_id": user_id,
+            **{name: values[index].item() for name, values in results.items()},
+        }
+        for index, user_id in enumerate(user_ids)
+    ]
+
+
+# expected working seconds of one employee over the payroll period
+def _payroll_scheduled_seconds(db, payroll_run, calendar):
+    work_hours = (
+        db.query(WorkHours)
+        .filter_by(organization_id=payroll_run.organization_id)
+        .first()
+    )
+    if not work_hours or not work_hours.start_time or not work_hours.end_time:
+        return 0
+    start, end = times_to_seconds([work_hours.start_time, work_hours.end_time])
+    daily_seconds = (end - start) % SECONDS_IN_DAY
+    days = calendar.working_days_between(
+        payroll_run.period_start, payroll_run.period_end
+    )
+    return float(daily_seconds * days)
+
+
+# share of the monthly compensation earned over the period, each month of the
+# period counts its working days in the period over its own working days
+def _payroll_proration(payroll_run, calendar):
+    proration = 0.0
+    month_start = payroll_run.period_start.replace(day=1)
+    while month_start <= payroll_run.period_end:
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        month_days = calendar.working_days_between(
+            month_start, next_month - timedelta(days=1)
+        )
+        period_days = calendar.working_days_between(
+            max(month_start, payroll_run.period_start),
+            min(next_month - timedelta(days=1), payroll_run.period_end),
+        )
+        if month_days:
+            proration += period_days / month_days
+        month_start = next_month
+    return proration
+
+
+def run_payroll(run_id: str):
+    from database import get_db
+
+    db_gen = get_db()
+    db = next(db_gen)
+
+    try:
+        payroll_run = db.query(PayrollRun).filter_by(id=run_id).first()
+        if not payroll_run or payroll_run.status != PayrollRunStatus.PENDING:
+            logger.info("Payroll run %s is not pending, skipping", run_id)
+            return False
+
+        payroll_run.status = PayrollRunStatus.RUNNING
+        db.commit()
+
+        user_ids = [
+            row[0]
+            for row in db.query(Users.id)
+            .filter(
+                Users.organization_id == payroll_run.organization_id,
+                Users.deleted == False,
+            )
+            .order_by(Users.id)
+            .all()
+        ]
+        # the same working days as leave requests
+        calendar = _holiday_calendar(db, payroll_run.organization_id)
+        scheduled_seconds = _payroll_scheduled_seconds(db, payroll_run, calendar)
+        proration = _payroll_proration(payroll_run, calendar)
+
+        # every item is committed together with the COMPLETED status, a failed
+        # run leaves no items behind
+        total_gross = 0
+        total_net = 0
+        for offset in range(0, len(user_ids), PAYROLL_CHUNK_SIZE):
+            items = _payroll_chunk_items(
+                db,
+                payroll_run,
+                user_ids[offset : offset + PAYROLL_CHUNK_SIZE],
+                scheduled_seconds,
+                proration,
+            )
+            db.execute(insert(PayrollRunItem), items)
+            total_gross += sum(item["gross"] for item in items)
+            total_net += sum(item["net"] for item in items)
+            logger.info(
+                "Payroll run %s: %s/%s employees done",
+                run_id,
+                offset + len(items),
+                len(user_ids),
+            )
+
+        payroll_run.employee_count = len(user_ids)
+        payroll_run.total_gross = round(total_gross, 2)
+        payroll_run.total_net = round(total_net, 2)
+        payroll_run.status = PayrollRunStatus.COMPLETED
+        payroll_run.completed_at = datetime.now()
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logger.exception("Payroll run %s failed", run_id)
+        db.query(PayrollRun).filter_by(id=run_id).update(
+            {PayrollRun.status: PayrollRunStatus.FAILED}
+        )
+        db.commit()
+        return False
+    finally:
+        try:
+            next(db_gen)
+        except StopIteration:
+            pass
+
+
 # get user by user_id
 async def get_user_by_id(db, user_id):
     return db.query(Users).filter_by(id=user_id).first()
@@ -1,12 +1,60 @@
+import itertools
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from constants import SQLALCHEMY_DATABASE_URI
+from sqlalchemy.orm import sessionmaker, Session
+from constants import (
+    SQLALCHEMY_DATABASE_URI,
+    SQLALCHEMY_REPLICA_URIS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+)
+from database.pool import InstrumentedQueuePool
+
+
+def _create_engine(uri):
+    return create_engine(
+        uri,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
 
 # the below is the connection to the database, the connect_args is used to avoid error
-engine = create_engine(SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, pool_recycle=1800)
+engine = _create_engine(SQLALCHEMY_DATABASE_URI)
+
+replica_engines = [_create_engine(uri) for uri in SQLALCHEMY_REPLICA_URIS]
+_next_replica = itertools.cycle(replica_engines)
+
+
+class RoutingSession(Session):
+    """
+    Session reading from a replica when it is marked read only.
+
+    A read only session sticks to one replica until it writes, from then on
+    every statement goes to the primary so it reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.info.get("read_only") or not replica_engines:
+            return engine
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info["wrote"] = True
+        if self.info.get("wrote"):
+            return engine
+        if "replica" not in self.info:
+            self.info["replica"] = next(_next_replica)
+        return self.info["replica"]
 
-Db_Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+Db_Session = sessionmaker(
+    bind=engine, class_=RoutingSession, autoflush=False, autocommit=False
+)
 
 Base = declarative_base()
 
@@ -20,5 +68,14 @@ def get_db():
         db.close()
 
 
+# session for read heavy endpoints, served by a replica when there is one
+def get_read_db():
+    db = Db_Session(info={"read_only": True})
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 # to upgrade the database
 # alembic upgrade head
@@ -0,0 +1,23 @@
+from sqlalchemy import Float
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class time_seconds(FunctionElement):
+    """Seconds since midnight of a TIME column, NULL when the column is NULL."""
+
+    type = Float()
+    inherit_cache = True
+    name = "time_seconds"
+
+
+@compiles(time_seconds)
+def _time_seconds_default(element, compiler, **kw):
+    return "EXTRACT(EPOCH FROM %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(time_seconds, "sqlite")
+def _time_seconds_sqlite(element, compiler, **kw):
+    return "((julianday(%s) - julianday('00:00:00')) * 86400.0)" % (
+        compiler.process(element.clauses, **kw)
+    )
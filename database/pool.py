@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    """Checkout counters of one pool, shared by the threads of a worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.overflow_checkouts = 0
+        self.saturated_checkouts = 0
+        self.peak_checked_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait, checked_out, overflow, saturated):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            if overflow > 0:
+                self.overflow_checkouts += 1
+            if saturated:
+                self.saturated_checkouts += 1
+
+    def record_timeout(self, wait):
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "saturated_checkouts": self.saturated_checkouts,
+                "peak_checked_out": self.peak_checked_out,
+                "wait_seconds_avg": (
+                    round(self.wait_seconds_total / self.checkouts, 6)
+                    if self.checkouts
+                    else 0.0
+                ),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool timing how long every checkout waits for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout(time.perf_counter() - started)
+            raise
+        checked_out = self.checkedout()
+        self.stats.record(
+            time.perf_counter() - started,
+            checked_out,
+            self.overflow(),
+            checked_out >= self.size() + self._max_overflow,
+        )
+        return connection
+
+
+def pool_state(engine):
+    """Live state of the engine's pool in this worker process."""
+    pool = engine.pool
+    state = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": pool.__class__.__name__,
+        "pid": os.getpid(),
+    }
+    if isinstance(pool, QueuePool):
+        state.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "recycle": pool._recycle,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        state.update(pool.stats.to_dict())
+    return state
@@ -0,0 +1,53 @@
+import uuid
+from sqlalchemy import String, Uuid, BINARY
+from sqlalchemy.dialects.postgresql import BYTEA
+from sqlalchemy.types import TypeDecorator
+
+ID_STORAGES = ("string", "uuid", "binary")
+
+
+class IdType(TypeDecorator):
+    """
+    Primary and foreign keys. Python always sees the id as a string, the
+    column is a String(50), a native UUID (CHAR(32) where there is none) or
+    16 bytes depending on storage. The existing tables were migrated with
+    String(50) columns, only a new table (and the keys pointing at it) may
+    pick another storage. uuid and binary storage take any id uuid.UUID can
+    read, whatever ID_STRATEGY generates it; any other id binds as NULL, so
+    inserting it fails on the primary key.
+    """
+
+    impl = String(50)
+    cache_ok = True
+
+    def __init__(self, storage="string"):
+        if storage not in ID_STORAGES:
+            raise ValueError(f"storage must be one of {', '.join(ID_STORAGES)}")
+        super().__init__()
+        self.storage = storage
+
+    def load_dialect_impl(self, dialect):
+        if self.storage == "uuid":
+            return dialect.type_descriptor(Uuid(as_uuid=True))
+        if self.storage == "binary":
+            if dialect.name == "postgresql":
+                return dialect.type_descriptor(BYTEA())
+            return dialect.type_descriptor(BINARY(16))
+        return dialect.type_descriptor(String(50))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or self.storage == "string":
+            return value
+        try:
+            value = value if isinstance(value, uuid.UUID) else uuid.UUID(hex=value)
+        except ValueError:
+            # a malformed id from a url matches no row instead of failing
+            return None
+        return value if self.storage == "uuid" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or self.storage == "string":
+            return value
+        if self.storage == "binary":
+            value = uuid.UUID(bytes=bytes(value))
+        return value.hex
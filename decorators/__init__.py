@@ -7,6 +7,7 @@ from models import Users
 from logger import logger
 from connections import redis_conn
 import json
+from monitoring.metrics import CACHE_REQUESTS
 
 
 def email_verified():
@@ -44,8 +45,10 @@ def cache_it(red_key: str, org: bool = False, user: bool = False):
             )
             result = redis_conn.get(redkey)
             if result:
-                logger.info("get result from decorator redis")
+                CACHE_REQUESTS.labels(red_key, "hit").inc()
+                logger.debug("get result from decorator redis")
                 return json.loads(result)
+            CACHE_REQUESTS.labels(red_key, "miss").inc()
             result = await func(*args, **kwargs)
             redis_conn.set(redkey, json.dumps(result), expire=60)
             return result
@@ -1,4 +1,9 @@
+import importlib
+import os
 import uuid
+import csv
+import io
+import json
 from passlib.hash import pbkdf2_sha256 as hasher
 import re
 import random
@@ -13,6 +18,8 @@ import hmac
 import hashlib
 import time
 import requests
+from monitoring.tracing import traced
+from constants import ID_STRATEGY
 
 
 def format_datetime(date_time):
@@ -25,13 +32,60 @@ def format_time(t):
     return t.strftime("%I:%M %p") if t else None
 
 
+# format a number of seconds as "8h 30m"
+def format_duration(seconds):
+    total_seconds = int(seconds)
+    return f"{total_seconds // 3600}h {(total_seconds % 3600) // 60}m"
+
+
 # generate token
 def generate_token():
     return str(random.randint(1000, 9999))
 
 
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+def uuid4_hex():
+    return uuid.uuid4().hex
+
+
+# RFC 9562 version 7, 48 bit unix milliseconds, the sub millisecond fraction
+# in rand_a orders the ids of one process within the millisecond too
+def uuid7_hex():
+    milliseconds, nanoseconds = divmod(time.time_ns(), 1_000_000)
+    value = (
+        (milliseconds & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | (nanoseconds * 4096 // 1_000_000) << 64
+        | 0b10 << 62
+        | int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    )
+    return f"{value:032x}"
+
+
+# 48 bit unix milliseconds and 80 random bits in Crockford base32
+def ulid():
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    return "".join(_CROCKFORD[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+ID_GENERATORS = {"uuid4": uuid4_hex, "uuid7": uuid7_hex, "ulid": ulid}
+
+
+def _id_generator(strategy):
+    if strategy in ID_GENERATORS:
+        return ID_GENERATORS[strategy]
+    # dotted path of a custom generator, e.g. "services.ids.snowflake"
+    module, _, name = strategy.rpartition(".")
+    return getattr(importlib.import_module(module), name)
+
+
+_generate_id = _id_generator(ID_STRATEGY)
+
+
 def generate_uuid():
-    return str(uuid.uuid4().hex)
+    return _generate_id()
 
 
 # generate 10 random digit for account numbebr
@@ -76,6 +130,7 @@ def validate_password(password):
 
 
 # verify password
+@traced("verify_password")
 async def verify_password(password, hashed_password):
     return hasher.verify(password, hashed_password)
 
@@ -143,6 +198,7 @@ def generate_signature(params_to_sign, api_secret):
         return None
 
 
+@traced("ip-api lookup", "client")
 def get_country_by_ip_address(ip_address):
     # https://ipapi.co/102.88.108.57/json
     try:
@@ -175,3 +231,40 @@ def get_ip_address(request):
     except Exception as e:
         logger.error(f"{e}: error from get_ip_address")
         return None
+
+
+# serialize an iterable of dicts as ndjson or csv lines, one chunk per record
+def stream_records(records, output_format="ndjson"):
+    if output_format != "csv":
+        for record in records:
+            yield json.dumps(record, default=str) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = None
+    for record in records:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(record))
+            writer.writeheader()
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+# parse ndjson or csv text into dicts, None for a line that cannot be read
+def read_records(text, input_format="ndjson"):
+    lines = text.splitlines()
+    if input_format == "csv":
+        return [dict(row) for row in csv.DictReader(lines)]
+
+    records = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        records.append(record if isinstance(record, dict) else None)
+    return records
@@ -1 +1 @@
-from .app_logger import logger
+from .app_logger import logger, request_id
@@ -1,13 +1,144 @@
+import atexit
+import json
 import logging
-from constants import FILE_NAME
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    filename=FILE_NAME,
-    # filename='/app/logs/app.log',
-    filemode="a",
-    datefmt="%d-%b-%y %H:%M:%S",
+import queue
+import random
+import sys
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from constants import (
+    FILE_NAME,
+    LOG_LEVEL,
+    LOG_QUEUE_SIZE,
+    LOG_RATE_LIMIT,
+    LOG_SAMPLE_RATES,
 )
 
+# Records are put on a bounded queue by the thread that logs them and written
+# by a single listener thread, so a request never waits for the disk. When
+# the queue is full records are dropped instead.
+#
+# Every uvicorn worker appends to the same file, so none of them rotates it:
+# rotate with logrotate (the file is reopened once moved away) or leave
+# FILE_NAME unset to log to stdout for the container runtime.
+
+request_id = ContextVar("request_id", default=None)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "process": record.process,
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "dropped", 0):
+            entry["dropped"] = record.dropped
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record):
+        record.request_id = request_id.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Samples records below WARNING per logger and rate limits them per call
+    site, the whole app logs through one logger.
+
+    The next record let through carries how many were dropped before it.
+    """
+
+    def __init__(self, rate=LOG_RATE_LIMIT, sample_rates=None):
+        super().__init__()
+        self.rate = rate
+        self.sample_rates = LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._dropped = {}
+
+    def _allowed(self, name, site):
+        if random.random() >= self.sample_rates.get(name, 1.0):
+            return False
+        if not self.rate:
+            return True
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(site, (self.rate, now))
+        tokens = min(self.rate, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[site] = (tokens, now)
+            return False
+        self._buckets[site] = (tokens - 1, now)
+        return True
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        site = (record.name, record.pathname, record.funcName)
+        with self._lock:
+            if not self._allowed(record.name, site):
+                self._dropped[site] = self._dropped.get(site, 0) + 1
+                return False
+            record.dropped = self._dropped.pop(site, 0)
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # render the message and traceback here, the arguments may change
+        # before the listener gets to them
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def output_handler(file_name):
+    """Appends to file_name, shared by the workers, or writes to stdout."""
+    if file_name:
+        return WatchedFileHandler(file_name)
+    return logging.StreamHandler(sys.stdout)
+
+
+def _file_handler():
+    handler = output_handler(FILE_NAME)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+queue_handler.addFilter(RequestIdFilter())
+queue_handler.addFilter(RateLimitFilter())
+
+listener = QueueListener(log_queue, _file_handler(), respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
+logging.basicConfig(level=LOG_LEVEL, handlers=[queue_handler])
+
 logger = logging.getLogger(__name__)
@@ -1,2 +1,7 @@
 from .maintenance import MaintenanceMiddleware
 from .rate_limiter import RateLimitMiddleware
+from .query_counter import QueryCounterMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .request_id import RequestIdMiddleware
+from .tracing import TracingMiddleware
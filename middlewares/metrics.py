@@ -0,0 +1,22 @@
+import time
+from starlette.middleware.base import BaseHTTPMiddleware
+from monitoring.metrics import HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    # noinspection PyMethodMayBeStatic
+    async def dispatch(self, request, call_next):
+        started = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            # the route template, raw paths would make a series per id
+            route = request.scope.get("route")
+            path = route.path if route else "unmatched"
+            HTTP_REQUEST_SECONDS.labels(request.method, path).observe(
+                time.perf_counter() - started
+            )
+            HTTP_REQUESTS.labels(request.method, path, status_code).inc()
@@ -0,0 +1,73 @@
+import random
+import time
+from constants import PROFILE_SAMPLE_RATE, PROFILE_INTERVAL
+from helpers import generate_uuid
+from logger import logger, request_id
+from monitoring.profiling import save_profile
+from security import is_superadmin_request
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilingMiddleware:
+    """
+    Runs a request under pyinstrument when a superadmin sends X-Profile or the
+    request is sampled by PROFILE_SAMPLE_RATE, every other request goes straight
+    through. Plain ASGI so it costs nothing when it does not profile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        sampled = PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE
+        if not sampled:
+            headers = dict(scope["headers"])
+            if PROFILE_HEADER not in headers or not await is_superadmin_request(
+                headers
+            ):
+                return await self.app(scope, receive, send)
+
+        # only profiling deployments need pyinstrument loaded
+        from pyinstrument import Profiler
+
+        # file names are always ours, the caller's request id is only recorded
+        profile_id = generate_uuid()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", []).append(
+                    (b"x-profile-id", profile_id.encode())
+                )
+            await send(message)
+
+        profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            route = scope.get("route")
+            try:
+                save_profile(
+                    profiler,
+                    profile_id,
+                    route.path if route else scope["path"],
+                    {
+                        "request_id": request_id.get(),
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "sampled": bool(sampled),
+                        "duration_seconds": round(time.perf_counter() - started, 6),
+                    },
+                )
+            except Exception as e:
+                logger.error(f"{e} : error saving profile {profile_id}")
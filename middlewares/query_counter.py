@@ -0,0 +1,30 @@
+from starlette.middleware.base import BaseHTTPMiddleware
+from constants import (
+    QUERY_STATS_HEADERS,
+    QUERY_COUNT_THRESHOLD,
+    QUERY_REPEAT_THRESHOLD,
+)
+from logger import logger
+from monitoring import track_queries
+
+
+class QueryCounterMiddleware(BaseHTTPMiddleware):
+    # noinspection PyMethodMayBeStatic
+    async def dispatch(self, request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        repeated = stats.repeated(QUERY_REPEAT_THRESHOLD)
+        if stats.count >= QUERY_COUNT_THRESHOLD or repeated:
+            logger.warning(
+                f"{request.method} {request.url.path} ran {stats.count} queries "
+                f"in {stats.seconds * 1000:.1f}ms"
+            )
+            for shape, count in repeated:
+                logger.warning(f"possible N+1, {count} x {shape[:300]}")
+
+        if QUERY_STATS_HEADERS:
+            response.headers["X-Query-Count"] = str(stats.count)
+            response.headers["X-Query-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+            response.headers["X-Query-Max-Repeats"] = str(stats.max_repeats)
+        return response
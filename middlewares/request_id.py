@@ -0,0 +1,39 @@
+import re
+from helpers import generate_uuid
+from logger import request_id
+
+REQUEST_ID_HEADER = b"x-request-id"
+# ids end up in log lines, response headers and profile details
+VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class RequestIdMiddleware:
+    """
+    Gives every request a correlation id, the caller's X-Request-ID when it
+    sends one, that is attached to its log records and returned in the
+    response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        value = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")
+        if not VALID_REQUEST_ID.fullmatch(value):
+            value = generate_uuid()
+        token = request_id.set(value)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append(
+                    (REQUEST_ID_HEADER, value.encode())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
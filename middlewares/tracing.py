@@ -0,0 +1,63 @@
+import random
+from constants import TRACE_SAMPLE_RATE
+from logger import request_id
+from monitoring.tracing import span, tracing
+from security import is_superadmin_request
+
+TRACE_HEADER = b"x-trace"
+
+
+class TracingMiddleware:
+    """
+    With root set, starts the trace of a request sampled by TRACE_SAMPLE_RATE
+    or asked for by a superadmin with X-Trace. Without it, adds the span of the
+    routed handler to a trace already started, so the time spent in the other
+    middlewares shows up as the gap between the two.
+    """
+
+    def __init__(self, app, root=True):
+        self.app = app
+        self.root = root
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        if not self.root:
+            if not tracing():
+                return await self.app(scope, receive, send)
+            with span("handler"):
+                return await self.app(scope, receive, send)
+
+        sampled = TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE
+        if not sampled:
+            headers = dict(scope["headers"])
+            if TRACE_HEADER not in headers or not await is_superadmin_request(headers):
+                return await self.app(scope, receive, send)
+
+        with span(
+            f"{scope['method']} {scope['path']}",
+            "server",
+            root=True,
+            **{
+                "http.method": scope["method"],
+                "http.target": scope["path"],
+                "request.id": request_id.get(),
+            },
+        ) as current:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    current.set_attribute("http.status_code", message["status"])
+                    message.setdefault("headers", []).append(
+                        (b"x-trace-id", current.trace.trace_id.encode())
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route:
+                    current.name = f"{scope['method']} {route.path}"
+                    current.set_attribute("http.route", route.path)
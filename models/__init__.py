@@ -25,6 +25,9 @@ from models.users import (
     AppliedCandidates,
     JobStages,
     Department,
+    PayrollRunStatus,
+    PayrollRun,
+    PayrollRunItem,
 )
 from models.organization import (
     Organization,
@@ -1,4 +1,5 @@
 from database import Base
+from database.types import IdType
 from sqlalchemy import (
     Column,
     Integer,
@@ -17,7 +18,7 @@ from constants import OTP_EXPIRES
 
 class Reasons(Base):
     __tablename__ = "reasons"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(50))
     description = Column(String(200), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
@@ -35,7 +36,7 @@ class Reasons(Base):
 # industry model
 class Industry(Base):
     __tablename__ = "industry"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(50))
     deleted = Column(Boolean, default=False)
     organization = relationship("Organization", back_populates="indust")
@@ -49,13 +50,13 @@ class Industry(Base):
 
 class Organization(Base):
     __tablename__ = "organization"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(50))
     domain = Column(String(50))
     size = Column(String(50))
-    industry = Column(String(50), ForeignKey("industry.id"))
+    industry = Column(IdType(), ForeignKey("industry.id"))
     indust = relationship("Industry", back_populates="organization")
-    reason_id = Column(String(50), ForeignKey("reasons.id"))
+    reason_id = Column(IdType(), ForeignKey("reasons.id"))
     address = Column(Text, nullable=True)
     country = Column(String(50), nullable=True)
     state = Column(String(50), nullable=True)
@@ -80,13 +81,13 @@ class Organization(Base):
 # holiday model
 class Holiday(Base):
     __tablename__ = "holiday"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(100))
     from_date = Column(DateTime)
     to_date = Column(DateTime)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    organization_id = Column(String(50), ForeignKey("organization.id"), nullable=True)
+    organization_id = Column(IdType(), ForeignKey("organization.id"), nullable=True)
     organization = relationship("Organization", back_populates="holidays")
 
     def to_dict(self):
@@ -1,4 +1,5 @@
 from database import Base
+from database.types import IdType
 from sqlalchemy import (
     Column,
     Integer,
@@ -9,10 +10,13 @@ from sqlalchemy import (
     Float,
     Text,
     Time,
+    Index,
+    UniqueConstraint,
     Enum as SQLAlchemyEnum,
 )
 from sqlalchemy.orm import relationship
-from helpers import generate_uuid, format_datetime, format_time
+from helpers import generate_uuid, format_datetime, format_time, format_duration
+from services.attendance import records_metrics
 from datetime import datetime, timedelta, time
 from constants import OTP_EXPIRES
 from enum import Enum
@@ -82,10 +86,17 @@ class LeaveStatus(Enum):
     REJECTED = "rejected"
 
 
+class PayrollRunStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 class Roles(Base):
     __tablename__ = "roles"
 
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(50), unique=True, nullable=False)
 
     users = relationship("Users", backref="role")
@@ -108,11 +119,11 @@ class Roles(Base):
 
 class Department(Base):
     __tablename__ = "departments"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(50), unique=True, nullable=False)
-    parent_id = Column(String(50), ForeignKey("departments.id"), nullable=True)
+    parent_id = Column(IdType(), ForeignKey("departments.id"), nullable=True)
     position = Column(Integer, nullable=True)
-    organization_id = Column(String(50), ForeignKey("organization.id"), nullable=False)
+    organization_id = Column(IdType(), ForeignKey("organization.id"), nullable=False)
 
     parent = relationship("Department", remote_side=[id], backref="children")
 
@@ -137,7 +148,7 @@ class Department(Base):
 
 class Users(Base):
     __tablename__ = "users"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     first_name = Column(String(50))
     last_name = Column(String(50))
     email = Column(String(50), unique=True)
@@ -150,10 +161,10 @@ class Users(Base):
     is_superadmin = Column(Boolean, default=False)
     active = Column(Boolean, default=True)
     deleted = Column(Boolean, default=False)
-    organization_id = Column(String(50), ForeignKey("organization.id"), nullable=True)
+    organization_id = Column(IdType(), ForeignKey("organization.id"), nullable=True)
     organization = relationship("Organization", back_populates="users")
-    role_id = Column(String(50), ForeignKey("roles.id"), nullable=True)
-    department_id = Column(String(50), ForeignKey("departments.id"), nullable=True)
+    role_id = Column(IdType(), ForeignKey("roles.id"), nullable=True)
+    department_id = Column(IdType(), ForeignKey("departments.id"), nullable=True)
     user_sessions = relationship("UserSessions", backref="user", uselist=False)
     emergency_contact = relationship("EmergencyContact", backref="user", uselist=False)
     uploaded_files = relationship("UploadedFiles", backref="user", uselist=True)
@@ -199,6 +210,21 @@ class Users(Base):
             ),
         }
 
+    # satellite rows are created on first write, until then reads get an
+    # unsaved instance holding the column defaults
+    def satellite(self, relation):
+        record = getattr(self, relation)
+        if record is None:
+            model = self.__mapper__.relationships[relation].mapper.class_
+            record = model(
+                **{
+                    column.key: column.default.arg
+                    for column in model.__table__.columns
+                    if column.default is not None and column.default.is_scalar
+                }
+            )
+        return record
+
     def to_dict_2(self):
         return {
             "id": self.id,
@@ -221,8 +247,8 @@ class Users(Base):
 
 class UserProfile(Base):
     __tablename__ = "user_profile"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"))
     gender = Column(SQLAlchemyEnum(Gender), default=Gender.MALE, nullable=False)
     address = Column(Text, nullable=True)
     country = Column(String(50), nullable=True)
@@ -249,8 +275,8 @@ class UserProfile(Base):
 
 class EmploymentDetails(Base):
     __tablename__ = "employment_details"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"))
     employment_id = Column(String(50), nullable=True)
     job_title = Column(String(70), nullable=True)
     join_date = Column(DateTime, nullable=True)
@@ -269,8 +295,8 @@ class EmploymentDetails(Base):
 
 class Compensation(Base):
     __tablename__ = "compensation"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"), index=True)
     compensation_type = Column(String(50), nullable=True)
     amount = Column(Float, nullable=True)
 
@@ -283,16 +309,16 @@ class Compensation(Base):
 
 class HealthInsurance(Base):
     __tablename__ = "health_insurance"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"))
     health_insurance = Column(String(50), nullable=True)
     health_insurance_number = Column(String(50), nullable=True)
 
 
 class BankDetails(Base):
     __tablename__ = "bank_details"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"))
     bank_name = Column(String(100), nullable=True)
     account_number = Column(String(50), nullable=True)
     account_name = Column(String(100))
@@ -307,8 +333,8 @@ class BankDetails(Base):
 
 class UserSessions(Base):
     __tablename__ = "user_sessions"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"))
     token = Column(String(10))
     salt = Column(String(70))
     created_at = Column(DateTime, default=datetime.now)
@@ -324,7 +350,7 @@ class UserSessions(Base):
 # emergency contact
 class EmergencyContact(Base):
     __tablename__ = "emergency_contact"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     first_name = Column(String(50))
     last_name = Column(String(50))
     email = Column(String(50), unique=True)
@@ -333,19 +359,19 @@ class EmergencyContact(Base):
         SQLAlchemyEnum(Relationship), default=Relationship.FRIEND, nullable=False
     )
     created_at = Column(DateTime, default=datetime.now)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    user_id = Column(IdType(), ForeignKey("users.id"))
 
 
 class UploadedFiles(Base):
     __tablename__ = "uploaded_files"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     file_name = Column(String(100))
     file_url = Column(String(200))
     file_type = Column(
         SQLAlchemyEnum(FileType), default=FileType.PERSONAL, nullable=True
     )
     created_at = Column(DateTime, default=datetime.now)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    user_id = Column(IdType(), ForeignKey("users.id"))
 
     def to_dict(self):
         return {
@@ -360,10 +386,10 @@ class UploadedFiles(Base):
 # leave type
 class LeaveType(Base):
     __tablename__ = "leave_type"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(50))
     duration = Column(Integer)
-    organization_id = Column(String(50), ForeignKey("organization.id"))
+    organization_id = Column(IdType(), ForeignKey("organization.id"))
     created_at = Column(DateTime, default=datetime.now)
     organization = relationship("Organization", back_populates="leave_types")
 
@@ -381,9 +407,13 @@ class LeaveType(Base):
 # leave request
 class LeaveRequest(Base):
     __tablename__ = "leave_request"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
-    leave_type_id = Column(String(50), ForeignKey("leave_type.id"))
+    __table_args__ = (
+        Index("ix_leave_request_start_date_end_date", "start_date", "end_date"),
+        Index("ix_leave_request_user_id_start_date", "user_id", "start_date"),
+    )
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"))
+    leave_type_id = Column(IdType(), ForeignKey("leave_type.id"))
     start_date = Column(DateTime)
     end_date = Column(DateTime)
     created_at = Column(DateTime, default=datetime.now)
@@ -393,6 +423,7 @@ class LeaveRequest(Base):
     status = Column(
         SQLAlchemyEnum(LeaveStatus), default=LeaveStatus.PENDING, nullable=False
     )
+    working_days = Column(Integer, nullable=True)
 
     def to_dict(self):
         return {
@@ -407,8 +438,12 @@ class LeaveRequest(Base):
             "start_date": self.start_date,
             "end_date": self.end_date,
             "created_at": self.created_at,
-            # date difference
-            "days": (self.end_date - self.start_date).days + 1,
+            # working days, calendar days for requests saved before they were counted
+            "days": (
+                self.working_days
+                if self.working_days is not None
+                else (self.end_date - self.start_date).days + 1
+            ),
             # "days": self.end_date - self.start_date,
             "note": self.note,
             "document_url": self.document_url,
@@ -420,10 +455,10 @@ class LeaveRequest(Base):
 # work hours
 class WorkHours(Base):
     __tablename__ = "work_hours"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     start_time = Column(Time)
     end_time = Column(Time)
-    organization_id = Column(String(50), ForeignKey("organization.id"))
+    organization_id = Column(IdType(), ForeignKey("organization.id"))
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     organization = relationship("Organization", back_populates="work_hours")
@@ -438,8 +473,11 @@ class WorkHours(Base):
 
 class Attendance(Base):
     __tablename__ = "attendance"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
-    user_id = Column(String(50), ForeignKey("users.id"))
+    __table_args__ = (
+        Index("ix_attendance_user_id_created_at", "user_id", "created_at"),
+    )
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    user_id = Column(IdType(), ForeignKey("users.id"))
     check_in = Column(Time)
     check_out = Column(Time)
     clock_in_location = Column(String(100))
@@ -460,95 +498,10 @@ class Attendance(Base):
             "note": self.note,
         }
 
-    def employee_dict(self, hr=False):
-        overtime = timedelta(0)
-        deficit = timedelta(0)
-        work_schedule = timedelta(0)
-        logged_time = timedelta(0)
-
-        base_date = datetime.today().date()
-        current_time = datetime.now().time()
-
-        # Calculate work schedule (scheduled hours)
-        if self.start_time and self.end_time:
-            start_dt = datetime.combine(base_date, self.start_time)
-            end_dt = datetime.combine(base_date, self.end_time)
-
-            # Handle overnight shifts
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)
-
-            work_schedule = end_dt - start_dt
-
-        # Calculate logged time (actual hours worked)
-        if self.check_in:
-            check_in_dt = datetime.combine(base_date, self.check_in)
-
-            if self.check_out:
-                # If checked out: logged_time = check_out - check_in
-                check_out_dt = datetime.combine(base_date, self.check_out)
-                if check_out_dt < check_in_dt:
-                    check_out_dt += timedelta(days=1)
-                logged_time = check_out_dt - check_in_dt
-            else:
-                # If still working: logged_time = min(current_time, end_time) - check_in
-                current_dt = datetime.combine(base_date, current_time)
-
-                if self.end_time:
-                    end_dt = datetime.combine(base_date, self.end_time)
-                    if end_dt < check_in_dt:
-                        end_dt += timedelta(days=1)
-
-                    # Use whichever is earlier: current time or scheduled end time
-                    end_reference = min(current_dt, end_dt)
-                else:
-                    # If no end_time, just use current time
-                    end_reference = current_dt
-
-                if end_reference < check_in_dt:
-                    end_reference += timedelta(days=1)
-
-                logged_time = end_reference - check_in_dt
-
-        # Calculate deficit for late clock-in (even if no check_out yet)
-        if self.check_in and self.start_time:
-            check_in_dt = datetime.combine(base_date, self.check_in)
-            start_dt = datetime.combine(base_date, self.start_time)
-
-            if check_in_dt > start_dt:
-                deficit = check_in_dt - start_dt
-
-        # Calculate overtime and additional deficit only if checked out
-        if self.check_in and self.check_out and self.start_time and self.end_time:
-            check_in_dt = datetime.combine(base_date, self.check_in)
-            check_out_dt = datetime.combine(base_date, self.check_out)
-            start_dt = datetime.combine(base_date, self.start_time)
-            end_dt = datetime.combine(base_date, self.end_time)
-
-            # Handle overnight shifts for comparison
-            if check_out_dt < check_in_dt:
-                check_out_dt += timedelta(days=1)
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)
-
-            # Overtime: worked after scheduled end time
-            if check_out_dt > end_dt:
-                overtime = check_out_dt - end_dt
-
-            # Additional deficit for early departure
-            if check_out_dt < end_dt:
-                deficit += end_dt - check_out_dt
-
-        # Format timedelta to human-readable format
-        def format_timedelta(td):
-            if td == timedelta(0):
-                return "0h 0m"
-
-            total_seconds = int(td.total_seconds())
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-
-            return f"{hours}h {minutes}m"
+    def employee_dict(self, hr=False, metrics=None):
+        # metrics are computed for a whole page at once by records_metrics
+        if metrics is None:
+            metrics = records_metrics([self])[0]
 
         attend_dict = {
             "id": self.id,
@@ -558,11 +511,11 @@ class Attendance(Base):
             "clock_out_location": self.clock_out_location,
             "start_time": format_time(self.start_time) if self.start_time else None,
             "end_time": format_time(self.end_time) if self.end_time else None,
-            "work_schedule": format_timedelta(work_schedule),  # Scheduled hours
-            "logged_time": format_timedelta(logged_time),  # Actual hours worked
+            "work_schedule": format_duration(metrics["work_schedule"]),
+            "logged_time": format_duration(metrics["logged_time"]),
             "note": self.note,
-            "overtime": format_timedelta(overtime),
-            "deficit": format_timedelta(deficit),
+            "overtime": format_duration(metrics["overtime"]),
+            "deficit": format_duration(metrics["deficit"]),
             "created_at": format_datetime(self.created_at),
             "updated_at": format_datetime(self.updated_at),
         }
@@ -578,12 +531,66 @@ class Attendance(Base):
         return attend_dict
 
 
+# payroll run, results are written once by the payroll worker and never edited
+class PayrollRun(Base):
+    __tablename__ = "payroll_run"
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    organization_id = Column(
+        IdType(), ForeignKey("organization.id"), nullable=False, index=True
+    )
+    period_start = Column(DateTime, nullable=False)
+    period_end = Column(DateTime, nullable=False)
+    status = Column(
+        SQLAlchemyEnum(PayrollRunStatus),
+        default=PayrollRunStatus.PENDING,
+        nullable=False,
+    )
+    employee_count = Column(Integer, nullable=False, default=0)
+    total_gross = Column(Float, nullable=False, default=0)
+    total_net = Column(Float, nullable=False, default=0)
+    created_by = Column(IdType(), ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    completed_at = Column(DateTime, nullable=True)
+    items = relationship("PayrollRunItem", backref="payroll_run")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "period_start": format_datetime(self.period_start),
+            "period_end": format_datetime(self.period_end),
+            "status": self.status.value,
+            "employee_count": self.employee_count,
+            "total_gross": self.total_gross,
+            "total_net": self.total_net,
+            "created_at": format_datetime(self.created_at),
+            "completed_at": format_datetime(self.completed_at),
+        }
+
+
+class PayrollRunItem(Base):
+    __tablename__ = "payroll_run_item"
+    __table_args__ = (UniqueConstraint("payroll_run_id", "user_id"),)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
+    payroll_run_id = Column(
+        IdType(), ForeignKey("payroll_run.id"), nullable=False, index=True
+    )
+    user_id = Column(IdType(), ForeignKey("users.id"), nullable=False, index=True)
+    gross = Column(Float, nullable=False, default=0)
+    days_worked = Column(Integer, nullable=False, default=0)
+    overtime_seconds = Column(Integer, nullable=False, default=0)
+    deficit_seconds = Column(Integer, nullable=False, default=0)
+    overtime_pay = Column(Float, nullable=False, default=0)
+    deficit_deduction = Column(Float, nullable=False, default=0)
+    net = Column(Float, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.now)
+
+
 class JobStages(Base):
     __tablename__ = "job_stages"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     name = Column(String(50), nullable=False)
     priority = Column(Integer, nullable=True)
-    organization_id = Column(String(50), ForeignKey("organization.id"), nullable=False)
+    organization_id = Column(IdType(), ForeignKey("organization.id"), nullable=False)
     applied_candidates = relationship("AppliedCandidates", backref="job_stage")
 
     def to_dict(self, priority=False):
@@ -594,7 +601,7 @@ class JobStages(Base):
 
 class JobPosting(Base):
     __tablename__ = "job_posting"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     title = Column(String(50), nullable=False)
     description = Column(Text)
     location = Column(String(150), nullable=False)
@@ -605,10 +612,10 @@ class JobPosting(Base):
     max_salary = Column(Float, nullable=True)
     status = Column(String(50), nullable=False, default="active", index=True)
     department_id = Column(
-        String(50), ForeignKey("departments.id"), nullable=False, index=True
+        IdType(), ForeignKey("departments.id"), nullable=False, index=True
     )
     organization_id = Column(
-        String(50), ForeignKey("organization.id"), nullable=False, index=True
+        IdType(), ForeignKey("organization.id"), nullable=False, index=True
     )
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -661,9 +668,9 @@ class JobPosting(Base):
 
 class AppliedCandidates(Base):
     __tablename__ = "applied_candidates"
-    id = Column(String(50), primary_key=True, default=generate_uuid)
+    id = Column(IdType(), primary_key=True, default=generate_uuid)
     job_posting_id = Column(
-        String(50), ForeignKey("job_posting.id"), nullable=False, index=True
+        IdType(), ForeignKey("job_posting.id"), nullable=False, index=True
     )
     full_name = Column(String(150), nullable=False)
     email = Column(String(150), nullable=False)
@@ -671,7 +678,7 @@ class AppliedCandidates(Base):
     resume = Column(String(200), nullable=False)
     cover_letter = Column(Text, nullable=True)
     job_stage_id = Column(
-        String(50), ForeignKey("job_stages.id"), nullable=False, index=True
+        IdType(), ForeignKey("job_stages.id"), nullable=False, index=True
     )
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
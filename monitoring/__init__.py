@@ -0,0 +1,22 @@
+from .queries import instrument_queries, track_queries, current_queries
+from .slow_queries import top_slow_queries
+from .metrics import instrument_redis, render_metrics
+from .loop_lag import loop_lag_monitor
+from .profiling import list_profiles, profile_path
+from .tracing import (
+    span,
+    traced,
+    start_span,
+    tracing,
+    instrument_tracing,
+    recent_traces,
+    get_trace,
+)
+from .memory import (
+    memory_monitor,
+    memory_summary,
+    start_tracemalloc,
+    stop_tracemalloc,
+    take_snapshot,
+    compare_snapshots,
+)
@@ -0,0 +1,131 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from constants import LOOP_LAG_INTERVAL, LOOP_STALL_SECONDS
+from logger import logger
+from monitoring.metrics import (
+    EVENT_LOOP_LAG,
+    EVENT_LOOP_STALLS,
+    EVENT_LOOP_STALL_SECONDS,
+)
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STACK_DEPTH = 15
+
+
+def _is_app_frame(frame):
+    filename = frame.f_code.co_filename
+    return (
+        filename.startswith(APP_ROOT)
+        and "site-packages" not in filename
+        and not filename.startswith(os.path.join(APP_ROOT, "monitoring"))
+    )
+
+
+def _route(frame):
+    """Route of the request whose code is running in the frame, if any."""
+    while frame:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") in ("http", "websocket"):
+            route = scope.get("route")
+            return route.path if route else "unmatched"
+        frame = frame.f_back
+    return "none"
+
+
+def _site(frame):
+    """Innermost application frame, the code to fix."""
+    while frame:
+        if _is_app_frame(frame):
+            return (
+                f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+                f":{frame.f_lineno}"
+            )
+        frame = frame.f_back
+    return "unknown"
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a callback scheduled every interval.
+
+    A watchdog thread notices when the loop has not come back for longer than
+    threshold and samples the stack of the loop thread while it is still
+    blocked, so the stall is attributed to the route in flight and the
+    application frame that blocked it.
+    """
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL, threshold=LOOP_STALL_SECONDS):
+        self.interval = interval
+        self.threshold = threshold
+        self._beat = time.monotonic()
+        self._stall = None
+        self._task = None
+        self._thread = None
+        self._thread_id = None
+        self._stopped = threading.Event()
+
+    async def start(self):
+        if self._task:
+            return
+        self._thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop_lag_watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self):
+        self._stopped.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _probe(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = max(0.0, now - expected)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                self._report(lag)
+
+    def _watch(self):
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(poll):
+            blocked = time.monotonic() - self._beat - self.interval
+            if self._stall is None and blocked >= self.threshold:
+                self._stall = self._sample()
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return None
+        try:
+            return (
+                _route(frame),
+                _site(frame),
+                "".join(traceback.format_stack(frame)[-STACK_DEPTH:]),
+            )
+        except Exception as e:
+            logger.error(f"{e} : error sampling blocked event loop")
+            return None
+
+    def _report(self, lag):
+        stall, self._stall = self._stall, None
+        route, site, stack = stall or ("unknown", "unknown", "")
+        EVENT_LOOP_STALLS.labels(route, site).inc()
+        EVENT_LOOP_STALL_SECONDS.labels(route, site).inc(lag)
+        logger.warning(
+            f"event loop blocked for {lag * 1000:.0f}ms by {route} at {site}\n{stack}"
+        )
+
+
+loop_lag_monitor = LoopLagMonitor()
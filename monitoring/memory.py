@@ -0,0 +1,200 @@
+import asyncio
+import gc
+import itertools
+import os
+import resource
+import threading
+import tracemalloc
+from collections import Counter, OrderedDict
+from datetime import datetime
+from constants import (
+    MEMORY_TRACEMALLOC,
+    MEMORY_TRACEMALLOC_FRAMES,
+    MEMORY_SNAPSHOTS,
+    MEMORY_SAMPLE_INTERVAL,
+)
+from logger import logger
+from monitoring.metrics import (
+    WORKER_RSS_BYTES,
+    TRACEMALLOC_TRACED_BYTES,
+)
+
+# Everything here is about the worker process serving the request, every
+# response carries its pid so snapshots are compared within one worker.
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_TOP = 25
+
+_snapshots = OrderedDict()
+_snapshot_ids = itertools.count(1)
+_lock = threading.Lock()
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        # no procfs, the peak is the best there is
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def peak_rss_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _type_counts():
+    return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+
+def _filtered(snapshot):
+    return snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        )
+    )
+
+
+def start_tracemalloc(frames=MEMORY_TRACEMALLOC_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracemalloc():
+    with _lock:
+        _snapshots.clear()
+    tracemalloc.stop()
+
+
+def memory_summary():
+    traced, traced_peak = (
+        tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    )
+    with _lock:
+        snapshots = [
+            {"id": snapshot_id, "taken_at": taken_at}
+            for snapshot_id, (taken_at, _, _) in _snapshots.items()
+        ]
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "gc_objects": len(gc.get_objects()),
+        "gc_counts": gc.get_count(),
+        "tracemalloc": tracemalloc.is_tracing(),
+        "tracemalloc_frames": tracemalloc.get_traceback_limit(),
+        "traced_bytes": traced,
+        "traced_peak_bytes": traced_peak,
+        "snapshots": snapshots,
+    }
+
+
+def _site(stat):
+    frame = stat.traceback[0]
+    return {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+    }
+
+
+def take_snapshot(limit=_TOP):
+    """Snapshot the allocations and object counts, with their top entries."""
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = _filtered(tracemalloc.take_snapshot())
+    counts = _type_counts()
+    taken_at = datetime.now().isoformat()
+    with _lock:
+        snapshot_id = next(_snapshot_ids)
+        _snapshots[snapshot_id] = (taken_at, snapshot, counts)
+        while len(_snapshots) > MEMORY_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+
+    return {
+        "id": snapshot_id,
+        "pid": os.getpid(),
+        "taken_at": taken_at,
+        "top_sites": [
+            {**_site(stat), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("traceback")[:limit]
+        ],
+        "top_types": [
+            {"type": name, "count": count} for name, count in counts.most_common(limit)
+        ],
+    }
+
+
+def compare_snapshots(snapshot_id, against_id=None, limit=_TOP):
+    """
+    What grew between an older snapshot and snapshot_id, by allocation site
+    and by object type. Without against_id the snapshot before it is used.
+    """
+    with _lock:
+        if snapshot_id not in _snapshots:
+            return None
+        if against_id is None:
+            older = [key for key in _snapshots if key < snapshot_id]
+            against_id = older[-1] if older else None
+        if against_id not in _snapshots:
+            return None
+        _, new, new_counts = _snapshots[snapshot_id]
+        _, old, old_counts = _snapshots[against_id]
+
+    type_diff = Counter(new_counts)
+    type_diff.subtract(old_counts)
+    return {
+        "id": snapshot_id,
+        "against": against_id,
+        "pid": os.getpid(),
+        "top_sites": [
+            {
+                **_site(stat),
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+            }
+            for stat in new.compare_to(old, "traceback")[:limit]
+        ],
+        "top_types": [
+            {"type": name, "count_diff": diff, "count": new_counts[name]}
+            for name, diff in type_diff.most_common(limit)
+            if diff
+        ],
+    }
+
+
+class MemoryMonitor:
+    """Samples the worker's memory into gauges every interval."""
+
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._task = None
+
+    async def start(self):
+        if MEMORY_TRACEMALLOC:
+            start_tracemalloc()
+        if not self._task:
+            self._task = asyncio.create_task(self._sample())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self):
+        while True:
+            try:
+                WORKER_RSS_BYTES.set(rss_bytes())
+                TRACEMALLOC_TRACED_BYTES.set(
+                    tracemalloc.get_traced_memory()[0]
+                    if tracemalloc.is_tracing()
+                    else 0
+                )
+            except Exception as e:
+                logger.error(f"{e} : error sampling worker memory")
+            await asyncio.sleep(self.interval)
+
+
+memory_monitor = MemoryMonitor()
@@ -0,0 +1,111 @@
+import redis
+from constants import PROMETHEUS_MULTIPROC_DIR, REDIS_HOST, REDIS_PORT
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from connections import redis_conn
+from logger import logger
+
+# With PROMETHEUS_MULTIPROC_DIR set every uvicorn worker writes its samples
+# there and any worker can serve the sum of all of them.
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+REDIS_ROUND_TRIPS = Counter("redis_round_trips_total", "Redis round trips")
+CACHE_REQUESTS = Counter("cache_requests_total", "cache_it lookups", ["key", "result"])
+WEBSOCKET_CONNECTIONS = Gauge(
+    "websocket_connections", "Open websocket connections", multiprocess_mode="livesum"
+)
+WEBSOCKET_ROOMS = Gauge(
+    "websocket_rooms", "Websocket rooms with a connection", multiprocess_mode="livesum"
+)
+CELERY_QUEUE_DEPTH = Gauge(
+    "celery_queue_depth",
+    "Tasks waiting in the celery queue",
+    ["queue"],
+    multiprocess_mode="mostrecent",
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in running a scheduled callback",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_STALLS = Counter(
+    "event_loop_stalls_total",
+    "Event loop stalls by the route in flight and the blocking code site",
+    ["route", "site"],
+)
+EVENT_LOOP_STALL_SECONDS = Counter(
+    "event_loop_stall_seconds_total",
+    "Time the event loop was blocked, by route and code site",
+    ["route", "site"],
+)
+
+WORKER_RSS_BYTES = Gauge(
+    "worker_resident_memory_bytes",
+    "Resident memory of the worker process",
+    multiprocess_mode="liveall",
+)
+TRACEMALLOC_TRACED_BYTES = Gauge(
+    "worker_tracemalloc_traced_bytes",
+    "Memory traced by tracemalloc in the worker, 0 when it is off",
+    multiprocess_mode="liveall",
+)
+
+CELERY_QUEUES = ("celery",)
+# connects lazily, one pool reused by every scrape
+_broker = redis.Redis(host=REDIS_HOST or "localhost", port=REDIS_PORT or 6379)
+
+
+class _RoundTripCounter:
+    # a pipeline sends all of its commands in one packed command
+    def send_packed_command(self, command, check_health=True):
+        REDIS_ROUND_TRIPS.inc()
+        return super().send_packed_command(command, check_health)
+
+
+def instrument_redis():
+    for client in (redis_conn.connection, redis_conn.raw_connection):
+        pool = client.connection_pool
+        if not issubclass(pool.connection_class, _RoundTripCounter):
+            pool.connection_class = type(
+                f"Instrumented{pool.connection_class.__name__}",
+                (_RoundTripCounter, pool.connection_class),
+                {},
+            )
+
+
+def _collect_celery_queue_depth():
+    try:
+        for queue in CELERY_QUEUES:
+            CELERY_QUEUE_DEPTH.labels(queue).set(_broker.llen(queue))
+    except Exception as e:
+        logger.error(f"{e} : error reading celery queue depth")
+
+
+def render_metrics():
+    _collect_celery_queue_depth()
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
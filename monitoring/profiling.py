@@ -0,0 +1,81 @@
+import json
+import os
+import re
+from datetime import datetime
+from constants import PROFILE_DIR, PROFILE_KEEP
+
+# A profile is stored as {PROFILE_DIR}/{route}/{profile_id}.html with the
+# request details next to it in {profile_id}.json. Only the newest
+# PROFILE_KEEP profiles of a route are kept.
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _route_dir(route):
+    return os.path.join(PROFILE_DIR, _UNSAFE.sub("_", route).strip("_") or "root")
+
+
+def save_profile(profiler, profile_id, route, details):
+    directory = _route_dir(route)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{profile_id}.html"), "w") as file:
+        file.write(profiler.output_html())
+    details = {
+        "id": profile_id,
+        "route": route,
+        "created_at": datetime.now().isoformat(),
+        **details,
+    }
+    with open(os.path.join(directory, f"{profile_id}.json"), "w") as file:
+        json.dump(details, file)
+    _prune(directory)
+    return details
+
+
+def _prune(directory):
+    entries = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in entries[PROFILE_KEEP:]:
+        profile_id = entry.name[: -len(".json")]
+        for suffix in (".json", ".html"):
+            # another worker may prune the same profile
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(route=None):
+    """Stored profiles, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    directories = (
+        [_route_dir(route)]
+        if route
+        else [entry.path for entry in os.scandir(PROFILE_DIR) if entry.is_dir()]
+    )
+    profiles = []
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json"):
+                try:
+                    with open(entry.path) as file:
+                        profiles.append(json.load(file))
+                except FileNotFoundError:
+                    continue
+    return sorted(profiles, key=lambda profile: profile["created_at"], reverse=True)
+
+
+def profile_path(profile_id):
+    if _UNSAFE.search(profile_id) or not os.path.isdir(PROFILE_DIR):
+        return None
+    for entry in os.scandir(PROFILE_DIR):
+        path = os.path.join(entry.path, f"{profile_id}.html")
+        if entry.is_dir() and os.path.exists(path):
+            return path
+    return None
@@ -0,0 +1,119 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from constants import SLOW_QUERY_SECONDS
+from monitoring.slow_queries import record_slow_query, calling_function
+from monitoring.tracing import start_span, tracing
+from monitoring.metrics import DB_QUERY_SECONDS
+
+_IN_LIST = re.compile(
+    r"\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*,)+\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*\)"
+)
+
+_current = ContextVar("request_queries", default=None)
+
+
+def statement_shape(statement):
+    # expanded IN lists differ in size, they are the same statement
+    return _IN_LIST.sub("(?)", statement)
+
+
+class QueryStats:
+    """SQL statements issued while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statement shapes run at least threshold times, most repeated first."""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+    @property
+    def max_repeats(self):
+        return max(self.shapes.values(), default=0)
+
+
+def current_queries():
+    return _current.get()
+
+
+class track_queries:
+    """Collect the queries of the enclosed block, e.g. a request."""
+
+    def __enter__(self):
+        self.stats = QueryStats()
+        self._token = _current.set(self.stats)
+        return self.stats
+
+    def __exit__(self, *exc):
+        _current.reset(self._token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    query_span = None
+    if tracing():
+        query_span = start_span(
+            f"sql {statement.lstrip().split(None, 1)[0].upper()}",
+            "client",
+            **{
+                "db.system": conn.dialect.name,
+                "db.statement": statement_shape(statement)[:1000],
+                "code.function": calling_function(),
+            },
+        )
+    conn.info.setdefault("query_started", []).append((time.perf_counter(), query_span))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    started, query_span = started.pop()
+    seconds = time.perf_counter() - started
+    if query_span:
+        query_span.finish()
+    DB_QUERY_SECONDS.observe(seconds)
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    if seconds >= SLOW_QUERY_SECONDS:
+        record_slow_query(
+            conn.engine,
+            statement_shape(statement),
+            statement,
+            parameters,
+            executemany,
+            seconds,
+        )
+
+
+def _handle_error(exception_context):
+    started = exception_context.connection and exception_context.connection.info.get(
+        "query_started"
+    )
+    if started:
+        _, query_span = started.pop()
+        if query_span:
+            query_span.record_exception(exception_context.original_exception)
+            query_span.finish()
+
+
+def instrument_queries():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
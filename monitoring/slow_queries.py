@@ -0,0 +1,138 @@
+import hashlib
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from connections import redis_conn
+from constants import (
+    SLOW_QUERY_EXPLAIN_SECONDS,
+    SLOW_QUERY_RETENTION_DAYS,
+    SLOW_QUERY_MAX_SHAPES,
+)
+from logger import logger
+
+# Slow statements are grouped by shape. Each shape keeps its counters in the
+# hash slow_query:{digest} and its total time in the slow_queries sorted set,
+# so the top offenders of every worker can be listed together. The sets keep
+# the SLOW_QUERY_MAX_SHAPES highest scores and expire with the hashes when no
+# slow query is recorded for SLOW_QUERY_RETENTION_DAYS.
+
+SLOW_QUERIES_KEY = "slow_queries"
+
+# one thread, recording must never slow the query it records down
+_recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow_query")
+
+
+def _query_key(digest):
+    return f"slow_query:{digest}"
+
+
+def _redact(parameters, executemany):
+    """Parameter types instead of values, they may hold personal data."""
+    if executemany:
+        return {"rows": len(parameters), "first": _redact(parameters[0], False)}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def calling_function():
+    """The cruds function, or else the first application frame, running the query."""
+    frame = sys._getframe(2)
+    fallback = None
+    while frame:
+        module = frame.f_globals.get("__name__", "")
+        if module == "cruds" or module.startswith("cruds."):
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        if fallback is None and not module.startswith(
+            ("sqlalchemy", "monitoring", "contextlib", "threading")
+        ):
+            fallback = f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return fallback
+
+
+def _explain(engine, statement, parameters):
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    return "\n".join(" ".join(str(column) for column in row) for row in rows)
+
+
+def _store(engine, shape, statement, parameters, redacted, caller, seconds):
+    try:
+        digest = hashlib.sha1(shape.encode()).hexdigest()[:16]
+        key = _query_key(digest)
+        pipe = redis_conn.pipeline()
+        pipe.hset(
+            key,
+            mapping={
+                "digest": digest,
+                "statement": shape,
+                "parameters": str(redacted),
+                "caller": caller or "",
+                "last_seconds": round(seconds, 6),
+            },
+        )
+        pipe.hincrby(key, "count", 1)
+        pipe.hincrbyfloat(key, "total_seconds", seconds)
+        pipe.expire(key, SLOW_QUERY_RETENTION_DAYS * 86400)
+        pipe.zincrby(SLOW_QUERIES_KEY, seconds, digest)
+        pipe.zadd(f"{SLOW_QUERIES_KEY}:max", {digest: seconds}, gt=True)
+        for ranking in (SLOW_QUERIES_KEY, f"{SLOW_QUERIES_KEY}:max"):
+            pipe.zremrangebyrank(ranking, 0, -SLOW_QUERY_MAX_SHAPES - 1)
+            pipe.expire(ranking, SLOW_QUERY_RETENTION_DAYS * 86400)
+        pipe.execute()
+
+        if (
+            seconds >= SLOW_QUERY_EXPLAIN_SECONDS
+            and parameters is not None
+            and shape.lstrip().upper().startswith(("SELECT", "WITH"))
+            and not redis_conn.hget(key, "plan")
+        ):
+            redis_conn.hset(key, "plan", _explain(engine, statement, parameters))
+    except Exception as e:
+        logger.error(f"{e} : error recording slow query")
+
+
+def record_slow_query(engine, shape, statement, parameters, executemany, seconds):
+    if statement.lstrip().upper().startswith("EXPLAIN"):
+        return
+    _recorder.submit(
+        _store,
+        engine,
+        shape,
+        statement,
+        None if executemany else parameters,
+        _redact(parameters, executemany),
+        calling_function(),
+        seconds,
+    )
+
+
+def top_slow_queries(limit=20, order="total"):
+    """Slowest statement shapes by total or by max time, across workers."""
+    key = SLOW_QUERIES_KEY if order == "total" else f"{SLOW_QUERIES_KEY}:max"
+    queries = []
+    start = 0
+    while len(queries) < limit:
+        ranked = redis_conn.zrevrange(key, start, start + limit - 1)
+        if not ranked:
+            break
+        start += len(ranked)
+        for digest in ranked:
+            query = redis_conn.hgetall(_query_key(digest))
+            if not query:
+                # the hash expired, drop the shape from both rankings
+                redis_conn.zrem(SLOW_QUERIES_KEY, digest)
+                redis_conn.zrem(f"{SLOW_QUERIES_KEY}:max", digest)
+                start -= 1
+                continue
+            count = int(query.get("count", 0))
+            total = float(query.get("total_seconds", 0))
+            query["count"] = count
+            query["total_seconds"] = round(total, 6)
+            query["avg_seconds"] = round(total / count, 6) if count else 0.0
+            query["max_seconds"] = redis_conn.zscore(f"{SLOW_QUERIES_KEY}:max", digest)
+            queries.append(query)
+            if len(queries) == limit:
+                break
+    return queries
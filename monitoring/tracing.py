@@ -0,0 +1,284 @@
+import inspect
+import json
+import logging
+import queue
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import QueueListener
+from constants import (
+    TRACE_BUFFER_SIZE,
+    TRACE_MAX_SPANS,
+    TRACE_FILE,
+    TRACE_RETENTION_SECONDS,
+    LOG_QUEUE_SIZE,
+)
+from connections import redis_conn
+from logger import logger
+from logger.app_logger import NonBlockingQueueHandler, output_handler
+
+# Spans follow the OpenTelemetry data model (trace and span ids, parent,
+# kind, attributes, status, unix nano timestamps). Finished traces are stored
+# in Redis for TRACE_RETENTION_SECONDS, so any worker can serve them: the
+# spans under trace:{trace_id} and the summaries of the newest
+# TRACE_BUFFER_SIZE traces in the traces sorted set, scored by start. With
+# TRACE_FILE set they are also appended to it as json lines.
+
+TRACES_KEY = "traces"
+
+_current_span = ContextVar("current_span", default=None)
+
+# one thread, storing must never slow the request it traced down
+_recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace")
+
+_exporter = None
+
+
+def _new_id(bits):
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = _new_id(128)
+        self.spans = []
+        self.dropped = 0
+
+    def add(self, span):
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+class Span:
+    def __init__(self, name, trace, parent=None, kind="internal", attributes=None):
+        self.name = name
+        self.trace = trace
+        self.span_id = _new_id(64)
+        self.parent_id = parent.span_id if parent else None
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.status = "unset"
+        self.start = time.time_ns()
+        self.end = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.status = "error"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)[:500]
+
+    def finish(self):
+        self.end = time.time_ns()
+        self.trace.add(self)
+        if self.parent_id is None:
+            _finish_trace(self)
+
+    @property
+    def duration_ms(self):
+        return ((self.end or time.time_ns()) - self.start) / 1e6
+
+    def to_dict(self):
+        return {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start,
+            "endTimeUnixNano": self.end,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+def current_span():
+    return _current_span.get()
+
+
+def tracing():
+    """Whether the running code belongs to a sampled trace."""
+    return _current_span.get() is not None
+
+
+def start_span(name, kind="internal", **attributes):
+    """A child of the current span, or None outside of a trace."""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    return Span(name, parent.trace, parent, kind, attributes)
+
+
+@contextmanager
+def span(name, kind="internal", root=False, **attributes):
+    """
+    Time the enclosed block as a span. Outside of a trace it does nothing
+    unless root is set, which starts a new trace.
+    """
+    parent = _current_span.get()
+    if parent is None and not root:
+        yield None
+        return
+    current = Span(name, parent.trace if parent else Trace(), parent, kind, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.record_exception(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def traced(name=None, kind="internal"):
+    """Decorator tracing every call of a sync or async function."""
+
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with span(span_name, kind):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _store(summary, spans):
+    try:
+        pipe = redis_conn.pipeline()
+        pipe.set(
+            _trace_key(summary["trace_id"]),
+            json.dumps({**summary, "spans": spans}, default=str),
+            ex=TRACE_RETENTION_SECONDS,
+        )
+        pipe.zadd(TRACES_KEY, {json.dumps(summary, default=str): summary["start"]})
+        pipe.zremrangebyrank(TRACES_KEY, 0, -TRACE_BUFFER_SIZE - 1)
+        pipe.zremrangebyscore(
+            TRACES_KEY, "-inf", time.time_ns() - TRACE_RETENTION_SECONDS * 10**9
+        )
+        pipe.expire(TRACES_KEY, TRACE_RETENTION_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"{e} : error storing trace")
+
+
+def _finish_trace(root):
+    trace = root.trace
+    summary = {
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "route": root.attributes.get("http.route"),
+        "status_code": root.attributes.get("http.status_code"),
+        "request_id": root.attributes.get("request.id"),
+        "start": root.start,
+        "duration_ms": round(root.duration_ms, 3),
+        "span_count": len(trace.spans),
+        "dropped_spans": trace.dropped,
+    }
+    spans = [
+        span.to_dict() for span in sorted(trace.spans, key=lambda span: span.start)
+    ]
+    _recorder.submit(_store, summary, spans)
+    if _exporter:
+        _exporter.info(json.dumps({**summary, "spans": spans}, default=str))
+
+
+def _trace_key(trace_id):
+    return f"trace:{trace_id}"
+
+
+def recent_traces(route=None, min_ms=0, limit=50):
+    """Summaries of the recently finished traces of all workers, slowest first."""
+    summaries = [
+        json.loads(summary) for summary in redis_conn.zrevrange(TRACES_KEY, 0, -1)
+    ]
+    summaries = [
+        summary
+        for summary in summaries
+        if summary["duration_ms"] >= min_ms and (not route or summary["route"] == route)
+    ]
+    return sorted(summaries, key=lambda summary: summary["duration_ms"], reverse=True)[
+        :limit
+    ]
+
+
+def get_trace(trace_id):
+    trace = redis_conn.get(_trace_key(trace_id))
+    return json.loads(trace) if trace else None
+
+
+def _traced_execute_command(execute_command):
+    @wraps(execute_command)
+    def wrapper(self, *args, **options):
+        if _current_span.get() is None:
+            return execute_command(self, *args, **options)
+        with span(f"redis {args[0]}", "client", **{"db.system": "redis"}):
+            return execute_command(self, *args, **options)
+
+    wrapper._traced = True
+    return wrapper
+
+
+def _traced_pipeline_execute(execute):
+    @wraps(execute)
+    def wrapper(self, *args, **kwargs):
+        if _current_span.get() is None:
+            return execute(self, *args, **kwargs)
+        with span(
+            "redis pipeline",
+            "client",
+            **{"db.system": "redis", "redis.commands": len(self.command_stack)},
+        ):
+            return execute(self, *args, **kwargs)
+
+    wrapper._traced = True
+    return wrapper
+
+
+def instrument_tracing():
+    """Redis spans, and the trace file exporter when TRACE_FILE is set."""
+    global _exporter
+    import redis.client
+
+    if not getattr(redis.client.Redis.execute_command, "_traced", False):
+        redis.client.Redis.execute_command = _traced_execute_command(
+            redis.client.Redis.execute_command
+        )
+        redis.client.Pipeline.execute = _traced_pipeline_execute(
+            redis.client.Pipeline.execute
+        )
+
+    if TRACE_FILE and _exporter is None:
+        # appended to by every worker, rotated outside the app
+        handler = output_handler(TRACE_FILE)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        QueueListener(trace_queue, handler).start()
+        _exporter = logging.getLogger("tracing")
+        _exporter.propagate = False
+        _exporter.setLevel(logging.INFO)
+        _exporter.addHandler(NonBlockingQueueHandler(trace_queue))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, field_serializer, HttpUrl, field_validator
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 
@@ -139,15 +139,52 @@ class LeaveRequestSchema(BaseModel):
         return v
 
     @field_validator("end_date")
-    def validate_end_date(cls, v, values):
-        if v and "start_date" in values and values["start_date"]:
-            start_date = datetime.strptime(values["start_date"], "%Y-%m-%d")
+    def validate_end_date(cls, v, info):
+        if v and info.data.get("start_date"):
+            start_date = datetime.strptime(info.data["start_date"], "%Y-%m-%d")
             end_date = datetime.strptime(v, "%Y-%m-%d")
             if start_date > end_date:
                 raise ValueError("Start date must be before end date")
         return v
 
 
+class LeaveDecisionSchema(BaseModel):
+    leave_request_ids: List[str]
+    status: str
+
+    @field_validator("leave_request_ids")
+    def validate_leave_request_ids(cls, v):
+        if not v:
+            raise ValueError("At least one leave request is required")
+        return list(dict.fromkeys(v))
+
+    @field_validator("status")
+    def validate_status(cls, v):
+        if v not in ("approved", "rejected"):
+            raise ValueError("Status must be approved or rejected")
+        return v
+
+
+class PayrollRunSchema(BaseModel):
+    period_start: str
+    period_end: str
+
+    @field_validator("period_start", "period_end")
+    def validate_date_format(cls, v):
+        try:
+            datetime.strptime(v, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("Date must be in YYYY-MM-DD format")
+        return v
+
+    @field_validator("period_end")
+    def validate_period_end(cls, v, info):
+        period_start = info.data.get("period_start")
+        if period_start and period_start > v:
+            raise ValueError("period_start must be before period_end")
+        return v
+
+
 class CreateJobPostingSchema(BaseModel):
     title: str
     description: str
@@ -1,11 +1,13 @@
 from jose import JWTError, jwt
-from constants import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from constants import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, HR_ROLES
 from datetime import datetime, timedelta
 from fastapi import status, Depends, HTTPException, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from database import get_db
+from database import get_db, Db_Session
 from models import Users
+from monitoring.tracing import traced
 
 auth_scheme = HTTPBearer(scheme_name="Bearer", auto_error=False)
 
@@ -31,6 +33,7 @@ def verify_token(token: str, credentials_exception):
         raise credentials_exception
 
 
+@traced("get_current_user")
 def get_current_user(
     request: Request,
     token: HTTPAuthorizationCredentials = Depends(auth_scheme),
@@ -55,3 +58,49 @@ def get_current_user(
 
     request.state.user_id = user_id
     return user
+
+
+# internal endpoints are only for superadmins
+def get_superadmin(current_user: Users = Depends(get_current_user)):
+    if not current_user.is_superadmin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to access this resource",
+        )
+    return current_user
+
+
+# superadmins and users with one of the HR_ROLES manage other employees
+def is_hr_admin(user):
+    if user.is_superadmin:
+        return True
+    return bool(user.role and user.role.name.lower() in HR_ROLES)
+
+
+def get_hr_admin(current_user: Users = Depends(get_current_user)):
+    if not is_hr_admin(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to access this resource",
+        )
+    return current_user
+
+
+# for middlewares, whether the raw asgi headers carry a superadmin's token
+async def is_superadmin_request(headers):
+    authorization = headers.get(b"authorization", b"").decode()
+    if not authorization.lower().startswith("bearer "):
+        return False
+    try:
+        user_id = verify_token(authorization[7:], ValueError())
+    except ValueError:
+        return False
+    return await run_in_threadpool(_is_superadmin, user_id)
+
+
+def _is_superadmin(user_id):
+    db = Db_Session()
+    try:
+        return bool(db.query(Users.is_superadmin).filter(Users.id == user_id).scalar())
+    finally:
+        db.close()
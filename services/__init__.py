@@ -1 +1 @@
-from services.email import send_email
+from services.email import send_email, send_bulk_email
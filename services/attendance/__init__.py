@@ -0,0 +1,80 @@
+import numpy as np
+from datetime import datetime
+
+SECONDS_IN_DAY = 86400
+
+
+# convert a list of datetime.time to seconds since midnight, NaN where missing
+def times_to_seconds(times):
+    return np.array(
+        [
+            (
+                t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+                if t
+                else np.nan
+            )
+            for t in times
+        ],
+        dtype=np.float64,
+    )
+
+
+def attendance_metrics(
+    check_in, check_out, start_time, end_time, now=None, open_shifts=True
+):
+    """
+    Work schedule, logged time, overtime and deficit in seconds for arrays of
+    attendance rows (seconds since midnight, NaN where missing).
+
+    Shifts ending before they start run past midnight. A shift that is still
+    open is logged up to the current time, capped at the scheduled end, or
+    not at all without open_shifts, as in reports over past days. Lateness counts as soon as the employee clocked in, overtime and early
+    departure only once the shift is closed.
+    """
+    if now is None:
+        now = datetime.now().time()
+    now = times_to_seconds([now])[0]
+
+    has_check_in = ~np.isnan(check_in)
+    has_check_out = ~np.isnan(check_out)
+    has_schedule = ~(np.isnan(start_time) | np.isnan(end_time))
+
+    end = np.where(end_time < start_time, end_time + SECONDS_IN_DAY, end_time)
+    work_schedule = np.where(has_schedule, end - start_time, 0)
+
+    out = np.where(check_out < check_in, check_out + SECONDS_IN_DAY, check_out)
+    open_end = np.where(end_time < check_in, end_time + SECONDS_IN_DAY, end_time)
+    open_end = np.where(np.isnan(end_time), now, np.minimum(now, open_end))
+    open_end = np.where(open_end < check_in, open_end + SECONDS_IN_DAY, open_end)
+    if not open_shifts:
+        open_end = check_in
+    logged_time = np.where(
+        has_check_in, np.where(has_check_out, out, open_end) - check_in, 0
+    )
+
+    closed = has_check_in & has_check_out & has_schedule
+    late = np.where(has_check_in, np.clip(check_in - start_time, 0, None), 0)
+    overtime = np.where(closed, np.clip(out - end, 0, None), 0)
+    early = np.where(closed, np.clip(end - out, 0, None), 0)
+
+    return {
+        "work_schedule": work_schedule,
+        "logged_time": logged_time,
+        "overtime": overtime,
+        "deficit": np.nan_to_num(late) + early,
+    }
+
+
+# metrics of a list of Attendance records, one dict of seconds per record
+def records_metrics(records, now=None):
+    metrics = attendance_metrics(
+        times_to_seconds([record.check_in for record in records]),
+        times_to_seconds([record.check_out for record in records]),
+        times_to_seconds([record.start_time for record in records]),
+        times_to_seconds([record.end_time for record in records]),
+        now,
+    )
+    return [
+        {name: values[index].item() for name, values in metrics.items()}
+        for index in range(len(records))
+    ]
@@ -0,0 +1,54 @@
+import numpy as np
+from datetime import datetime, timedelta
+from constants import WORK_WEEKMASK
+from services.leave import holiday_dates
+
+
+def _day(value):
+    return np.datetime64(value.date() if hasattr(value, "date") else value, "D")
+
+
+class HolidayCalendar:
+    """
+    Working-day calendar of an organization, compiled once from its holiday
+    rows. Holidays are listed newest first, undated ones last.
+    """
+
+    def __init__(self, holidays, weekmask=WORK_WEEKMASK):
+        self.holidays = sorted(
+            holidays,
+            key=lambda holiday: (
+                holiday.from_date is not None,
+                holiday.from_date or datetime.min,
+            ),
+            reverse=True,
+        )
+
+        ranges = [
+            (holiday.from_date, holiday.to_date)
+            for holiday in holidays
+            if holiday.from_date and holiday.to_date
+        ]
+        self._busdaycal = np.busdaycalendar(
+            weekmask=weekmask, holidays=holiday_dates(ranges)
+        )
+        self._names = {
+            holiday.name.lower(): holiday for holiday in holidays if holiday.name
+        }
+
+    def working_days_between(self, start_date, end_date):
+        """Working days from start_date to end_date, both inclusive."""
+        return int(
+            np.busday_count(
+                _day(start_date),
+                _day(end_date + timedelta(days=1)),
+                busdaycal=self._busdaycal,
+            )
+        )
+
+    def is_working_day(self, day):
+        """Whether day is on the weekmask and not a holiday."""
+        return bool(np.is_busday(_day(day), busdaycal=self._busdaycal))
+
+    def find(self, name):
+        return self._names.get((name or "").lower())
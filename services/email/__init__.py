@@ -5,7 +5,8 @@ import os
 from jinja2 import Environment, FileSystemLoader
 from dotenv import load_dotenv
 from logger import logger
-from constants import EMAIL_USER, EMAIL_PASSWORD
+from constants import EMAIL_USER, EMAIL_PASSWORD, SMTP_HOST, SMTP_PORT, FROM_EMAIL
+from monitoring.tracing import traced
 
 load_dotenv()
 
@@ -14,37 +15,37 @@ templates_path = os.path.join(os.getcwd(), "templates")
 jinja_env = Environment(loader=FileSystemLoader(templates_path))
 
 
-def send_email(context):
-    try:
-        logger.info("Sending Mail")
-        smtp_host = "smtp.gmail.com"
-        smtp_port = 587
-        smtp_user = EMAIL_USER
-        smtp_password = EMAIL_PASSWORD
+def _smtp_connection():
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    server.starttls()
+    server.login(EMAIL_USER, EMAIL_PASSWORD)
+    return server
 
-        server = smtplib.SMTP(smtp_host, smtp_port)
-        server.starttls()
-        server.login(smtp_user, smtp_password)
 
-        from_email = "support@teamflow.com"
-        to_email = context["email"]
-        subject = context["subject"]
+def _build_message(context):
+    # Load the HTML template
+    template = jinja_env.get_template(context["template_name"])
 
-        # Load the HTML template
-        template = jinja_env.get_template(context["template_name"])
+    # Render the template with the context
+    body = template.render(**context)
 
-        # Render the template with the context
-        body = template.render(**context)
+    msg = MIMEMultipart()
+    msg["From"] = FROM_EMAIL
+    msg["To"] = context["email"]
+    msg["Subject"] = context["subject"]
 
-        msg = MIMEMultipart()
-        msg["From"] = from_email
-        msg["To"] = to_email
-        msg["Subject"] = subject
+    # Attach the rendered HTML content
+    msg.attach(MIMEText(body, "html"))
+    return msg
 
-        # Attach the rendered HTML content
-        msg.attach(MIMEText(body, "html"))
 
-        server.sendmail(from_email, to_email, msg.as_string())
+@traced("smtp send_email", "client")
+def send_email(context):
+    try:
+        logger.info("Sending Mail")
+        server = _smtp_connection()
+        msg = _build_message(context)
+        server.sendmail(FROM_EMAIL, context["email"], msg.as_string())
 
         server.quit()
         return "Mail sent successfully"
@@ -53,3 +54,26 @@ def send_email(context):
         logger.exception("Failed to send mail from celery")
         logger.error(f"{e}: error@celery/send_mail")
         return "Failed to send mail"
+
+
+# send many mails over a single smtp connection
+@traced("smtp send_bulk_email", "client")
+def send_bulk_email(contexts):
+    if not contexts:
+        return 0
+    sent = 0
+    try:
+        logger.info("Sending %s Mails", len(contexts))
+        server = _smtp_connection()
+        for context in contexts:
+            try:
+                msg = _build_message(context)
+                server.sendmail(FROM_EMAIL, context["email"], msg.as_string())
+                sent += 1
+            except smtplib.SMTPRecipientsRefused as e:
+                logger.error(f"{e}: error@send_bulk_email {context['email']}")
+        server.quit()
+    except Exception as e:
+        logger.exception("Failed to send bulk mail")
+        logger.error(f"{e}: error@send_bulk_email")
+    return sent
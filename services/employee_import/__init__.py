@@ -0,0 +1,106 @@
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from datetime import datetime
+from connections import redis_conn
+from constants import DEFAULT_PASSWORD, EMPLOYEE_IMPORT_HASH_WORKERS
+from helpers import hash_password
+
+IMPORT_PROGRESS_EXPIRES = 86400
+MAX_REPORTED_ERRORS = 100
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+_hash_pool = None
+
+
+def _progress_key(import_id):
+    return f"employee_import:{import_id}"
+
+
+def save_progress(import_id, progress):
+    redis_conn.set(
+        _progress_key(import_id), json.dumps(progress), IMPORT_PROGRESS_EXPIRES
+    )
+
+
+def get_progress(import_id):
+    progress = redis_conn.get(_progress_key(import_id))
+    return json.loads(progress) if progress else None
+
+
+def new_progress(organization_id, file_name):
+    return {
+        "organization_id": organization_id,
+        "file_name": file_name,
+        "status": "queued",
+        "processed": 0,
+        "created": 0,
+        "skipped": 0,
+        "errors": [],
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+def add_error(progress, row, detail):
+    progress["skipped"] += 1
+    if len(progress["errors"]) < MAX_REPORTED_ERRORS:
+        progress["errors"].append({"row": row, "detail": detail})
+
+
+def _header(value):
+    return str(value or "").strip().lower().replace(" ", "_")
+
+
+def _iter_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        header = [_header(column) for column in next(reader, [])]
+        for values in reader:
+            if any(values):
+                yield dict(zip(header, values))
+
+
+def _iter_xlsx(path):
+    # openpyxl is only needed by spreadsheet imports
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_header(column) for column in next(rows, [])]
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_employee_rows(path):
+    """Rows of an uploaded CSV or XLSX file as dicts, read lazily."""
+    if path.endswith(".xlsx"):
+        return _iter_xlsx(path)
+    return _iter_csv(path)
+
+
+def parse_date_joined(value):
+    if isinstance(value, datetime):
+        return value
+    if value is None or not str(value).strip():
+        return None
+    return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d")
+
+
+def hash_default_passwords(count):
+    """Hash DEFAULT_PASSWORD count times (each hash is salted) on a process pool."""
+    global _hash_pool
+    if _hash_pool is None:
+        # the api runs threads, a forked child could inherit a held lock
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=EMPLOYEE_IMPORT_HASH_WORKERS, mp_context=get_context("spawn")
+        )
+    chunksize = max(1, count // EMPLOYEE_IMPORT_HASH_WORKERS)
+    return list(
+        _hash_pool.map(hash_password, [DEFAULT_PASSWORD] * count, chunksize=chunksize)
+    )
@@ -0,0 +1,51 @@
+import numpy as np
+from datetime import timedelta
+from constants import WORK_WEEKMASK
+
+
+# every date covered by a list of (from_date, to_date) holiday ranges
+def holiday_dates(ranges):
+    days = [
+        np.arange(
+            np.datetime64(from_date.date(), "D"),
+            np.datetime64(to_date.date(), "D") + 1,
+        )
+        for from_date, to_date in ranges
+        if from_date and to_date
+    ]
+    return np.unique(np.concatenate(days)) if days else np.array([], "datetime64[D]")
+
+
+# working days from start to end inclusive, skipping weekends and holidays
+def working_days(start_date, end_date, holidays=None, weekmask=WORK_WEEKMASK):
+    return int(
+        np.busday_count(
+            start_date.date(),
+            (end_date + timedelta(days=1)).date(),
+            weekmask=weekmask,
+            holidays=holidays if holidays is not None else [],
+        )
+    )
+
+
+def leave_balances(leave_types, used):
+    """
+    Balance of every leave type, used maps (leave_type_id, status) to the
+    working days of the year's requests. Pending days are reserved.
+    """
+    balances = []
+    for leave_type in leave_types:
+        approved = used.get((leave_type.id, "approved"), 0)
+        pending = used.get((leave_type.id, "pending"), 0)
+        entitlement = leave_type.duration or 0
+        balances.append(
+            {
+                "leave_type_id": leave_type.id,
+                "leave_type": leave_type.name,
+                "entitlement": entitlement,
+                "used": approved,
+                "pending": pending,
+                "available": max(entitlement - approved - pending, 0),
+            }
+        )
+    return balances
@@ -0,0 +1,60 @@
+import numpy as np
+from constants import PAYROLL_OVERTIME_RATE
+from services.attendance import attendance_metrics
+
+
+def compute_payroll(
+    gross,
+    user_index,
+    day,
+    check_in,
+    check_out,
+    start_time,
+    end_time,
+    scheduled_seconds,
+):
+    """
+    Compute a payroll chunk in one pass.
+
+    gross holds the compensation of each employee prorated to the period,
+    user_index maps every attendance row to its position in gross and day
+    holds the date of the row. The
+    hourly rate of an employee is their gross spread over scheduled_seconds,
+    the expected working time of the period.
+    """
+    gross = np.asarray(gross, dtype=np.float64)
+    user_index = np.asarray(user_index, dtype=np.intp)
+    size = len(gross)
+
+    metrics = attendance_metrics(check_in, check_out, start_time, end_time)
+    overtime_seconds = np.bincount(
+        user_index, weights=metrics["overtime"], minlength=size
+    )
+    deficit_seconds = np.bincount(
+        user_index, weights=metrics["deficit"], minlength=size
+    )
+    # several punches on a day still make one day worked
+    worked = ~np.isnan(np.asarray(check_in, dtype=np.float64))
+    days = np.asarray(day, dtype="datetime64[D]").astype(np.int64)
+    worked_days = (
+        np.unique(np.stack([user_index[worked], days[worked]]), axis=1)[0]
+        if worked.any()
+        else np.array([], dtype=np.intp)
+    )
+    days_worked = np.bincount(worked_days, minlength=size)
+
+    hourly_rate = (
+        gross / (scheduled_seconds / 3600) if scheduled_seconds else np.zeros(size)
+    )
+    overtime_pay = overtime_seconds / 3600 * hourly_rate * PAYROLL_OVERTIME_RATE
+    deficit_deduction = np.minimum(deficit_seconds / 3600 * hourly_rate, gross)
+
+    return {
+        "gross": np.round(gross, 2),
+        "days_worked": days_worked.astype(np.int64),
+        "overtime_seconds": overtime_seconds.astype(np.int64),
+        "deficit_seconds": deficit_seconds.astype(np.int64),
+        "overtime_pay": np.round(overtime_pay, 2),
+        "deficit_deduction": np.round(deficit_deduction, 2),
+        "net": np.round(gross + overtime_pay - deficit_deduction, 2),
+    }
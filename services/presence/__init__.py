@@ -0,0 +1,138 @@
+import numpy as np
+from connections import redis_conn
+from constants import PRESENCE_RETENTION_DAYS
+
+# Per-organization, per-day presence bitmaps. Every employee gets a dense
+# index in the organization, that bit of the day's "in" bitmap is set when
+# they clock in and of the "out" bitmap when they clock out. The "employees"
+# bitmap holds everyone who is expected at work.
+
+PRESENCE_STATES = ("present", "absent", "still_in", "clocked_out")
+
+
+def _index_key(organization_id):
+    return f"presence_index:{organization_id}"
+
+
+def _employees_key(organization_id):
+    return f"presence:{organization_id}:employees"
+
+
+def _day_key(organization_id, day, kind):
+    return f"presence:{organization_id}:{day.isoformat()}:{kind}"
+
+
+def employee_index(organization_id, user_id):
+    key = _index_key(organization_id)
+    index = redis_conn.hget(key, f"u:{user_id}")
+    if index is not None:
+        return int(index)
+
+    candidate = redis_conn.incr(f"{key}:next") - 1
+    if redis_conn.hsetnx(key, f"u:{user_id}", candidate):
+        redis_conn.hset(key, f"i:{candidate}", user_id)
+        return candidate
+    # another worker indexed this employee first
+    return int(redis_conn.hget(key, f"u:{user_id}"))
+
+
+def register_employee(organization_id, user_id):
+    index = employee_index(organization_id, user_id)
+    redis_conn.setbit(_employees_key(organization_id), index, 1)
+
+
+def _mark(organization_id, user_id, day, kind):
+    index = employee_index(organization_id, user_id)
+    key = _day_key(organization_id, day, kind)
+    pipe = redis_conn.pipeline()
+    pipe.setbit(key, index, 1)
+    pipe.expire(key, PRESENCE_RETENTION_DAYS * 86400)
+    pipe.setbit(_employees_key(organization_id), index, 1)
+    pipe.execute()
+
+
+def mark_clock_in(organization_id, user_id, day):
+    _mark(organization_id, user_id, day, "in")
+
+
+def mark_clock_out(organization_id, user_id, day):
+    _mark(organization_id, user_id, day, "out")
+
+
+def presence_counts(organization_id, day):
+    clocked_in = _day_key(organization_id, day, "in")
+    clocked_out = _day_key(organization_id, day, "out")
+    employees = _employees_key(organization_id)
+    both = _day_key(organization_id, day, "in_and_out")
+    expected = _day_key(organization_id, day, "in_and_employees")
+
+    pipe = redis_conn.pipeline()
+    pipe.bitop("AND", both, clocked_in, clocked_out)
+    pipe.bitop("AND", expected, clocked_in, employees)
+    pipe.bitcount(clocked_in)
+    pipe.bitcount(employees)
+    pipe.bitcount(both)
+    pipe.bitcount(expected)
+    pipe.delete(both, expected)
+    _, _, present, total, finished, present_expected, _ = pipe.execute()
+
+    return {
+        "employees": total,
+        "present": present,
+        "absent": total - present_expected,
+        "still_in": present - finished,
+        "clocked_out": finished,
+    }
+
+
+def _bits(key):
+    raw = redis_conn.get_bytes(key) or b""
+    return np.unpackbits(np.frombuffer(raw, dtype=np.uint8)).astype(bool)
+
+
+def presence_members(organization_id, day, state):
+    """User ids of the organization in one of PRESENCE_STATES on a day."""
+    clocked_in = _bits(_day_key(organization_id, day, "in"))
+    clocked_out = _bits(_day_key(organization_id, day, "out"))
+    employees = _bits(_employees_key(organization_id))
+
+    size = max(len(clocked_in), len(clocked_out), len(employees))
+    clocked_in, clocked_out, employees = (
+        np.pad(bits, (0, size - len(bits)))
+        for bits in (clocked_in, clocked_out, employees)
+    )
+
+    bits = {
+        "present": clocked_in,
+        "absent": employees & ~clocked_in,
+        "still_in": clocked_in & ~clocked_out,
+        "clocked_out": clocked_in & clocked_out,
+    }[state]
+    indexes = np.flatnonzero(bits)
+    if not len(indexes):
+        return []
+    user_ids = redis_conn.hmget(
+        _index_key(organization_id), [f"i:{index}" for index in indexes]
+    )
+    return [user_id for user_id in user_ids if user_id]
+
+
+def rebuild_presence(organization_id, day, employee_ids, in_ids, out_ids):
+    """Replace the bitmaps of a day with the given user ids."""
+    pipe = redis_conn.pipeline()
+    for key, user_ids in (
+        (_employees_key(organization_id), employee_ids),
+        (_day_key(organization_id, day, "in"), in_ids),
+        (_day_key(organization_id, day, "out"), out_ids),
+    ):
+        staging = f"{key}:rebuild"
+        pipe.delete(staging)
+        for user_id in user_ids:
+            pipe.setbit(staging, employee_index(organization_id, user_id), 1)
+        if user_ids:
+            pipe.rename(staging, key)
+        else:
+            pipe.delete(key)
+    pipe.expire(_day_key(organization_id, day, "in"), PRESENCE_RETENTION_DAYS * 86400)
+    pipe.expire(_day_key(organization_id, day, "out"), PRESENCE_RETENTION_DAYS * 86400)
+    pipe.execute()
@@ -7,11 +7,28 @@ from apis import (
     admin_router,
     settings_router,
     org_router,
+    internal_router,
+    metrics_router,
 )
 from sockets import websocket_router
 from database import engine, Base
 from fastapi.middleware.cors import CORSMiddleware
-from middlewares import MaintenanceMiddleware, RateLimitMiddleware
+from middlewares import (
+    MaintenanceMiddleware,
+    RateLimitMiddleware,
+    QueryCounterMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    RequestIdMiddleware,
+    TracingMiddleware,
+)
+from monitoring import (
+    instrument_queries,
+    instrument_redis,
+    instrument_tracing,
+    loop_lag_monitor,
+    memory_monitor,
+)
 from starlette.middleware.sessions import SessionMiddleware
 from dotenv import load_dotenv
 from utils.rate_limit import limiter
@@ -23,6 +40,7 @@ from constants import (
     SECRET_KEY,
     API_VERSION,
     API_VERSION_ADMIN,
+    LOOP_LAG_MONITOR,
 )
 
 # noinspection PyProtectedMember
@@ -37,6 +55,19 @@ app = FastAPI(
 
 
 def create_app():
+    instrument_queries()
+    instrument_redis()
+    instrument_tracing()
+
+    # innermost, the span of the routed handler
+    # noinspection PyTypeChecker
+    app.add_middleware(TracingMiddleware, root=False)
+    # noinspection PyTypeChecker
+    app.add_middleware(QueryCounterMiddleware)
+    # noinspection PyTypeChecker
+    app.add_middleware(MetricsMiddleware)
+    # noinspection PyTypeChecker
+    app.add_middleware(ProfilingMiddleware)
     # noinspection PyTypeChecker
     app.add_middleware(MaintenanceMiddleware)
     # noinspection PyTypeChecker
@@ -54,6 +85,13 @@ def create_app():
     # noinspection PyTypeChecker
     app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
+    # the request span, around every middleware
+    # noinspection PyTypeChecker
+    app.add_middleware(TracingMiddleware, root=True)
+    # outermost, everything logged for a request carries its id
+    # noinspection PyTypeChecker
+    app.add_middleware(RequestIdMiddleware)
+
     # noinspection PyUnresolvedReferences
     app.state.limiter = limiter
 
@@ -67,14 +105,22 @@ def create_app():
         logger.error(exc.detail)
         raise HTTPException(status_code=429, detail="Too many requests")
 
+    if LOOP_LAG_MONITOR:
+        app.add_event_handler("startup", loop_lag_monitor.start)
+        app.add_event_handler("shutdown", loop_lag_monitor.stop)
+    app.add_event_handler("startup", memory_monitor.start)
+    app.add_event_handler("shutdown", memory_monitor.stop)
+
     Base.metadata.create_all(engine)
 
     app.include_router(ping_router)
+    app.include_router(metrics_router)
     app.include_router(auth_router, prefix=f"/{API_VERSION}")
     app.include_router(user_router, prefix=f"/{API_VERSION}")
     app.include_router(cloudinary_router, prefix=f"/{API_VERSION}")
     app.include_router(admin_router, prefix=f"/{API_VERSION_ADMIN}")
     app.include_router(settings_router, prefix=f"/{API_VERSION}")
     app.include_router(org_router, prefix=f"/{API_VERSION}")
+    app.include_router(internal_router, prefix=f"/{API_VERSION_ADMIN}")
     app.include_router(websocket_router)
     return app
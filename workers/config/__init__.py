@@ -4,6 +4,7 @@ from datetime import datetime
 import workers.schedule as celeryConfig
 from dotenv import load_dotenv
 from logger import logger
+from monitoring import instrument_queries
 
 load_dotenv()
 
@@ -15,6 +16,7 @@ def make_celery():
         broker=f"redis://{os.environ.get('REDIS_HOST')}:{os.environ.get('REDIS_PORT')}",
     )
     celery.conf.update(vars(celeryConfig))
+    instrument_queries()
 
     return celery
 
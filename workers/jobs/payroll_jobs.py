@@ -0,0 +1,7 @@
+from workers.config import celery, shared_task
+from cruds import run_payroll
+
+
+@shared_task
+def process_payroll_run(run_id):
+    return run_payroll(run_id)
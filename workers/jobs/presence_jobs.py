@@ -0,0 +1,13 @@
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from workers.config import celery, shared_task
+from workers.schedule import CELERY_TIMEZONE
+from cruds import reconcile_presence
+
+
+@shared_task
+def reconcile_presence_bitmaps():
+    # close out yesterday and seed today's employees bitmap, in beat's timezone
+    today = datetime.now(ZoneInfo(CELERY_TIMEZONE)).date()
+    reconcile_presence(today - timedelta(days=1))
+    return reconcile_presence(today)
@@ -1,7 +1,11 @@
 from celery.schedules import crontab
 
 
-CELERY_IMPORTS = ("workers.jobs.test_jobs",)
+CELERY_IMPORTS = (
+    "workers.jobs.test_jobs",
+    "workers.jobs.payroll_jobs",
+    "workers.jobs.presence_jobs",
+)
 CELERY_TASK_RESULT_EXPIRES = 30
 CELERY_TIMEZONE = "Africa/Lagos"
 
@@ -14,4 +18,8 @@ CELERYBEAT_SCHEDULE = {
         "task": "workers.jobs.test_jobs.test_cron",
         "schedule": crontab(minute="29", hour="11"),
     },
+    "reconcile_presence": {
+        "task": "workers.jobs.presence_jobs.reconcile_presence_bitmaps",
+        "schedule": crontab(minute="15", hour="0"),
+    },
 }